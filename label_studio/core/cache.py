@@ -0,0 +1,220 @@
+"""This file and its contents are licensed under the Apache License 2.0. Please see the included NOTICE for copyright information and LICENSE for a copy of the license.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class TieredRedisCache(RedisCache):
+    """Redis cache shared by all workers with a short-lived in-process (L1) tier.
+
+    Reads are served from the local L1 tier for OPTIONS['L1_TIMEOUT'] seconds. Every write or delete
+    is published to a Redis channel, and each process evicts these keys from its L1 tier, so an
+    invalidation in one worker reaches all the others. If the subscription is lost, staleness is still
+    bounded by L1_TIMEOUT.
+
+    OPTIONS:
+        L1_TIMEOUT: local tier TTL in seconds, 0 disables the local tier
+        L1_MAX_ENTRIES: maximum number of entries in the local tier
+        INVALIDATION_CHANNEL: Redis channel for invalidation messages (default: "<KEY_PREFIX>:invalidate")
+        Other options are passed to the Redis connection pool (e.g. SSL settings).
+    """
+
+    def __init__(self, server, params):
+        params = dict(params)
+        options = dict(params.get('OPTIONS', {}))
+        self.l1_timeout = float(options.pop('L1_TIMEOUT', 5))
+        l1_max_entries = int(options.pop('L1_MAX_ENTRIES', 10000))
+        self.invalidation_channel = options.pop(
+            'INVALIDATION_CHANNEL', f'{params.get("KEY_PREFIX") or "cache"}:invalidate'
+        )
+        params['OPTIONS'] = options
+        super().__init__(server, params)
+
+        self._l1 = LocMemCache(
+            f'tiered-redis-l1-{uuid.uuid4()}',
+            {
+                'TIMEOUT': self.l1_timeout,
+                'OPTIONS': {'MAX_ENTRIES': l1_max_entries},
+                'KEY_FUNCTION': lambda key, key_prefix, version: key,
+            },
+        )
+        self._origin = uuid.uuid4().hex
+        self._listener_lock = threading.Lock()
+        self._listener_pid = None
+
+    @property
+    def l1_enabled(self):
+        return self.l1_timeout > 0
+
+    # local tier
+
+    def _l1_get(self, key):
+        if not self.l1_enabled:
+            return _MISSING
+        self._ensure_listener()
+        return self._l1.get(key, _MISSING)
+
+    def _l1_set(self, key, value):
+        if self.l1_enabled:
+            self._l1.set(key, value)
+
+    def _l1_evict(self, keys):
+        if self.l1_enabled:
+            self._l1.delete_many(keys)
+
+    # invalidation across processes
+
+    def _publish(self, keys):
+        """Notify other processes that keys changed; None means the whole cache was cleared"""
+        if not self.l1_enabled:
+            return
+        message = json.dumps({'origin': self._origin, 'keys': keys})
+        try:
+            self._cache.get_client(write=True).publish(self.invalidation_channel, message)
+        except Exception as exc:
+            logger.warning(f'Cache invalidation publish failed: {exc}')
+
+    def _ensure_listener(self):
+        pid = os.getpid()
+        if self._listener_pid == pid:
+            return
+        with self._listener_lock:
+            if self._listener_pid == pid:
+                return
+            # L1 content inherited from the parent process may already be stale
+            self._l1.clear()
+            thread = threading.Thread(target=self._listen, name='cache-invalidation', daemon=True)
+            thread.start()
+            self._listener_pid = pid
+
+    def _listen(self):
+        while True:
+            pubsub = None
+            try:
+                pubsub = self._cache.get_client(write=True).pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.invalidation_channel)
+                # messages could be lost while (re)subscribing
+                self._l1.clear()
+                for message in pubsub.listen():
+                    self._handle_invalidation(message)
+            except Exception as exc:
+                logger.warning(f'Cache invalidation listener failed, retrying: {exc}')
+                self._l1.clear()
+                time.sleep(1)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+
+    def _handle_invalidation(self, message):
+        if message.get('type') != 'message':
+            return
+        data = json.loads(message['data'])
+        if data['origin'] == self._origin:
+            return
+        if data['keys'] is None:
+            self._l1.clear()
+        else:
+            self._l1.delete_many(data['keys'])
+
+    # cache API
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        value = self._l1_get(key)
+        if value is not _MISSING:
+            return value
+        value = self._cache.get(key, _MISSING)
+        if value is _MISSING:
+            return default
+        self._l1_set(key, value)
+        return value
+
+    def get_many(self, keys, version=None):
+        key_map = {self.make_and_validate_key(key, version=version): key for key in keys}
+        result = {}
+        missing = []
+        for made_key, key in key_map.items():
+            value = self._l1_get(made_key)
+            if value is _MISSING:
+                missing.append(made_key)
+            else:
+                result[key] = value
+        if missing:
+            for made_key, value in self._cache.get_many(missing).items():
+                self._l1_set(made_key, value)
+                result[key_map[made_key]] = value
+        return result
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        made_key = self.make_and_validate_key(key, version=version)
+        added = self._cache.add(made_key, value, self.get_backend_timeout(timeout))
+        if added:
+            self._l1_evict([made_key])
+            self._publish([made_key])
+        return added
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        made_key = self.make_and_validate_key(key, version=version)
+        self._cache.set(made_key, value, self.get_backend_timeout(timeout))
+        self._l1_evict([made_key])
+        self._publish([made_key])
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        if not data:
+            return []
+        safe_data = {self.make_and_validate_key(key, version=version): value for key, value in data.items()}
+        self._cache.set_many(safe_data, self.get_backend_timeout(timeout))
+        self._l1_evict(list(safe_data))
+        self._publish(list(safe_data))
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        made_key = self.make_and_validate_key(key, version=version)
+        touched = self._cache.touch(made_key, self.get_backend_timeout(timeout))
+        if timeout is not None and timeout != DEFAULT_TIMEOUT and timeout <= 0:
+            self._l1_evict([made_key])
+            self._publish([made_key])
+        return touched
+
+    def delete(self, key, version=None):
+        made_key = self.make_and_validate_key(key, version=version)
+        deleted = self._cache.delete(made_key)
+        self._l1_evict([made_key])
+        self._publish([made_key])
+        return deleted
+
+    def delete_many(self, keys, version=None):
+        if not keys:
+            return
+        safe_keys = [self.make_and_validate_key(key, version=version) for key in keys]
+        self._cache.delete_many(safe_keys)
+        self._l1_evict(safe_keys)
+        self._publish(safe_keys)
+
+    def incr(self, key, delta=1, version=None):
+        made_key = self.make_and_validate_key(key, version=version)
+        value = self._cache.incr(made_key, delta)
+        self._l1_evict([made_key])
+        self._publish([made_key])
+        return value
+
+    def clear(self):
+        result = self._cache.clear()
+        self._l1.clear()
+        self._publish(None)
+        return result
@@ -1,4 +1,6 @@
 import logging
+import threading
+from collections import OrderedDict
 
 import ldclient
 from django.conf import settings
@@ -70,6 +72,57 @@ else:
     client = ldclient.get()
 
 
+class FlagsSnapshot:
+    """Process-wide LRU memo of flag evaluations for file and offline modes.
+
+    Flags file is loaded once by the LaunchDarkly client and offline flags never change,
+    so values stay valid for the process lifetime. Keys include user or organization, that's why the size is bounded.
+    """
+
+    def __init__(self, maxsize=None):
+        self.maxsize = settings.FEATURE_FLAGS_SNAPSHOT_MAX_SIZE if maxsize is None else maxsize
+        self.lock = threading.Lock()
+        self.values = OrderedDict()
+
+    def get(self, key):
+        with self.lock:
+            value = self.values.get(key)
+            if value is not None:
+                self.values.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.values[key] = value
+            self.values.move_to_end(key)
+            if len(self.values) > self.maxsize:
+                self.values.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.values.clear()
+
+
+flags_snapshot = FlagsSnapshot() if settings.FEATURE_FLAGS_FROM_FILE or settings.FEATURE_FLAGS_OFFLINE else None
+
+
+def _get_request_flags_cache():
+    """Return dict to memoize flag evaluations during the current request"""
+    request = get_current_request()
+    if request is None:
+        return None
+    cache = getattr(request, '_feature_flags_cache', None)
+    if cache is None:
+        cache = request._feature_flags_cache = {}
+    return cache
+
+
+def _get_context_key(user, organization):
+    if organization is not None:
+        return 'organization', organization.id
+    return 'user', getattr(user, 'pk', None), getattr(user, 'active_organization_id', None)
+
+
 def flag_set(feature_flag, user=None, override_system_default=None, organization=None):
     """Use this method to check whether this flag is set ON to the current user, to split the logic on backend
     For example,
@@ -85,6 +138,9 @@ def flag_set(feature_flag, user=None, override_system_default=None, organization
 
     stale feature flags are considered "deprecated" and should not be changeable in any circumstance.
     They are an intermediary step before code references to the flag being removed completely.
+
+    Evaluations are memoized per request (by flag, user/organization and default value),
+    in file and offline modes they are also memoized per process (see FlagsSnapshot).
     """
 
     if feature_flag in STALE_FEATURE_FLAGS:
@@ -98,19 +154,44 @@ def flag_set(feature_flag, user=None, override_system_default=None, organization
         if request and getattr(request, 'user', None) and request.user.is_authenticated:
             user = request.user
 
-    if organization is None:
-        user_dict = get_user_repr(user)
+    if override_system_default is not None:
+        system_default = override_system_default
     else:
-        user_dict = get_user_repr_from_organization(organization)
+        system_default = settings.FEATURE_FLAGS_DEFAULT_VALUE
+
+    if not settings.FEATURE_FLAGS_CACHE_ENABLED:
+        return _evaluate_flag(feature_flag, user, organization, system_default)
 
+    key = (feature_flag, _get_context_key(user, organization), system_default)
+    request_cache = _get_request_flags_cache()
+    if request_cache is not None and key in request_cache:
+        return request_cache[key]
+
+    value = _evaluate_flag(feature_flag, user, organization, system_default, key=key)
+    if request_cache is not None:
+        request_cache[key] = value
+    return value
+
+
+def _evaluate_flag(feature_flag, user, organization, system_default, key=None):
     env_value = get_bool_env(feature_flag, default=None)
     if env_value is not None:
         return env_value
-    if override_system_default is not None:
-        system_default = override_system_default
+
+    if key is not None and flags_snapshot is not None:
+        value = flags_snapshot.get(key)
+        if value is not None:
+            return value
+
+    if organization is None:
+        user_dict = get_user_repr(user)
     else:
-        system_default = settings.FEATURE_FLAGS_DEFAULT_VALUE
-    return client.variation(feature_flag, user_dict, system_default)
+        user_dict = get_user_repr_from_organization(organization)
+    value = client.variation(feature_flag, user_dict, system_default)
+
+    if key is not None and flags_snapshot is not None:
+        flags_snapshot.set(key, value)
+    return value
 
 
 def all_flags(user):
@@ -47,3 +47,41 @@ def test_flag_set_with_organization_context_env_override(monkeypatch, settings):
     # Unset env should fall back to override_system_default=False
     monkeypatch.delenv('fflag_feat_test_org_targeting', raising=False)
     assert flag_set('fflag_feat_test_org_targeting', organization=org, override_system_default=False) is False
+
+
+def test_flag_set_memoized_per_request(monkeypatch):
+    from types import SimpleNamespace
+    from unittest import mock
+
+    from label_studio.core.feature_flags import base
+
+    request = SimpleNamespace()
+    monkeypatch.setattr(base, 'get_current_request', lambda: request)
+    monkeypatch.setenv('fflag_feat_test_memoized', 'true')
+
+    with mock.patch.object(base, 'get_bool_env', wraps=base.get_bool_env) as get_bool_env:
+        assert flag_set('fflag_feat_test_memoized') is True
+        # env changes are not visible within the same request
+        monkeypatch.setenv('fflag_feat_test_memoized', 'false')
+        assert flag_set('fflag_feat_test_memoized') is True
+        assert get_bool_env.call_count == 1
+
+    # new request evaluates the flag again
+    request = SimpleNamespace()
+    assert flag_set('fflag_feat_test_memoized') is False
+
+
+def test_flags_snapshot_is_bounded():
+    from label_studio.core.feature_flags import base
+
+    snapshot = base.FlagsSnapshot(maxsize=2)
+    snapshot.set('first', True)
+    snapshot.set('second', False)
+    assert snapshot.get('first') is True
+
+    # the least recently used key is evicted
+    snapshot.set('third', True)
+    assert snapshot.get('second') is None
+    assert snapshot.get('first') is True
+    assert snapshot.get('third') is True
+    assert len(snapshot.values) == 2
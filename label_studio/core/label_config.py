@@ -1,9 +1,12 @@
 """This file and its contents are licensed under the Apache License 2.0. Please see the included NOTICE for copyright information and LICENSE for a copy of the license.
 """
+import copy
+import hashlib
 import json
 import logging
 import re
 from collections import OrderedDict, defaultdict
+from functools import cached_property, lru_cache
 from typing import Tuple, Union
 from urllib.parse import urlencode
 
@@ -13,6 +16,7 @@ import numpy as np
 import pandas as pd
 import xmljson
 from django.conf import settings
+from django.core.cache import cache
 from label_studio_sdk._extensions.label_studio_tools.core import label_config
 from rest_framework.exceptions import ValidationError
 
@@ -49,7 +53,7 @@ def parse_config(config_string):
     }
     """
     logger.warning('Using deprecated method - switch to label_studio.tools.label_config.parse_config!')
-    return label_config.parse_config(config_string)
+    return copy.deepcopy(get_parsed_label_config(config_string).parsed)
 
 
 def _fix_choices(config):
@@ -103,6 +107,10 @@ def parse_config_to_json(config_string: Union[str, None]) -> Tuple[Union[Ordered
 
 
 def validate_label_config(config_string: Union[str, None]) -> None:
+    get_parsed_label_config(config_string).validate()
+
+
+def _validate_label_config(config_string: Union[str, None]) -> None:
     # xml and schema
     try:
         config, cleaned_config_string = parse_config_to_json(config_string)
@@ -134,6 +142,10 @@ def validate_label_config(config_string: Union[str, None]) -> None:
 
 
 def extract_data_types(label_config):
+    return dict(get_parsed_label_config(label_config).data_types)
+
+
+def _extract_data_types(label_config):
     # load config
     xml = parse_config_to_xml(label_config)
     if xml is None:
@@ -168,16 +180,23 @@ def extract_data_types(label_config):
     return data_type
 
 
+def _extract_data_keys(label_config):
+    """Task data keys referenced by $variables in any tag attribute of the config"""
+    xml = parse_config_to_xml(label_config)
+    if xml is None:
+        raise etree.ParseError('Project config is empty or incorrect')
+
+    keys = set()
+    for tag in xml.iter():
+        for value in tag.attrib.values():
+            keys.update(re.findall(r'\$(\w+)', value))
+    return keys
+
+
 def get_all_labels(label_config):
-    outputs = parse_config(label_config)
-    labels = defaultdict(list)
-    dynamic_labels = defaultdict(bool)
-    for control_name in outputs:
-        for label in outputs[control_name].get('labels', []):
-            labels[control_name].append(label)
-        if outputs[control_name].get('dynamic_labels', False):
-            dynamic_labels[control_name] = True
-    return labels, dynamic_labels
+    labels, dynamic_labels = get_parsed_label_config(label_config).labels
+    labels = defaultdict(list, {control_name: list(values) for control_name, values in labels.items()})
+    return labels, defaultdict(bool, dynamic_labels)
 
 
 def get_annotation_tuple(from_name, to_name, type):
@@ -186,16 +205,33 @@ def get_annotation_tuple(from_name, to_name, type):
     return '|'.join([from_name, to_name, type.lower()])
 
 
+def get_region_labels(region):
+    """Labels of a single annotation result region, taxonomy paths are flattened"""
+    result_type = region.get('type')
+    # DEV-1990 Workaround for Video labels as there are no labels in VideoRectangle tag
+    if result_type in ['videorectangle']:
+        result_type = 'labels'
+    result_value = region['value'].get(result_type)
+    if not result_value or not isinstance(result_value, list) or result_type == 'text':
+        # Non-list values are not labels. TextArea list values (texts) are not labels too.
+        return []
+    # Labels are stored in list
+    labels = []
+    for label in result_value:
+        if result_type == 'taxonomy' and isinstance(label, list):
+            for label_ in label:
+                labels.append(str(label_))
+        else:
+            labels.append(str(label))
+    return labels
+
+
 def get_all_control_tag_tuples(label_config):
-    outputs = parse_config(label_config)
-    out = []
-    for control_name, info in outputs.items():
-        out.append(get_annotation_tuple(control_name, info['to_name'], info['type']))
-    return out
+    return list(get_parsed_label_config(label_config).control_tag_tuples)
 
 
 def get_all_object_tag_names(label_config):
-    return set(extract_data_types(label_config))
+    return set(get_parsed_label_config(label_config).object_tag_names)
 
 
 def config_line_stipped(c):
@@ -436,8 +472,8 @@ def get_sample_task(label_config, secure_mode=False):
 
 def config_essential_data_has_changed(new_config_str, old_config_str):
     """Detect essential changes of the labeling config"""
-    new_config = parse_config(new_config_str)
-    old_config = parse_config(old_config_str)
+    new_config = get_parsed_label_config(new_config_str).parsed
+    old_config = get_parsed_label_config(old_config_str).parsed
 
     for tag, new_info in new_config.items():
         if tag not in old_config:
@@ -464,21 +500,7 @@ def check_control_in_config_by_regex(config_string, control_type, filter=None):
     """
     Check if control type is in config including regex filter
     """
-    c = parse_config(config_string)
-    if filter is not None and len(filter) == 0:
-        return False
-    if filter:
-        c = {key: c[key] for key in filter}
-    for control in c:
-        item = c[control].get('regex', {})
-        expression = control
-        for key in item:
-            expression = expression.replace(key, item[key])
-        pattern = re.compile(expression)
-        full_match = pattern.fullmatch(control_type)
-        if full_match:
-            return True
-    return False
+    return get_parsed_label_config(config_string).has_control(control_type, filter=filter)
 
 
 def check_toname_in_config_by_regex(config_string, to_name, control_type=None):
@@ -486,47 +508,139 @@ def check_toname_in_config_by_regex(config_string, to_name, control_type=None):
     Check if to_name is in config including regex filter
     :return: True if to_name is fullmatch to some pattern ion config
     """
-    c = parse_config(config_string)
-    if control_type:
-        check_list = [control_type]
-    else:
-        check_list = list(c.keys())
-    for control in check_list:
-        item = c[control].get('regex', {})
-        for to_name_item in c[control]['to_name']:
-            expression = to_name_item
-            for key in item:
-                expression = expression.replace(key, item[key])
-            pattern = re.compile(expression)
-            full_match = pattern.fullmatch(to_name)
-            if full_match:
-                return True
-    return False
+    return get_parsed_label_config(config_string).has_to_name(to_name, control_type=control_type)
 
 
 def get_original_fromname_by_regex(config_string, fromname):
     """
     Get from_name from config on from_name key from data after applying regex search or original fromname
     """
-    c = parse_config(config_string)
-    for control in c:
-        item = c[control].get('regex', {})
-        expression = control
-        for key in item:
-            expression = expression.replace(key, item[key])
-        pattern = re.compile(expression)
-        full_match = pattern.fullmatch(fromname)
-        if full_match:
-            return control
-    return fromname
+    return get_parsed_label_config(config_string).original_from_name(fromname)
 
 
 def get_all_types(label_config):
     """
     Get all types from label_config
     """
-    outputs = parse_config(label_config)
-    out = []
-    for control_name, info in outputs.items():
-        out.append(info['type'].lower())
-    return out
+    return list(get_parsed_label_config(label_config).types)
+
+
+class ParsedLabelConfig:
+    """Label config parsed once, with name patterns compiled once.
+
+    Views are computed lazily, and the expensive ones (XML parsing and schema validation) are shared
+    with other workers via the default cache, keyed by the config content hash. Instances returned by
+    get_parsed_label_config() are shared by all callers in the process, so treat views as read-only.
+    """
+
+    def __init__(self, config_string):
+        self.config_string = config_string
+
+    @cached_property
+    def content_hash(self):
+        return hashlib.sha256(self.config_string.encode()).hexdigest()
+
+    def _shared(self, view, compute):
+        """Compute view once for all workers"""
+        timeout = settings.LABEL_CONFIG_CACHE_TIMEOUT
+        if not timeout or not self.config_string:
+            return compute()
+        key = f'label_config:{self.content_hash}:{view}'
+        value = cache.get(key)
+        if value is None:
+            value = compute()
+            cache.set(key, value, timeout)
+        return value
+
+    @staticmethod
+    def _compile(expression, regex):
+        for key in regex:
+            expression = expression.replace(key, regex[key])
+        return re.compile(expression)
+
+    def validate(self):
+        """Same as validate_label_config(), only a successful validation is remembered"""
+        self._shared('valid', lambda: _validate_label_config(self.config_string) or True)
+
+    @cached_property
+    def parsed(self):
+        """Same as parse_config()"""
+        return self._shared('parsed', lambda: label_config.parse_config(self.config_string))
+
+    @cached_property
+    def data_types(self):
+        """Same as extract_data_types()"""
+        return self._shared('data_types', lambda: _extract_data_types(self.config_string))
+
+    @cached_property
+    def data_keys(self):
+        """Task data keys referenced by the config, e.g. {'image'} for <Image name="img" value="$image"/>"""
+        return self._shared('data_keys', lambda: _extract_data_keys(self.config_string))
+
+    @cached_property
+    def _control_patterns(self):
+        return {control: self._compile(control, info.get('regex', {})) for control, info in self.parsed.items()}
+
+    @cached_property
+    def _to_name_patterns(self):
+        return {
+            control: [self._compile(to_name, info.get('regex', {})) for to_name in info['to_name']]
+            for control, info in self.parsed.items()
+        }
+
+    @cached_property
+    def tag_types(self):
+        """Control tag types as in config, e.g. {'Choices', 'Labels'}"""
+        return {info['type'] for info in self.parsed.values()}
+
+    @cached_property
+    def types(self):
+        """Same as get_all_types()"""
+        return [info['type'].lower() for info in self.parsed.values()]
+
+    @cached_property
+    def labels(self):
+        """Same as get_all_labels()"""
+        labels = defaultdict(list)
+        dynamic_labels = defaultdict(bool)
+        for control_name, info in self.parsed.items():
+            if info.get('labels'):
+                labels[control_name].extend(info['labels'])
+            if info.get('dynamic_labels', False):
+                dynamic_labels[control_name] = True
+        return labels, dynamic_labels
+
+    @cached_property
+    def control_tag_tuples(self):
+        """Same as get_all_control_tag_tuples()"""
+        return [get_annotation_tuple(name, info['to_name'], info['type']) for name, info in self.parsed.items()]
+
+    @cached_property
+    def object_tag_names(self):
+        """Same as get_all_object_tag_names()"""
+        return set(self.data_types)
+
+    def has_control(self, control_type, filter=None):
+        """Same as check_control_in_config_by_regex()"""
+        if filter is not None and len(filter) == 0:
+            return False
+        controls = filter if filter else self._control_patterns.keys()
+        return any(self._control_patterns[control].fullmatch(control_type) for control in controls)
+
+    def has_to_name(self, to_name, control_type=None):
+        """Same as check_toname_in_config_by_regex()"""
+        controls = [control_type] if control_type else self._to_name_patterns.keys()
+        return any(pattern.fullmatch(to_name) for control in controls for pattern in self._to_name_patterns[control])
+
+    def original_from_name(self, fromname):
+        """Same as get_original_fromname_by_regex()"""
+        for control, pattern in self._control_patterns.items():
+            if pattern.fullmatch(fromname):
+                return control
+        return fromname
+
+
+@lru_cache(maxsize=settings.LABEL_CONFIG_CACHE_SIZE)
+def get_parsed_label_config(config_string) -> ParsedLabelConfig:
+    """Return the process-wide ParsedLabelConfig for config_string, bounded by LABEL_CONFIG_CACHE_SIZE"""
+    return ParsedLabelConfig(config_string)
@@ -506,6 +506,7 @@ SUPPORTED_EXTENSIONS = set(
         '.webm',
         '.webp',
         '.pdf',
+        '.parquet',
     ]
 )
 
@@ -571,6 +572,12 @@ REIMPORT_BATCH_SIZE = int(get_env('REIMPORT_BATCH_SIZE', 1000))
 IMPORT_BATCH_SIZE = int(get_env('IMPORT_BATCH_SIZE', 500))
 # Batch size for processing prediction imports to avoid memory issues with large datasets
 PREDICTION_IMPORT_BATCH_SIZE = int(get_env('PREDICTION_IMPORT_BATCH_SIZE', 500))
+# Maximum number of annotations in one request to the bulk annotation create API
+ANNOTATIONS_BULK_CREATE_MAX = int(get_env('ANNOTATIONS_BULK_CREATE_MAX', 10000))
+# Number of Parquet row groups decoded concurrently during import
+PARQUET_IMPORT_MAX_WORKERS = int(get_env('PARQUET_IMPORT_MAX_WORKERS', 2))
+# Parquet columns always imported in addition to the data keys used by the labeling config
+PARQUET_IMPORT_EXTRA_COLUMNS = get_env_list('PARQUET_IMPORT_EXTRA_COLUMNS', default=[])
 PROJECT_TITLE_MIN_LEN = 3
 PROJECT_TITLE_MAX_LEN = 50
 LOGIN_REDIRECT_URL = '/'
@@ -578,6 +585,10 @@ LOGIN_URL = '/user/login/'
 
 MIN_GROUND_TRUTH = 10
 DATA_UNDEFINED_NAME = '$undefined$'
+# Parsed label configs are cached by content hash: per process (LRU of this size)
+# and for all workers in the default cache for this many seconds (0 disables the shared tier)
+LABEL_CONFIG_CACHE_SIZE = int(get_env('LABEL_CONFIG_CACHE_SIZE', 256))
+LABEL_CONFIG_CACHE_TIMEOUT = int(get_env('LABEL_CONFIG_CACHE_TIMEOUT', 86400))
 LICENSE = {}
 VERSIONS = {}
 VERSION_EDITION = 'Community'
@@ -586,6 +597,14 @@ VERSIONS_CHECK_TIME = 0
 ALLOW_ORGANIZATION_WEBHOOKS = get_bool_env('ALLOW_ORGANIZATION_WEBHOOKS', False)
 CONVERTER_DOWNLOAD_RESOURCES = get_bool_env('CONVERTER_DOWNLOAD_RESOURCES', True)
 SHOW_TRACEBACK_FOR_EXPORT_CONVERTER = get_bool_env('SHOW_TRACEBACK_FOR_EXPORT_CONVERTER', True)
+# stream JSON/JSONL/CSV/TSV exports from /api/projects/<id>/export instead of building a file first
+EXPORT_STREAMING = get_bool_env('EXPORT_STREAMING', True)
+EXPORT_STREAMING_BATCH_SIZE = int(get_env('EXPORT_STREAMING_BATCH_SIZE', 500))
+EXPORT_STREAMING_CHUNK_SIZE = int(get_env('EXPORT_STREAMING_CHUNK_SIZE', 64 * 1024))
+# convert one export snapshot into several formats concurrently in a shared temp workspace
+EXPORT_CONVERT_MAX_WORKERS = int(get_env('EXPORT_CONVERT_MAX_WORKERS', 4))
+# snapshots up to this size are parsed once and shared between format writers, bigger ones are streamed per writer
+EXPORT_CONVERT_PARSE_ONCE_MAX_SIZE = int(get_env('EXPORT_CONVERT_PARSE_ONCE_MAX_SIZE', 64 * 1024 * 1024))
 EXPERIMENTAL_FEATURES = get_bool_env('EXPERIMENTAL_FEATURES', False)
 USE_ENFORCE_CSRF_CHECKS = get_bool_env('USE_ENFORCE_CSRF_CHECKS', True)  # False is for tests
 CLOUD_FILE_STORAGE_ENABLED = False
@@ -660,6 +679,15 @@ COLLECT_VERSIONS = collect_versions_dummy
 
 WEBHOOK_TIMEOUT = float(get_env('WEBHOOK_TIMEOUT', 1.0))
 WEBHOOK_BATCH_SIZE = int(get_env('WEBHOOK_BATCH_SIZE', 5000))
+# Maximum number of webhook deliveries running in parallel per process
+WEBHOOK_MAX_CONCURRENCY = int(get_env('WEBHOOK_MAX_CONCURRENCY', 8))
+# Maximum number of keep-alive connections and simultaneous requests to one webhook endpoint (scheme + host)
+WEBHOOK_MAX_CONNECTIONS_PER_ENDPOINT = int(get_env('WEBHOOK_MAX_CONNECTIONS_PER_ENDPOINT', 4))
+# Coalescing of TASKS_CREATED/ANNOTATIONS_CREATED events during storage sync and import:
+# buffered ids are emitted after this many seconds or ids, and optionally as compact id ranges
+WEBHOOK_COALESCE_WINDOW = float(get_env('WEBHOOK_COALESCE_WINDOW', 10.0))
+WEBHOOK_COALESCE_MAX_IDS = int(get_env('WEBHOOK_COALESCE_MAX_IDS', 100000))
+WEBHOOK_COALESCE_COMPACT_PAYLOAD = get_bool_env('WEBHOOK_COALESCE_COMPACT_PAYLOAD', False)
 WEBHOOK_SERIALIZERS = {
     'project': 'webhooks.serializers_for_hooks.ProjectWebhookSerializer',
     'task': 'webhooks.serializers_for_hooks.TaskWebhookSerializer',
@@ -691,6 +719,10 @@ FEATURE_FLAGS_FILE = get_env('FEATURE_FLAGS_FILE', 'feature_flags.json')
 FEATURE_FLAGS_OFFLINE = get_bool_env('FEATURE_FLAGS_OFFLINE', True)
 # default value for feature flags (if not overridden by environment or client)
 FEATURE_FLAGS_DEFAULT_VALUE = False
+# memoize flag evaluations per request, and per process for flags from file or offline mode
+FEATURE_FLAGS_CACHE_ENABLED = get_bool_env('FEATURE_FLAGS_CACHE_ENABLED', True)
+# max number of (flag, user/organization) evaluations kept in the process-wide flags snapshot
+FEATURE_FLAGS_SNAPSHOT_MAX_SIZE = int(get_env('FEATURE_FLAGS_SNAPSHOT_MAX_SIZE', 10000))
 
 # Whether to send analytics telemetry data. Fall back to old lowercase name for legacy compatibility.
 COLLECT_ANALYTICS = get_bool_env('COLLECT_ANALYTICS', get_bool_env('collect_analytics', True))
@@ -699,6 +731,21 @@ COLLECT_ANALYTICS = get_bool_env('COLLECT_ANALYTICS', get_bool_env('collect_anal
 SVG_SECURITY_CLEANUP = get_bool_env('SVG_SECURITY_CLEANUP', False)
 
 ML_BLOCK_LOCAL_IP = get_bool_env('ML_BLOCK_LOCAL_IP', False)
+# ML backend states are cached for this number of seconds, API requests don't check them live
+ML_BACKEND_STATE_TTL = int(get_env('ML_BACKEND_STATE_TTL', 120))
+# probe_ml_backends command: seconds between checks, randomized by +/- ML_BACKEND_PROBE_JITTER fraction
+ML_BACKEND_PROBE_INTERVAL = int(get_env('ML_BACKEND_PROBE_INTERVAL', 60))
+ML_BACKEND_PROBE_JITTER = float(get_env('ML_BACKEND_PROBE_JITTER', 0.2))
+# keep-alive connections to one ML backend kept by each process
+ML_BACKEND_POOL_MAXSIZE = int(get_env('ML_BACKEND_POOL_MAXSIZE', 10))
+# ML backend sessions idle for this number of seconds are closed, 0 disables connection reuse
+ML_BACKEND_KEEP_ALIVE = int(get_env('ML_BACKEND_KEEP_ALIVE', 60))
+# training triggered by new annotations is scheduled at most once per this number of seconds for an ML backend
+ML_BACKEND_TRAIN_DEBOUNCE = int(get_env('ML_BACKEND_TRAIN_DEBOUNCE', 60))
+# threads per process for interactive pre-annotation requests, 0 calls ML backends in the request thread
+ML_INTERACTIVE_MAX_WORKERS = int(get_env('ML_INTERACTIVE_MAX_WORKERS', 8))
+# identical interactive pre-annotation results are cached for this number of seconds, 0 disables the cache
+ML_INTERACTIVE_CACHE_TTL = int(get_env('ML_INTERACTIVE_CACHE_TTL', 10))
 
 RQ_LONG_JOB_TIMEOUT = int(get_env('RQ_LONG_JOB_TIMEOUT', 36000))
 
@@ -856,6 +903,28 @@ REDIS_SSL_SETTINGS = {
     'ssl_certfile': get_env('REDIS_SSL_CERTFILE', None),
 }
 
+# Shared Redis cache for FSM states, column checks and other django.core.cache users.
+# Without it each worker process uses its own in-memory cache, and invalidations don't reach other workers.
+CACHE_REDIS_ENABLED = get_bool_env('CACHE_REDIS_ENABLED', False)
+if CACHE_REDIS_ENABLED:
+    _cache_redis_location = get_env('CACHE_REDIS_LOCATION') or get_env('REDIS_LOCATION') or 'redis://localhost:6379/1'
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache.TieredRedisCache',
+            'LOCATION': _cache_redis_location,
+            # namespace keys per deployment, bump CACHE_VERSION to invalidate all cached values at once
+            'KEY_PREFIX': get_env('CACHE_KEY_PREFIX', 'label-studio'),
+            'VERSION': int(get_env('CACHE_VERSION', 1)),
+            'TIMEOUT': int(get_env('CACHE_TIMEOUT', 300)),
+            'OPTIONS': {
+                # in-process tier, invalidated across workers via Redis pub/sub
+                'L1_TIMEOUT': float(get_env('CACHE_L1_TIMEOUT', 5)),
+                'L1_MAX_ENTRIES': int(get_env('CACHE_L1_MAX_ENTRIES', 10000)),
+                **(REDIS_SSL_SETTINGS if _cache_redis_location.startswith('rediss') else {}),
+            },
+        }
+    }
+
 OPENAI_API_VERSION = get_env('OPENAI_API_VERSION', '2024-06-01')
 APPEND_SLASH = False
 
@@ -890,6 +959,10 @@ USER_ACTIVITY_REDIS_KEY_PREFIX = get_env('USER_ACTIVITY_REDIS_KEY_PREFIX', 'user
 USER_ACTIVITY_BATCH_SIZE = int(get_env('USER_ACTIVITY_BATCH_SIZE', '100'))
 USER_ACTIVITY_SYNC_THRESHOLD = int(get_env('USER_ACTIVITY_SYNC_THRESHOLD', '500'))
 USER_ACTIVITY_REDIS_TTL = int(get_env('USER_ACTIVITY_REDIS_TTL', '86400'))  # 24 hours
+# Record activity of the same user at most once per this number of seconds in each process
+USER_ACTIVITY_LOCAL_INTERVAL = int(get_env('USER_ACTIVITY_LOCAL_INTERVAL', '30'))
+# Maximum number of users to sync to the database in one job
+USER_ACTIVITY_SYNC_MAX_USERS = int(get_env('USER_ACTIVITY_SYNC_MAX_USERS', '10000'))
 
 # QuerySet iterator settings
 QS_ITERATOR_DEFAULT_CHUNK_SIZE = int(get_env('QS_ITERATOR_DEFAULT_CHUNK_SIZE', 1000))
@@ -0,0 +1,74 @@
+import time
+
+import pytest
+from core.cache import TieredRedisCache
+from fakeredis import FakeConnection, FakeServer
+
+
+@pytest.fixture
+def redis_server():
+    return FakeServer()
+
+
+def make_cache(server, **options):
+    return TieredRedisCache(
+        'redis://localhost:6379/0',
+        {
+            'KEY_PREFIX': 'test',
+            'VERSION': 2,
+            'OPTIONS': {'connection_class': FakeConnection, 'server': server, 'L1_TIMEOUT': 60, **options},
+        },
+    )
+
+
+def wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_values_are_shared_between_workers(redis_server):
+    worker_1, worker_2 = make_cache(redis_server), make_cache(redis_server)
+
+    worker_1.set('state', 'CREATED')
+    worker_1.set_many({'a': 1, 'b': None})
+
+    assert worker_2.get('state') == 'CREATED'
+    assert worker_2.get_many(['a', 'b', 'c']) == {'a': 1, 'b': None}
+    # keys are namespaced and versioned
+    assert worker_2._cache.get_client().exists('test:2:state')
+
+
+def test_l1_tier_serves_reads_locally(redis_server):
+    worker = make_cache(redis_server)
+    worker.set('state', 'CREATED')
+    assert worker.get('state') == 'CREATED'
+
+    # value changed in Redis directly, without invalidation: the local tier still serves it
+    worker._cache.set(worker.make_key('state'), 'COMPLETED', None)
+    assert worker.get('state') == 'CREATED'
+
+
+def test_invalidation_reaches_other_workers(redis_server):
+    worker_1, worker_2 = make_cache(redis_server), make_cache(redis_server)
+    worker_1.set('state', 'CREATED')
+    assert worker_2.get('state') == 'CREATED'
+    # wait until worker 2 listens to invalidations
+    assert wait_for(lambda: worker_2._cache.get_client().pubsub_numsub('test:invalidate')[0][1])
+
+    worker_1.set('state', 'COMPLETED')
+    assert wait_for(lambda: worker_2.get('state') == 'COMPLETED')
+
+    worker_1.delete('state')
+    assert wait_for(lambda: worker_2.get('state') is None)
+
+
+def test_l1_tier_can_be_disabled(redis_server):
+    worker_1, worker_2 = make_cache(redis_server, L1_TIMEOUT=0), make_cache(redis_server, L1_TIMEOUT=0)
+    worker_1.set('state', 'CREATED')
+    assert worker_2.get('state') == 'CREATED'
+    worker_1.set('state', 'COMPLETED')
+    assert worker_2.get('state') == 'COMPLETED'
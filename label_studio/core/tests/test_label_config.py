@@ -0,0 +1,104 @@
+from unittest import mock
+
+import pytest
+from core import label_config
+from core.label_config import (
+    ParsedLabelConfig,
+    check_control_in_config_by_regex,
+    check_toname_in_config_by_regex,
+    get_all_control_tag_tuples,
+    get_all_labels,
+    get_all_object_tag_names,
+    get_all_types,
+    get_original_fromname_by_regex,
+    get_parsed_label_config,
+    validate_label_config,
+)
+from django.core.cache import cache
+from rest_framework.exceptions import ValidationError
+
+LABEL_CONFIG = """
+<View>
+  <Text name="text" value="$text"/>
+  <Labels name="label" toName="text">
+    <Label value="PER"/>
+    <Label value="ORG"/>
+  </Labels>
+  <Repeater on="$pages" indexFlag="{{idx}}">
+    <Image name="page_{{idx}}" value="$pages[{{idx}}].url"/>
+    <Choices name="choice_{{idx}}" toName="page_{{idx}}" value="$options"/>
+  </Repeater>
+  <Choices name="sentiment" toName="text">
+    <Choice value="Positive"/>
+  </Choices>
+</View>
+"""
+
+
+@pytest.mark.parametrize('name', ['label', 'sentiment', 'choice_1', 'page_2', 'missing'])
+def test_parsed_label_config_matches_helpers(name):
+    """ParsedLabelConfig answers the same as the module helpers.
+
+    Purpose: The parsed config is a drop-in replacement for the per-call helpers.
+    Setup: Config with static labels, dynamic choices and a regex control name.
+    Actions: Query both APIs for control/to_name/from_name lookups.
+    Validations: Results are equal.
+    """
+    config = ParsedLabelConfig(LABEL_CONFIG)
+
+    assert config.has_control(name) == check_control_in_config_by_regex(LABEL_CONFIG, name)
+    assert config.has_to_name(name) == check_toname_in_config_by_regex(LABEL_CONFIG, name)
+    assert config.original_from_name(name) == get_original_fromname_by_regex(LABEL_CONFIG, name)
+    assert config.types == get_all_types(LABEL_CONFIG)
+    assert config.labels == get_all_labels(LABEL_CONFIG)
+    assert config.control_tag_tuples == get_all_control_tag_tuples(LABEL_CONFIG)
+    assert config.object_tag_names == get_all_object_tag_names(LABEL_CONFIG)
+
+
+def test_parsed_label_config_filter():
+    config = ParsedLabelConfig(LABEL_CONFIG)
+
+    assert not config.has_control('label', filter=[])
+    assert config.has_control('choice_2', filter=['choice_{{idx}}'])
+    assert not config.has_control('label', filter=['choice_{{idx}}'])
+
+
+def test_parsed_label_config_is_shared_by_content():
+    """Helpers share one parsed config per config content.
+
+    Purpose: Config parsing happens once per process and once for all workers.
+    Setup: Empty process cache.
+    Actions: Call several helpers for the same config, then again with an empty process cache.
+    Validations: The config is parsed and validated once; helper results are copies.
+    """
+    get_parsed_label_config.cache_clear()
+    cache.clear()
+    with mock.patch.object(
+        label_config.label_config, 'parse_config', wraps=label_config.label_config.parse_config
+    ) as parse, mock.patch.object(
+        label_config, '_validate_label_config', wraps=label_config._validate_label_config
+    ) as validate:
+        validate_label_config(LABEL_CONFIG)
+        validate_label_config(LABEL_CONFIG)
+        labels, _ = get_all_labels(LABEL_CONFIG)
+        get_all_types(LABEL_CONFIG)
+        check_control_in_config_by_regex(LABEL_CONFIG, 'label')
+        assert parse.call_count == 1
+        assert validate.call_count == 1
+
+        # another worker finds the parsed config in the shared cache
+        get_parsed_label_config.cache_clear()
+        assert get_all_control_tag_tuples(LABEL_CONFIG) == get_parsed_label_config(LABEL_CONFIG).control_tag_tuples
+        validate_label_config(LABEL_CONFIG)
+        assert parse.call_count == 1
+        assert validate.call_count == 1
+
+    labels['label'].append('LOC')
+    assert get_all_labels(LABEL_CONFIG)[0]['label'] == ['PER', 'ORG']
+
+
+def test_invalid_label_config_is_not_cached():
+    get_parsed_label_config.cache_clear()
+    for _ in range(2):
+        with pytest.raises(ValidationError):
+            validate_label_config('<View><Text name="text" value="$text"/><Text name="text" value="$t"/></View>')
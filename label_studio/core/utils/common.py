@@ -296,6 +296,35 @@ def find_first_one_to_one_related_field_by_prefix(instance, prefix):
     return result
 
 
+def prefetch_first_one_to_one_related_field_by_prefix(instances, prefix, select_related=()):
+    """Fill find_first_one_to_one_related_field_by_prefix() results for many instances
+    with one query per matching relation instead of one query per instance
+    """
+    remaining = {
+        instance.pk: instance
+        for instance in instances
+        if not hasattr(instance, '_find_first_one_to_one_related_field_by_prefix_cache')
+    }
+    if not remaining:
+        return
+
+    model = next(iter(remaining.values()))._meta.model
+    for field in model._meta.get_fields():
+        if not remaining:
+            break
+        if not issubclass(type(field), models.fields.related.OneToOneRel):
+            continue
+        if not re.match(prefix, field.get_accessor_name()):
+            continue
+        related = field.related_model.objects.filter(**{f'{field.field.name}__in': list(remaining)})
+        for obj in related.select_related(*select_related):
+            instance = remaining.pop(getattr(obj, field.field.attname))
+            instance._find_first_one_to_one_related_field_by_prefix_cache = obj
+
+    for instance in remaining.values():
+        instance._find_first_one_to_one_related_field_by_prefix_cache = None
+
+
 def start_browser(ls_url, no_browser):
     import threading
     import webbrowser
@@ -0,0 +1,4 @@
+info = {"message": "[user-026] fix: keep CSV/TSV column types consistent across streamed chunks", "commit": "5b9677fb51505ba97d27c8c084d904412d2f242d", "date": "2026/10/19 13:57:46", "branch": "", "version": "5b9677f"}
+
+# This file is automatically generated by version.py
+# Do not include it to git!
@@ -3,19 +3,21 @@
 import logging
 import os
 import traceback as tb
+from collections import defaultdict
 from datetime import datetime
 from urllib.parse import urlparse
 
 from core.feature_flags import flag_set
 from core.permissions import all_permissions
 from core.redis import start_job_async_or_sync
-from core.utils.common import batch
 from django.conf import settings
 from django.core.files import File
 from django.core.files.storage import FileSystemStorage
 from django.db import transaction
-from django.http import FileResponse, HttpResponse
+from django.db.models import Exists, OuterRef
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
 from django.utils.decorators import method_decorator
+from django.utils.http import content_disposition_header
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter, OpenApiResponse, extend_schema
 from projects.models import Project
@@ -24,7 +26,7 @@ from rest_framework import generics, status
 from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from tasks.models import Task
+from tasks.models import Annotation, Task
 
 from .models import ConvertedFormat, DataExport, Export
 from .serializers import (
@@ -168,6 +170,45 @@ class ExportAPI(generics.RetrieveAPIView):
     def get_task_queryset(self, queryset):
         return queryset.select_related('project').prefetch_related('annotations', 'predictions')
 
+    def iter_export_tasks(self, query, interpolate_key_frames):
+        """Serialize tasks batch by batch using keyset pagination over ids, only one batch is kept in memory"""
+        last_id = 0
+        # the first batches are smaller, so the response starts quickly
+        batch_size = max(1, settings.EXPORT_STREAMING_BATCH_SIZE // 10)
+        while True:
+            ids = list(query.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                return
+            last_id = ids[-1]
+            batch_size = min(batch_size * 2, settings.EXPORT_STREAMING_BATCH_SIZE)
+            yield from ExportDataSerializer(
+                self.get_task_queryset(Task.objects.filter(id__in=ids).order_by('id')),
+                many=True,
+                expand=['drafts'],
+                context={'interpolate_key_frames': interpolate_key_frames},
+            ).data
+
+    def iter_csv_header_tasks(self, query):
+        """Tasks with only the fields which define CSV columns (data keys and annotation results), for CSV header"""
+        last_id = 0
+        while True:
+            tasks = list(
+                query.filter(id__gt=last_id)
+                .order_by('id')
+                .values('id', 'data')[: settings.EXPORT_STREAMING_BATCH_SIZE]
+            )
+            if not tasks:
+                return
+            last_id = tasks[-1]['id']
+            annotations = defaultdict(list)
+            for annotation in Annotation.objects.filter(task_id__in=[task['id'] for task in tasks]).values(
+                'task_id', 'result', 'was_cancelled'
+            ):
+                annotations[annotation.pop('task_id')].append(annotation)
+            for task in tasks:
+                task['annotations'] = annotations[task['id']]
+                yield task
+
     def get(self, request, *args, **kwargs):
         project = self.get_object()
         query_serializer = ExportParamSerializer(data=request.GET)
@@ -188,19 +229,23 @@ class ExportAPI(generics.RetrieveAPIView):
             logger.debug(f'Select only subset of {len(tasks_ids)} tasks')
             query = query.filter(id__in=tasks_ids)
         if only_finished:
-            query = query.filter(annotations__isnull=False).distinct()
-
-        task_ids = query.values_list('id', flat=True)
+            query = query.filter(Exists(Annotation.objects.filter(task=OuterRef('pk'))))
+
+        if settings.EXPORT_STREAMING and export_type in DataExport.STREAMING_FORMATS:
+            logger.debug('Stream export')
+            chunks, content_type, filename = DataExport.stream_export_file(
+                project,
+                lambda: self.iter_export_tasks(query, interpolate_key_frames),
+                export_type,
+                iter_header_tasks=lambda: self.iter_csv_header_tasks(query),
+            )
+            r = StreamingHttpResponse(chunks, content_type=content_type)
+            r['Content-Disposition'] = content_disposition_header(True, filename)
+            r['filename'] = filename
+            return r
 
         logger.debug('Serialize tasks for export')
-        tasks = []
-        for _task_ids in batch(task_ids, 1000):
-            tasks += ExportDataSerializer(
-                self.get_task_queryset(query.filter(id__in=_task_ids)),
-                many=True,
-                expand=['drafts'],
-                context={'interpolate_key_frames': interpolate_key_frames},
-            ).data
+        tasks = list(self.iter_export_tasks(query, interpolate_key_frames))
         logger.debug('Prepare export files')
 
         export_file, content_type, filename = DataExport.generate_export_file(
@@ -594,7 +639,12 @@ def async_convert(converted_format_id, export_type, project, hostname, download_
     converted_file = snapshot.convert_file(export_type, download_resources=download_resources, hostname=hostname)
     if converted_file is None:
         raise ValidationError('No converted file found, probably there are no annotations in the export snapshot')
+    save_converted_file(converted_format, converted_file, project)
+
+
+def save_converted_file(converted_format, converted_file, project):
     md5 = Export.eval_md5(converted_file)
+    converted_file.seek(0)
     ext = converted_file.name.split('.')[-1]
 
     now = datetime.now()
@@ -606,6 +656,42 @@ def async_convert(converted_format_id, export_type, project, hostname, download_
     converted_format.save(update_fields=['file', 'status'])
 
 
+def async_convert_formats(converted_format_ids, project, hostname, download_resources=False, **kwargs):
+    """Convert one export snapshot into several formats with a single job: the snapshot is read once,
+    format writers run concurrently and every result is streamed into storage as soon as it's ready
+    """
+    with transaction.atomic():
+        converted_formats = list(
+            ConvertedFormat.objects.select_for_update()
+            .select_related('export')
+            .filter(id__in=converted_format_ids, status=ConvertedFormat.Status.CREATED)
+        )
+        if len(converted_formats) < len(converted_format_ids):
+            logger.error(f'Some of conversions {converted_format_ids} are not found or already started')
+        if not converted_formats:
+            return
+        ConvertedFormat.objects.filter(id__in=[cf.id for cf in converted_formats]).update(
+            status=ConvertedFormat.Status.IN_PROGRESS
+        )
+
+    snapshot = converted_formats[0].export
+    by_type = {converted_format.export_type: converted_format for converted_format in converted_formats}
+    for export_type, converted_file, error in snapshot.convert_files(
+        list(by_type), download_resources=download_resources, hostname=hostname
+    ):
+        converted_format = by_type[export_type]
+        if error is not None:
+            trace = ''.join(tb.format_exception(type(error), error, error.__traceback__))
+        elif converted_file is None:
+            trace = 'No converted file found, probably there are no annotations in the export snapshot'
+        else:
+            save_converted_file(converted_format, converted_file, project)
+            continue
+        converted_format.status = ConvertedFormat.Status.FAILED
+        converted_format.traceback = trace
+        converted_format.save(update_fields=['status', 'traceback'])
+
+
 def set_convert_background_failure(job, connection, type, value, traceback_obj):
     from data_export.models import ConvertedFormat
 
@@ -619,12 +705,22 @@ def set_convert_background_failure(job, connection, type, value, traceback_obj):
     ConvertedFormat.objects.filter(id=convert_id).update(status=Export.Status.FAILED, traceback=trace)
 
 
+def set_convert_formats_background_failure(job, connection, type, value, traceback_obj):
+    from data_export.models import ConvertedFormat
+
+    convert_ids = job.args[0]
+    trace = ''.join(tb.format_exception(type, value, traceback_obj))
+    ConvertedFormat.objects.filter(
+        id__in=convert_ids, status__in=[ConvertedFormat.Status.CREATED, ConvertedFormat.Status.IN_PROGRESS]
+    ).update(status=Export.Status.FAILED, traceback=trace)
+
+
 @method_decorator(
     name='post',
     decorator=extend_schema(
         tags=['Export'],
         summary='Export conversion',
-        description='Convert export snapshot to selected format',
+        description='Convert export snapshot to selected format, or to several formats with one job',
         request=ExportConvertSerializer,
         parameters=[
             OpenApiParameter(
@@ -647,6 +743,8 @@ def set_convert_background_failure(job, connection, type, value, traceback_obj):
                     'properties': {
                         'export_type': {'type': 'string'},
                         'converted_format': {'type': 'integer'},
+                        'export_types': {'type': 'array', 'items': {'type': 'string'}},
+                        'converted_formats': {'type': 'array', 'items': {'type': 'integer'}},
                     },
                 },
             ),
@@ -667,15 +765,12 @@ class ExportConvertAPI(generics.CreateAPIView):
         snapshot = self.get_object()
         serializer = ExportConvertSerializer(data=request.data, context={'project': snapshot.project})
         serializer.is_valid(raise_exception=True)
-        export_type = serializer.validated_data['export_type']
         download_resources = serializer.validated_data.get('download_resources')
+        if 'export_types' in serializer.validated_data:
+            return self._convert_formats(snapshot, serializer.validated_data['export_types'], download_resources)
+        export_type = serializer.validated_data['export_type']
 
-        converted_format, created = ConvertedFormat.objects.exclude(
-            status=ConvertedFormat.Status.FAILED
-        ).get_or_create(export=snapshot, export_type=export_type)
-
-        if not created:
-            raise ValidationError(f'Conversion to {export_type} already started')
+        converted_format = self._create_converted_format(snapshot, export_type)
 
         start_job_async_or_sync(
             async_convert,
@@ -687,3 +782,33 @@ class ExportConvertAPI(generics.CreateAPIView):
             on_failure=set_convert_background_failure,
         )
         return Response({'export_type': export_type, 'converted_format': converted_format.id})
+
+    @staticmethod
+    def _create_converted_format(snapshot, export_type):
+        converted_format, created = ConvertedFormat.objects.exclude(
+            status=ConvertedFormat.Status.FAILED
+        ).get_or_create(export=snapshot, export_type=export_type)
+
+        if not created:
+            raise ValidationError(f'Conversion to {export_type} already started')
+        return converted_format
+
+    def _convert_formats(self, snapshot, export_types, download_resources):
+        # every format is checked the same way as a single conversion, nothing is created if one of them is started
+        with transaction.atomic():
+            converted_formats = [self._create_converted_format(snapshot, export_type) for export_type in export_types]
+
+        start_job_async_or_sync(
+            async_convert_formats,
+            [converted_format.id for converted_format in converted_formats],
+            snapshot.project,
+            self.request.build_absolute_uri('/'),
+            download_resources=download_resources,
+            on_failure=set_convert_formats_background_failure,
+        )
+        return Response(
+            {
+                'export_types': export_types,
+                'converted_formats': [converted_format.id for converted_format in converted_formats],
+            }
+        )
@@ -2,8 +2,11 @@ import hashlib
 import io
 import json
 import logging
+import os
 import pathlib
 import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from datetime import datetime
 from functools import reduce
 
@@ -320,49 +323,144 @@ class ExportMixin:
                 serialization_options=serialization_options,
             )
 
-    def convert_file(self, to_format, download_resources=False, hostname=None):
+    @contextmanager
+    def conversion_workspace(self):
+        """Export-scoped temp dir with a single copy of the snapshot shared by all conversions"""
         with get_temp_dir() as tmp_dir:
-            OUT = 'out'
-            out_dir = pathlib.Path(tmp_dir) / OUT
-            out_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
-
-            converter = Converter(
-                config=self.project.get_parsed_config(),
-                project_dir=None,
-                upload_dir=out_dir,
-                download_resources=download_resources,
-                # for downloading resource we need access to the API
-                access_token=self.project.organization.created_by.auth_token.key,
-                hostname=hostname,
-            )
-            input_name = pathlib.Path(self.file.name).name
-            input_file_path = pathlib.Path(tmp_dir) / input_name
+            input_file_path = pathlib.Path(tmp_dir) / pathlib.Path(self.file.name).name
+            with self.file.open('rb') as src, open(input_file_path, 'wb') as dst:
+                shutil.copyfileobj(src, dst, settings.EXPORT_STREAMING_CHUNK_SIZE)
+            yield tmp_dir, input_file_path
+
+    def _get_converter(self, out_dir, download_resources=False, hostname=None, access_token=None, tasks=None):
+        return SnapshotConverter(
+            config=self.project.get_parsed_config(),
+            project_dir=None,
+            upload_dir=out_dir,
+            download_resources=download_resources,
+            # for downloading resource we need access to the API
+            access_token=access_token or self.project.organization.created_by.auth_token.key,
+            hostname=hostname,
+            tasks=tasks,
+        )
 
-            with open(input_file_path, 'wb') as file_:
-                file_.write(self.file.open().read())
+    @staticmethod
+    def _load_snapshot_tasks(input_file_path):
+        """Parse the snapshot once to share it between format writers, None if it's too big to keep in memory"""
+        if os.path.getsize(input_file_path) > settings.EXPORT_CONVERT_PARSE_ONCE_MAX_SIZE:
+            return None
+        with open(input_file_path, 'rb') as f:
+            tasks = json.load(f)
+        return tasks if isinstance(tasks, list) else [tasks]
 
-            converter.convert(input_file_path, out_dir, to_format, is_dir=False)
+    @staticmethod
+    def _get_out_dir(tmp_dir, to_format):
+        out_dir = pathlib.Path(tmp_dir) / to_format / 'out'
+        out_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+        return out_dir
 
-            files = get_all_files_from_dir(out_dir)
-            dirs = get_all_dirs_from_dir(out_dir)
+    @staticmethod
+    def _convert_in_workspace(converter, input_file_path, out_dir, to_format):
+        """Convert the snapshot into the format dir of the workspace,
+        return (output file path, file name) or None if nothing was converted
+        """
+        converter.convert(input_file_path, out_dir, to_format, is_dir=False)
 
-            if len(files) == 0 and len(dirs) == 0:
+        files = get_all_files_from_dir(out_dir)
+        dirs = get_all_dirs_from_dir(out_dir)
+
+        if len(files) == 0 and len(dirs) == 0:
+            return None
+        elif len(files) == 1 and len(dirs) == 0:
+            output_file = files[0]
+            filename = input_file_path.stem + pathlib.Path(output_file).suffix
+        else:
+            shutil.make_archive(out_dir, 'zip', out_dir)
+            output_file = out_dir.parent / (str(out_dir.stem) + '.zip')
+            filename = input_file_path.stem + '.zip'
+        return output_file, filename
+
+    def convert_file(self, to_format, download_resources=False, hostname=None):
+        with self.conversion_workspace() as (tmp_dir, input_file_path):
+            out_dir = self._get_out_dir(tmp_dir, to_format)
+            converter = self._get_converter(out_dir, download_resources=download_resources, hostname=hostname)
+            output = self._convert_in_workspace(converter, input_file_path, out_dir, to_format)
+            if output is None:
                 return None
-            elif len(files) == 1 and len(dirs) == 0:
-                output_file = files[0]
-                filename = pathlib.Path(input_name).stem + pathlib.Path(output_file).suffix
-            else:
-                shutil.make_archive(out_dir, 'zip', out_dir)
-                output_file = pathlib.Path(tmp_dir) / (str(out_dir.stem) + '.zip')
-                filename = pathlib.Path(input_name).stem + '.zip'
+            output_file, filename = output
 
-            # TODO(jo): can we avoid the `f.read()` here?
+            # the file must outlive the temp dir, use convert_files() to stream results instead
             with open(output_file, mode='rb') as f:
                 return File(
                     io.BytesIO(f.read()),
                     name=filename,
                 )
 
+    def convert_files(self, to_formats, download_resources=False, hostname=None):
+        """Convert the snapshot into several formats concurrently.
+
+        The snapshot is copied into one workspace and parsed once for all format writers (if it's not too big).
+        Yields (to_format, file, error) as conversions finish, file is None if nothing was converted.
+        Files are read from the workspace, so each one must be consumed before the next iteration.
+        """
+        with self.conversion_workspace() as (tmp_dir, input_file_path):
+            tasks = self._load_snapshot_tasks(input_file_path) if len(to_formats) > 1 else None
+            access_token = self.project.organization.created_by.auth_token.key
+            # converters keep per-conversion state, so every format gets its own one
+            out_dirs = {to_format: self._get_out_dir(tmp_dir, to_format) for to_format in to_formats}
+            converters = {
+                to_format: self._get_converter(
+                    out_dirs[to_format],
+                    download_resources=download_resources,
+                    hostname=hostname,
+                    access_token=access_token,
+                    tasks=tasks,
+                )
+                for to_format in to_formats
+            }
+            max_workers = max(1, min(len(to_formats), settings.EXPORT_CONVERT_MAX_WORKERS))
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='export-convert') as executor:
+                futures = {
+                    executor.submit(
+                        self._convert_in_workspace, converter, input_file_path, out_dirs[to_format], to_format
+                    ): to_format
+                    for to_format, converter in converters.items()
+                }
+                for future in as_completed(futures):
+                    to_format = futures[future]
+                    try:
+                        output = future.result()
+                    except Exception as e:
+                        logger.error(f'Export {self.id} conversion to {to_format} failed: {e}', exc_info=True)
+                        yield to_format, None, e
+                        continue
+                    if output is None:
+                        yield to_format, None, None
+                        continue
+                    output_file, filename = output
+                    with open(output_file, mode='rb') as f:
+                        yield to_format, File(f, name=filename), None
+
+
+class SnapshotConverter(Converter):
+    """Converter reading tasks from the snapshot parsed once and shared between format writers.
+
+    Shared tasks are read-only: every writer builds its own items from them.
+    """
+
+    def __init__(self, *args, tasks=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.tasks = tasks
+
+    def iter_from_json_file(self, json_file):
+        if self.tasks is None:
+            yield from super().iter_from_json_file(json_file)
+            return
+        for task in self.tasks:
+            for item in self.annotation_result_from_task(task):
+                if item is not None:
+                    yield item
+
 
 def export_background(
     export_id, task_filter_options, annotation_filter_options, serialization_options, *args, **kwargs
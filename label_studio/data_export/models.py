@@ -1,6 +1,8 @@
 """This file and its contents are licensed under the Apache License 2.0. Please see the included NOTICE for copyright information and LICENSE for a copy of the license.
 """
+import csv
 import hashlib
+import io
 import logging
 import os
 import shutil
@@ -18,6 +20,7 @@ from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 from label_studio_sdk.converter import Converter
+from label_studio_sdk.converter.exports import csv2
 from tasks.models import Annotation
 
 logger = logging.getLogger(__name__)
@@ -92,6 +95,9 @@ def set_export_default_name(sender, instance, created, **kwargs):
 
 
 class DataExport(object):
+    # formats which can be streamed by stream_export_file()
+    STREAMING_FORMATS = ('JSON', 'JSONL', 'CSV', 'TSV')
+
     # TODO: deprecated
     @staticmethod
     def save_export_files(project, now, get_args, data, md5, name):
@@ -183,6 +189,73 @@ class DataExport(object):
             filename = name + '.zip'
             return out, content_type, filename
 
+    @staticmethod
+    def stream_export_file(project, iter_tasks, output_format, iter_header_tasks=None):
+        """Encode tasks to export format chunk by chunk, memory usage doesn't depend on the number of tasks.
+
+        :param iter_tasks: function returning a new iterator over serialized tasks
+        :param output_format: one of STREAMING_FORMATS
+        :param iter_header_tasks: function returning an iterator over tasks used to collect CSV/TSV columns,
+            tasks may contain only data and annotation results; iter_tasks is used by default
+        :return: iterator over bytes chunks, content type and file name
+        """
+        ext = '.' + output_format.lower()
+        if output_format == 'JSON':
+            lines = DataExport._iter_json(iter_tasks())
+        elif output_format == 'JSONL':
+            lines = (json.dumps(task, ensure_ascii=False) + '\n' for task in iter_tasks())
+        else:
+            sep = '\t' if output_format == 'TSV' else ','
+            lines = DataExport._iter_csv(project, iter_tasks, iter_header_tasks or iter_tasks, sep)
+
+        name = 'project-' + str(project.id) + '-at-' + datetime.now().strftime('%Y-%m-%d-%H-%M')
+        return DataExport._iter_chunks(lines), f'application/{ext}', name + ext
+
+    @staticmethod
+    def _iter_chunks(lines):
+        """Join small strings into encoded chunks of about EXPORT_STREAMING_CHUNK_SIZE"""
+        chunk, size = [], 0
+        for line in lines:
+            chunk.append(line)
+            size += len(line)
+            if size >= settings.EXPORT_STREAMING_CHUNK_SIZE:
+                yield ''.join(chunk).encode('utf-8')
+                chunk, size = [], 0
+        if chunk:
+            yield ''.join(chunk).encode('utf-8')
+
+    @staticmethod
+    def _iter_json(tasks):
+        yield '['
+        for i, task in enumerate(tasks):
+            yield (',' if i else '') + json.dumps(task, ensure_ascii=False)
+        yield ']'
+
+    @staticmethod
+    def _iter_csv(project, iter_tasks, iter_header_tasks, sep):
+        """The same rows as Converter CSV export; the first pass over tasks collects columns for the header"""
+        converter = Converter(config=project.get_parsed_config(), project_dir=None, download_resources=False)
+
+        def iter_items(tasks):
+            for task in tasks:
+                # the same value types as in the converter which reads tasks from a JSON file
+                for item in converter.annotation_result_from_task(json.loads(json.dumps(task))):
+                    if item is not None:
+                        yield item
+
+        keys = {'annotator', 'annotation_id', 'created_at', 'updated_at', 'lead_time'}
+        for item in iter_items(iter_header_tasks()):
+            keys.update(csv2.prepare_annotation_keys(item))
+
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=sorted(keys), quoting=csv.QUOTE_NONNUMERIC, delimiter=sep)
+        writer.writeheader()
+        for item in iter_items(iter_tasks()):
+            writer.writerow(csv2.prepare_annotation(item))
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
 
 class ConvertedFormat(models.Model):
     class Status(models.TextChoices):
@@ -176,16 +176,36 @@ class SerializationOptionsSerializer(serializers.Serializer):
 
 
 class ExportConvertSerializer(serializers.Serializer):
-    export_type = serializers.CharField(help_text='Export file format.')
+    export_type = serializers.CharField(help_text='Export file format.', required=False)
+    export_types = serializers.ListField(
+        child=serializers.CharField(),
+        help_text='Export file formats to convert the snapshot into with one job.',
+        required=False,
+        allow_empty=False,
+    )
     download_resources = serializers.BooleanField(help_text='Download resources in converter.', required=False)
 
-    def validate_export_type(self, value):
+    def _get_export_formats(self):
         project = self.context.get('project')
-        export_formats = [f['name'] for f in DataExport.get_export_formats(project)]
-        if value not in export_formats:
+        return [f['name'] for f in DataExport.get_export_formats(project)]
+
+    def validate_export_type(self, value):
+        if value not in self._get_export_formats():
             raise serializers.ValidationError(f'{value} is not supported export format')
         return value
 
+    def validate_export_types(self, value):
+        export_formats = self._get_export_formats()
+        for export_type in value:
+            if export_type not in export_formats:
+                raise serializers.ValidationError(f'{export_type} is not supported export format')
+        return list(dict.fromkeys(value))
+
+    def validate(self, data):
+        if ('export_type' in data) == ('export_types' in data):
+            raise serializers.ValidationError('Either export_type or export_types must be provided')
+        return data
+
 
 class ExportCreateSerializer(ExportSerializer):
     class Meta(ExportSerializer.Meta):
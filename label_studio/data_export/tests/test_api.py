@@ -1,9 +1,22 @@
+import json
 from unittest.mock import ANY, patch
 
-from data_export.api import async_convert
+from data_export.api import async_convert, async_convert_formats
 from data_export.models import ConvertedFormat, Export
+from django.test import override_settings
 from projects.tests.factories import ProjectFactory
 from rest_framework.test import APITestCase
+from tasks.tests.factories import AnnotationFactory, TaskFactory
+
+LABEL_CONFIG = """
+<View>
+  <Text name="text" value="$text"/>
+  <Choices name="label" toName="text">
+    <Choice value="pos"/>
+    <Choice value="neg"/>
+  </Choices>
+</View>
+"""
 
 
 @patch('data_export.api.start_job_async_or_sync')
@@ -68,3 +81,164 @@ class TestExportConvertAPI(APITestCase):
             download_resources=False,
             on_failure=ANY,
         )
+
+    def test_convert_export_to_several_formats(self, mock_start_job_async_or_sync):
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.post(
+            f'/api/projects/{self.project.id}/exports/{self.export.id}/convert',
+            {'export_types': ['CSV', 'TSV', 'CSV']},
+            format='json',
+        )
+        assert response.status_code == 200
+        cf_ids = [
+            ConvertedFormat.objects.get(export=self.export, export_type=export_type).id
+            for export_type in ('CSV', 'TSV')
+        ]
+        assert response.json() == {'export_types': ['CSV', 'TSV'], 'converted_formats': cf_ids}
+
+        mock_start_job_async_or_sync.assert_called_once_with(
+            async_convert_formats,
+            cf_ids,
+            self.project,
+            ANY,
+            download_resources=None,
+            on_failure=ANY,
+        )
+
+    def test_convert_export_to_several_formats_already_started(self, mock_start_job_async_or_sync):
+        self.client.force_authenticate(user=self.user)
+
+        ConvertedFormat.objects.create(export=self.export, export_type='TSV', status=ConvertedFormat.Status.CREATED)
+
+        response = self.client.post(
+            f'/api/projects/{self.project.id}/exports/{self.export.id}/convert',
+            {'export_types': ['CSV', 'TSV']},
+            format='json',
+        )
+        assert response.status_code == 400
+        assert response.json()['validation_errors']['non_field_errors'] == ['Conversion to TSV already started']
+        assert not ConvertedFormat.objects.filter(export_type='CSV').exists()
+        mock_start_job_async_or_sync.assert_not_called()
+
+    def test_convert_export_requires_one_of_export_types(self, mock_start_job_async_or_sync):
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.post(
+            f'/api/projects/{self.project.id}/exports/{self.export.id}/convert',
+            {'export_type': 'CSV', 'export_types': ['TSV']},
+            format='json',
+        )
+        assert response.status_code == 400
+        mock_start_job_async_or_sync.assert_not_called()
+
+
+class TestConvertFormats(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = ProjectFactory(label_config=LABEL_CONFIG)
+        cls.user = cls.project.created_by
+        for i in range(3):
+            AnnotationFactory(
+                task=TaskFactory(project=cls.project, data={'text': f'text {i}'}),
+                completed_by=cls.user,
+                result=[{'from_name': 'label', 'to_name': 'text', 'type': 'choices', 'value': {'choices': ['pos']}}],
+            )
+
+    def setUp(self):
+        self.export = Export.objects.create(project=self.project, created_by=self.user)
+        self.export.run_file_exporting()
+
+    def test_convert_formats_matches_single_conversions(self):
+        export_types = ['CSV', 'TSV', 'JSON_MIN', 'CONLL2003']
+        converted_formats = [
+            ConvertedFormat.objects.create(export=self.export, export_type=export_type) for export_type in export_types
+        ]
+        with patch('data_export.mixins.Converter.iter_from_json_file') as iter_from_json_file:
+            async_convert_formats([cf.id for cf in converted_formats], self.project, 'http://localhost/')
+        # the snapshot is parsed once for all formats instead of being streamed by every writer
+        iter_from_json_file.assert_not_called()
+
+        for converted_format in converted_formats:
+            converted_format.refresh_from_db()
+            expected = self.export.convert_file(converted_format.export_type)
+            if expected is None:
+                assert converted_format.status == ConvertedFormat.Status.FAILED
+                continue
+            assert converted_format.status == ConvertedFormat.Status.COMPLETED, converted_format.traceback
+            assert converted_format.file.name.endswith('.' + expected.name.split('.')[-1])
+            with converted_format.file.open() as f:
+                assert f.read() == expected.read()
+
+    def test_convert_formats_failure_is_per_format(self):
+        converted_formats = [
+            ConvertedFormat.objects.create(export=self.export, export_type=export_type)
+            for export_type in ('CSV', 'UNKNOWN')
+        ]
+        async_convert_formats([cf.id for cf in converted_formats], self.project, 'http://localhost/')
+
+        csv_format, unknown_format = converted_formats
+        csv_format.refresh_from_db()
+        unknown_format.refresh_from_db()
+        assert csv_format.status == ConvertedFormat.Status.COMPLETED
+        assert unknown_format.status == ConvertedFormat.Status.FAILED
+        assert unknown_format.traceback
+
+
+class TestExportAPI(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = ProjectFactory(label_config=LABEL_CONFIG)
+        cls.user = cls.project.created_by
+        cls.tasks = [TaskFactory(project=cls.project, data={'text': f'text {i}'}) for i in range(5)]
+        for task in cls.tasks[1:4]:
+            AnnotationFactory(
+                task=task,
+                completed_by=cls.user,
+                result=[{'from_name': 'label', 'to_name': 'text', 'type': 'choices', 'value': {'choices': ['pos']}}],
+            )
+
+    def export(self, params):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(f'/api/projects/{self.project.id}/export', params)
+        assert response.status_code == 200
+        return response
+
+    @override_settings(EXPORT_STREAMING_BATCH_SIZE=2, EXPORT_STREAMING_CHUNK_SIZE=10)
+    def test_stream_json(self):
+        response = self.export({'exportType': 'JSON'})
+        assert response.streaming
+        assert 'attachment' in response['Content-Disposition']
+
+        tasks = json.loads(b''.join(response.streaming_content))
+        # only tasks with annotations are exported by default
+        assert [task['id'] for task in tasks] == [task.id for task in self.tasks[1:4]]
+        assert all(len(task['annotations']) == 1 for task in tasks)
+
+        response = self.export({'exportType': 'JSON', 'download_all_tasks': 'true'})
+        assert len(json.loads(b''.join(response.streaming_content))) == 5
+
+    @override_settings(EXPORT_STREAMING_BATCH_SIZE=2)
+    def test_stream_jsonl(self):
+        response = self.export({'exportType': 'JSONL', 'ids[]': [self.tasks[0].id, self.tasks[1].id]})
+        assert response['filename'].endswith('.jsonl')
+
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        assert [json.loads(line)['id'] for line in lines] == [self.tasks[1].id]
+
+    def test_stream_json_matches_file_export(self):
+        streamed = json.loads(b''.join(self.export({'exportType': 'JSON'}).streaming_content))
+        with override_settings(EXPORT_STREAMING=False):
+            response = self.export({'exportType': 'JSON'})
+            exported = json.loads(b''.join(response.streaming_content))
+        assert streamed == exported
+
+    @override_settings(EXPORT_STREAMING_BATCH_SIZE=2)
+    def test_stream_csv_matches_file_export(self):
+        for export_type in ('CSV', 'TSV'):
+            streamed = b''.join(self.export({'exportType': export_type}).streaming_content)
+            with override_settings(EXPORT_STREAMING=False):
+                response = self.export({'exportType': export_type})
+                exported = b''.join(response.streaming_content)
+            assert streamed == exported
+            assert len(streamed.splitlines()) == 4
@@ -33,7 +33,7 @@ from tasks.functions import update_tasks_counters
 from tasks.models import Prediction, Task
 from users.models import User
 from webhooks.models import WebhookAction
-from webhooks.utils import emit_webhooks_for_instance
+from webhooks.utils import WebhookEventBuffer
 
 from label_studio.core.utils.common import load_func
 
@@ -253,9 +253,8 @@ class ImportAPI(generics.CreateAPIView):
         serializer.is_valid(raise_exception=True)
         task_instances = serializer.save(project_id=self.kwargs['pk'])
         project = generics.get_object_or_404(Project.objects.for_user(self.request.user), pk=self.kwargs['pk'])
-        emit_webhooks_for_instance(
-            self.request.user.active_organization, project, WebhookAction.TASKS_CREATED, task_instances
-        )
+        with WebhookEventBuffer(self.request.user.active_organization, project, WebhookAction.TASKS_CREATED) as buffer:
+            buffer.add(task_instances)
         return task_instances, serializer
 
     def sync_import(self, request, project, preannotated_from_fields, commit_to_project, return_task_ids):
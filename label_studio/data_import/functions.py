@@ -14,7 +14,7 @@ from rest_framework.exceptions import ValidationError
 from tasks.models import Task
 from users.models import User
 from webhooks.models import WebhookAction
-from webhooks.utils import emit_webhooks_for_instance
+from webhooks.utils import WebhookEventBuffer
 
 from .models import FileUpload
 from .serializers import ImportApiSerializer
@@ -106,7 +106,8 @@ def async_import_background(
 
             try:
                 tasks = serializer.save(project_id=project.id)
-                emit_webhooks_for_instance(user.active_organization, project, WebhookAction.TASKS_CREATED, tasks)
+                with WebhookEventBuffer(user.active_organization, project, WebhookAction.TASKS_CREATED) as buffer:
+                    buffer.add(tasks)
 
                 task_count = len(tasks)
                 annotation_count = len(serializer.db_annotations)
@@ -356,7 +357,8 @@ def _async_reimport_background_streaming(reimport, project, organization_id, use
             )
 
             # Emit webhooks for all tasks at once (passing list of IDs)
-            emit_webhooks_for_instance(organization_id, project, WebhookAction.TASKS_CREATED, all_created_task_ids)
+            with WebhookEventBuffer(organization_id, project, WebhookAction.TASKS_CREATED) as buffer:
+                buffer.add(all_created_task_ids)
 
             # Update task states for all tasks at once
             all_tasks_queryset = Task.objects.filter(id__in=all_created_task_ids)
@@ -511,9 +513,8 @@ def _async_import_background_streaming(project_import, user):
                 f'Finalizing import: emitting webhooks and updating task states for {len(all_created_task_ids)} tasks'
             )
 
-            emit_webhooks_for_instance(
-                user.active_organization, project, WebhookAction.TASKS_CREATED, all_created_task_ids
-            )
+            with WebhookEventBuffer(user.active_organization, project, WebhookAction.TASKS_CREATED) as buffer:
+                buffer.add(all_created_task_ids)
 
             recalculate_stats_counts = {
                 'task_count': total_task_count,
@@ -591,7 +592,8 @@ def async_reimport_background(reimport_id, organization_id, user, **kwargs):
             serializer = ImportApiSerializer(data=tasks, many=True, context={'project': project, 'user': user})
             serializer.is_valid(raise_exception=True)
             tasks = serializer.save(project_id=project.id)
-            emit_webhooks_for_instance(organization_id, project, WebhookAction.TASKS_CREATED, tasks)
+            with WebhookEventBuffer(organization_id, project, WebhookAction.TASKS_CREATED) as buffer:
+                buffer.add(tasks)
 
             task_count = len(tasks)
             annotation_count = len(serializer.db_annotations)
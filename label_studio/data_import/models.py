@@ -1,5 +1,6 @@
 """This file and its contents are licensed under the Apache License 2.0. Please see the included NOTICE for copyright information and LICENSE for a copy of the license.
 """
+import io
 import logging
 import os
 import uuid
@@ -16,6 +17,7 @@ except:  # noqa: E722
 from django.conf import settings
 from django.db import models
 from django.utils.functional import cached_property
+from io_storages.utils import get_parquet_import_columns, load_tasks_parquet
 from rest_framework.exceptions import ValidationError
 
 logger = logging.getLogger(__name__)
@@ -140,12 +142,78 @@ class FileUpload(models.Model):
         tasks = [{'data': task} for task in tasks]
         return tasks
 
+    def read_tasks_list_from_csv_streaming(self, batch_size=100):
+        """
+        Read tasks from a CSV file in chunks of batch_size rows.
+
+        Unlike read_tasks_list_from_csv, only one chunk is held in memory at a time,
+        so large files can be imported without materializing the whole DataFrame.
+
+        Yields:
+            list: Batches of tasks in the format [{'data': {...}}, ...]
+        """
+        logger.debug('Read tasks list from CSV file streaming {}'.format(self.filepath))
+        separator = self._detect_csv_separator()
+        yield from self._read_tasks_list_from_delimited_streaming(separator, batch_size)
+
+    def read_tasks_list_from_tsv_streaming(self, batch_size=100):
+        """
+        Read tasks from a TSV (tab-separated values) file in chunks of batch_size rows.
+
+        Yields:
+            list: Batches of tasks in the format [{'data': {...}}, ...]
+        """
+        logger.debug('Read tasks list from TSV file streaming {}'.format(self.filepath))
+        yield from self._read_tasks_list_from_delimited_streaming('\t', batch_size)
+
+    def _read_delimited_dtypes(self, separator, batch_size):
+        """Column dtypes of the whole file: read_csv infers them per chunk, so a column can be int
+        in one chunk and float or str in another. Chunk dtypes are merged as in a read without chunks.
+        """
+        chunk_dtypes = {}
+        with self.file.open('rb') as file_handle:
+            with pd.read_csv(file_handle, sep=separator, chunksize=batch_size) as reader:
+                for chunk in reader:
+                    for column, dtype in chunk.dtypes.items():
+                        chunk_dtypes.setdefault(column, set()).add(dtype)
+
+        dtypes = {}
+        for column, types in chunk_dtypes.items():
+            if len(types) == 1:
+                dtypes[column] = types.pop()
+            elif all(pd.api.types.is_numeric_dtype(t) and not pd.api.types.is_bool_dtype(t) for t in types):
+                # ints with empty values or floats in other chunks
+                dtypes[column] = 'float64'
+            else:
+                dtypes[column] = 'object'
+        return dtypes
+
+    def _read_tasks_list_from_delimited_streaming(self, separator, batch_size):
+        dtypes = self._read_delimited_dtypes(separator, batch_size)
+        with self.file.open('rb') as file_handle:
+            with pd.read_csv(file_handle, sep=separator, chunksize=batch_size, dtype=dtypes) as reader:
+                for chunk in reader:
+                    yield [{'data': task} for task in chunk.fillna('').to_dict('records')]
+
     def read_tasks_list_from_txt(self):
         logger.debug('Read tasks list from text file {}'.format(self.filepath))
         lines = self.content.splitlines()
         tasks = [{'data': {settings.DATA_UNDEFINED_NAME: line}} for line in lines]
         return tasks
 
+    def read_tasks_list_from_txt_streaming(self, batch_size=100):
+        """Read tasks from a text file line by line, yielding batches of batch_size tasks"""
+        logger.debug('Read tasks list from text file streaming {}'.format(self.filepath))
+        batch = []
+        with self.file.open('rb') as file_handle:
+            for line in io.TextIOWrapper(file_handle, encoding='utf-8', newline=None):
+                batch.append({'data': {settings.DATA_UNDEFINED_NAME: line.rstrip('\n')}})
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
     def read_tasks_list_from_json(self):
         logger.debug('Read tasks list from JSON file {}'.format(self.filepath))
 
@@ -230,6 +298,30 @@ class FileUpload(models.Model):
             raise ValidationError('Task item should be dict')
         return task
 
+    def read_tasks_list_from_parquet(self):
+        logger.debug('Read tasks list from Parquet file {}'.format(self.filepath))
+        return [task for batch in self.read_tasks_list_from_parquet_streaming() for task in batch]
+
+    def read_tasks_list_from_parquet_streaming(self, batch_size=100):
+        """Read tasks from a Parquet file row group by row group, projecting only the columns used by the project"""
+        logger.debug('Read tasks list from Parquet file streaming {}'.format(self.filepath))
+        columns = get_parquet_import_columns(self.project)
+        try:
+            # local files can be read by path, which allows decoding row groups in parallel
+            source = self.file.path
+        except NotImplementedError:
+            source = None
+
+        with self.file.open('rb') as file_handle:
+            batch = []
+            for storage_object in load_tasks_parquet(source or file_handle, self.file_name, columns=columns):
+                batch.append(self._format_task_for_json_streaming(storage_object.task_data))
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+
     def read_task_from_hypertext_body(self):
         logger.debug('Read 1 task from hypertext file {}'.format(self.filepath))
         body = self.content
@@ -260,6 +352,8 @@ class FileUpload(models.Model):
                 tasks = self.read_tasks_list_from_txt()
             elif file_format == '.json':
                 tasks = self.read_tasks_list_from_json()
+            elif file_format == '.parquet':
+                tasks = self.read_tasks_list_from_parquet()
 
             # otherwise - only one object tag should be presented in label config
             elif not self.project.one_object_in_label_config:
@@ -288,16 +382,20 @@ class FileUpload(models.Model):
                 for batch in self.read_tasks_list_from_json_streaming(batch_size):
                     yield batch
 
-            # For other file types, use existing methods but yield in batches
+            elif file_format == '.parquet':
+                yield from self.read_tasks_list_from_parquet_streaming(batch_size)
+
+            # Tabular and text files are read in chunks of batch_size rows
+            elif file_format == '.csv' and file_as_tasks_list:
+                yield from self.read_tasks_list_from_csv_streaming(batch_size)
+            elif file_format == '.tsv' and file_as_tasks_list:
+                yield from self.read_tasks_list_from_tsv_streaming(batch_size)
+            elif file_format == '.txt' and file_as_tasks_list:
+                yield from self.read_tasks_list_from_txt_streaming(batch_size)
+
+            # Single asset files produce exactly one task
             else:
-                # Use existing non-streaming methods for non-JSON files
-                if file_format == '.csv' and file_as_tasks_list:
-                    tasks = self.read_tasks_list_from_csv()
-                elif file_format == '.tsv' and file_as_tasks_list:
-                    tasks = self.read_tasks_list_from_tsv()
-                elif file_format == '.txt' and file_as_tasks_list:
-                    tasks = self.read_tasks_list_from_txt()
-                elif not self.project.one_object_in_label_config:
+                if not self.project.one_object_in_label_config:
                     raise ValidationError(
                         'Your label config has more than one data key and direct file upload supports only '
                         'one data key. To import data with multiple data keys, use a JSON or CSV file.'
@@ -11,7 +11,7 @@ from data_manager.functions import evaluate_predictions
 from django.conf import settings
 from projects.models import Project
 from tasks.functions import update_tasks_counters
-from tasks.models import Annotation, AnnotationDraft, Prediction, Task
+from tasks.models import Annotation, AnnotationDraft, Prediction, PredictionModelVersion, Task
 from users.models import User
 from webhooks.models import WebhookAction
 from webhooks.utils import emit_webhooks_for_instance
@@ -151,7 +151,7 @@ def delete_tasks_predictions(project, queryset, **kwargs):
     predictions = Prediction.objects.filter(task__id__in=task_ids)
     real_task_ids = set(list(predictions.values_list('task__id', flat=True)))
     count = predictions.count()
-    predictions.delete()
+    PredictionModelVersion.delete_predictions(predictions)
     start_job_async_or_sync(update_tasks_counters, Task.objects.filter(id__in=real_task_ids))
     return {'processed_items': count, 'detail': 'Deleted ' + str(count) + ' predictions'}
 
@@ -10,6 +10,8 @@ from core.utils.db import fast_first
 from data_manager.actions import DataManagerAction
 from data_manager.functions import DataManagerException
 from django.conf import settings
+from labels_manager.functions import index_annotation_labels, label_index_is_ready
+from labels_manager.models import AnnotationLabel
 from tasks.models import Annotation, Task
 from tasks.serializers import TaskSerializerBulk
 
@@ -47,6 +49,7 @@ def propagate_annotations(project, queryset, **kwargs):
         db_annotations.append(Annotation(**body))
 
     db_annotations = Annotation.objects.bulk_create(db_annotations, batch_size=settings.BATCH_SIZE)
+    index_annotation_labels(db_annotations)
     TaskSerializerBulk.post_process_annotations(user, db_annotations, 'propagated_annotation')
     # Update counters for tasks and is_labeled. It should be a single operation as counters affect bulk is_labeled update
     project.update_tasks_counters_and_is_labeled(tasks_queryset=Task.objects.filter(id__in=tasks))
@@ -79,13 +82,18 @@ def rename_labels(project, queryset, **kwargs):
         raise Exception('Wrong old label name, it is not from labeling config: ' + old_label_name)
     label_type = labels[control_tag]['type'].lower()
 
-    annotations = Annotation.objects.filter(project=project)
-    if settings.DJANGO_DB == settings.DJANGO_DB_SQLITE:
-        annotations = annotations.filter(result__icontains=control_tag).filter(result__icontains=old_label_name)
+    if label_index_is_ready():
+        # candidates from the label index instead of scanning all results
+        indexed = AnnotationLabel.objects.filter(project=project, from_name=control_tag, label=old_label_name)
+        annotations = Annotation.objects.filter(project=project, id__in=indexed.values('annotation_id'))
     else:
-        annotations = annotations.filter(result__contains=[{'from_name': control_tag}]).filter(
-            result__contains=[{'value': {label_type: [old_label_name]}}]
-        )
+        annotations = Annotation.objects.filter(project=project)
+        if settings.DJANGO_DB == settings.DJANGO_DB_SQLITE:
+            annotations = annotations.filter(result__icontains=control_tag).filter(result__icontains=old_label_name)
+        else:
+            annotations = annotations.filter(result__contains=[{'from_name': control_tag}]).filter(
+                result__contains=[{'value': {label_type: [old_label_name]}}]
+            )
 
     label_count = 0
     annotation_count = 0
@@ -5,10 +5,11 @@ import logging
 from core.permissions import AllPermissions
 from data_manager.actions import DataManagerAction
 from django.utils.timezone import now
+from labels_manager.functions import index_annotation_labels
 from tasks.models import Annotation, Prediction, Task
 from tasks.serializers import TaskSerializerBulk
 from webhooks.models import WebhookAction
-from webhooks.utils import emit_webhooks_for_instance
+from webhooks.utils import WebhookEventBuffer
 
 all_permissions = AllPermissions()
 logger = logging.getLogger(__name__)
@@ -49,14 +50,14 @@ def predictions_to_annotations(project, queryset, **kwargs):
     logger.debug(f'{count} predictions will be converter to annotations')
     db_annotations = [Annotation(**annotation) for annotation in annotations]
     db_annotations = Annotation.objects.bulk_create(db_annotations)
+    index_annotation_labels(db_annotations)
     Task.objects.filter(id__in=tasks_ids).update(updated_at=now(), updated_by=request.user)
 
     if db_annotations:
         TaskSerializerBulk.post_process_annotations(user, db_annotations, 'prediction')
         # Execute webhook for created annotations
-        emit_webhooks_for_instance(
-            user.active_organization, project, WebhookAction.ANNOTATIONS_CREATED, db_annotations
-        )
+        with WebhookEventBuffer(user.active_organization, project, WebhookAction.ANNOTATIONS_CREATED) as buffer:
+            buffer.add(db_annotations)
         # Update counters for tasks and is_labeled. It should be a single operation as counters affect bulk is_labeled update
         project.update_tasks_counters_and_is_labeled(Task.objects.filter(id__in=tasks_ids))
 
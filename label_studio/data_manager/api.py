@@ -9,7 +9,7 @@ from core.utils.common import int_from_request, load_func
 from core.utils.params import bool_from_request
 from data_manager.actions import get_action_form, get_all_actions, perform_action
 from data_manager.functions import evaluate_predictions, get_prepare_params, get_prepared_queryset
-from data_manager.managers import get_fields_for_evaluation
+from data_manager.managers import get_fields_for_evaluation, get_hidden_columns
 from data_manager.models import View
 from data_manager.prepare_params import filters_schema, ordering_schema, prepare_params_schema
 from data_manager.serializers import (
@@ -339,6 +339,7 @@ class TaskListAPI(generics.ListCreateAPIView):
             'annotations',
             'predictions',
             'annotations__completed_by',
+            'comment_authors',
             'project',
             'io_storages_azureblobimportstoragelink',
             'io_storages_gcsimportstoragelink',
@@ -373,9 +374,15 @@ class TaskListAPI(generics.ListCreateAPIView):
         fields_for_evaluation = get_fields_for_evaluation(prepare_params, request.user)
         review = bool_from_request(self.request.GET, 'review', False)
 
+        # hidden columns are not rendered, all fields are needed for fields=all and review
+        hidden_columns = get_hidden_columns(prepare_params)
+
         if review:
             fields_for_evaluation = ['annotators', 'reviewed']
             all_fields = None
+            hidden_columns = set()
+        elif all_fields:
+            hidden_columns = set()
         if page is not None:
             ids = [task.id for task in page]  # page is a list already
             tasks = self.prefetch(
@@ -402,6 +409,7 @@ class TaskListAPI(generics.ListCreateAPIView):
                 [tasks_by_ids[_id].refresh_from_db() for _id in ids]
 
             context = self.get_task_serializer_context(self.request, project, tasks)
+            context['hidden_columns'] = hidden_columns
             serializer = self.task_serializer_class(page, many=True, context=context)
             return self.get_paginated_response(serializer.data)
         # all tasks
@@ -411,6 +419,7 @@ class TaskListAPI(generics.ListCreateAPIView):
             queryset, fields_for_evaluation=fields_for_evaluation, all_fields=all_fields, request=request
         )
         context = self.get_task_serializer_context(self.request, project, queryset)
+        context['hidden_columns'] = hidden_columns
         serializer = self.task_serializer_class(queryset, many=True, context=context)
         return Response(serializer.data)
 
@@ -95,6 +95,22 @@ def get_fields_for_filter_ordering(prepare_params):
     return result
 
 
+def get_hidden_columns(prepare_params):
+    """Task column ids hidden both in explore and labeling modes
+
+    :param prepare_params: structure with hiddenColumns
+    :return: set of column ids without "tasks:" prefix, e.g. {'annotators', 'data.image'}
+    """
+    fields = prepare_params.data.get('hiddenColumns', None)
+    if not fields:
+        return set()
+
+    from label_studio.data_manager.functions import TASKS
+
+    hidden = set(fields.get('explore', [])) & set(fields.get('labeling', []))
+    return {c[len(TASKS) :] for c in hidden if c.startswith(TASKS)}
+
+
 def get_fields_for_evaluation(prepare_params, user, skip_regular=True):
     """Collecting field names to annotate them
 
@@ -245,6 +261,19 @@ def add_result_filter(field_name, _filter, filter_expressions, project):
         return 'continue'
 
 
+def add_label_filter(_filter, filter_expressions, project):
+    """Tasks having an annotation with label equal to the filter value, uses the label index"""
+    from labels_manager.functions import tasks_with_label_filter
+
+    q = tasks_with_label_filter(project, str(_filter.value))
+    if _filter.operator in [Operator.EQUAL, Operator.CONTAINS]:
+        filter_expressions.append(q)
+        return 'continue'
+    elif _filter.operator in [Operator.NOT_EQUAL, Operator.NOT_CONTAINS]:
+        filter_expressions.append(~q)
+        return 'continue'
+
+
 def add_user_filter(enabled, key, _filter, filter_expressions):
     if enabled and _filter.operator == Operator.CONTAINS:
         filter_expressions.append(Q(**{key: int(_filter.value)}))
@@ -310,6 +339,12 @@ def apply_filters(queryset, filters, project, request):
             if result == 'continue':
                 continue
 
+            # labels of annotations
+            if field_name == 'annotations_labels':
+                result = add_label_filter(_filter, filter_expressions, project)
+                if result == 'continue':
+                    continue
+
             # annotations results & predictions results
             if field_name in ['annotations_results', 'predictions_results']:
                 result = add_result_filter(field_name, _filter, filter_expressions, project)
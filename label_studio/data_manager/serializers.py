@@ -9,12 +9,13 @@ from django.db import transaction
 from drf_spectacular.utils import extend_schema_field
 from projects.models import Project
 from rest_framework import serializers
-from tasks.models import Task
+from tasks.models import AnnotationDraft, Task
 from tasks.serializers import (
     AnnotationDraftSerializer,
     AnnotationSerializer,
     PredictionSerializer,
     TaskSerializer,
+    get_list_instances,
 )
 from users.models import User
 
@@ -457,20 +458,35 @@ class DataManagerTaskSerializer(TaskSerializer):
 
     CHAR_LIMITS = 500
 
+    # computed columns, they are not rendered when hidden in the data manager view
+    COLUMN_FIELDS = (
+        'annotators',
+        'annotations_results',
+        'annotations_ids',
+        'predictions_results',
+        'predictions_model_versions',
+        'file_upload',
+        'storage_filename',
+        'updated_by',
+    )
+
     class Meta:
         model = Task
         ref_name = 'data_manager_task_serializer'
         exclude = ('precomputed_agreement',)
         expandable_fields = {'annotations': (AnnotationSerializer, {'many': True})}
 
-    def to_representation(self, obj):
-        """Dynamically manage including of some fields in the API result"""
-        ret = super(DataManagerTaskSerializer, self).to_representation(obj)
+    def get_fields(self):
+        """Skip fields which are not displayed, so they are never computed"""
+        fields = super().get_fields()
         if not self.context.get('annotations'):
-            ret.pop('annotations', None)
+            fields.pop('annotations', None)
         if not self.context.get('predictions'):
-            ret.pop('predictions', None)
-        return ret
+            fields.pop('predictions', None)
+        for name in self.context.get('hidden_columns') or ():
+            if name in self.COLUMN_FIELDS:
+                fields.pop(name, None)
+        return fields
 
     def _pretty_results(self, task, field, unique=False):
         if not hasattr(task, field) or getattr(task, field) is None:
@@ -552,14 +568,38 @@ class DataManagerTaskSerializer(TaskSerializer):
         if not isinstance(task, Task) or not self.context.get('drafts'):
             return []
 
-        drafts = task.drafts
-        if 'request' in self.context and hasattr(self.context['request'], 'user'):
-            user = self.context['request'].user
-            drafts = self.get_drafts_queryset(user, drafts)
+        drafts = self._get_page_drafts(task)
+        if drafts is None:
+            drafts = task.drafts
+            if 'request' in self.context and hasattr(self.context['request'], 'user'):
+                user = self.context['request'].user
+                drafts = self.get_drafts_queryset(user, drafts)
 
         serializer_class = self.get_drafts_serializer()
         return serializer_class(drafts, many=True, read_only=True, default=True, context=self.context).data
 
+    def _get_page_drafts(self, task):
+        """Drafts of task when serializing a list of tasks: drafts of all tasks are loaded in one query
+
+        :return: list of drafts or None if task is not a part of the serialized list
+        """
+        tasks = get_list_instances(self)
+        if tasks is None:
+            return None
+
+        parent = self.parent
+        page_drafts = getattr(parent, '_page_drafts', None)
+        if page_drafts is None:
+            tasks = [t for t in tasks if isinstance(t, Task)]
+            drafts = AnnotationDraft.objects.filter(task__in=tasks)
+            if 'request' in self.context and hasattr(self.context['request'], 'user'):
+                drafts = self.get_drafts_queryset(self.context['request'].user, drafts)
+            page_drafts = {t.id: [] for t in tasks}
+            for draft in drafts.select_related('user').order_by('id'):
+                page_drafts[draft.task_id].append(draft)
+            parent._page_drafts = page_drafts
+        return page_drafts.get(task.id)
+
 
 class SelectedItemsSerializer(serializers.Serializer):
     all = serializers.BooleanField()
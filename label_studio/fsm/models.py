@@ -3,11 +3,12 @@ Core FSM models for Label Studio.
 """
 
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, Optional
 
 from django.conf import settings
 from django.db import models
-from django.db.models import QuerySet, UUIDField
+from django.db.models import F, QuerySet, UUIDField, Window
+from django.db.models.functions import RowNumber
 from fsm.registry import register_state_model
 from fsm.state_choices import AnnotationStateChoices, ProjectStateChoices, TaskStateChoices
 from fsm.utils import UUID7Field, generate_uuid7, timestamp_from_uuid7
@@ -142,6 +143,23 @@ class BaseState(models.Model):
         current_state = cls.objects.filter(**{entity_field: entity}).order_by('-id').first()
         return current_state.state if current_state else None
 
+    @classmethod
+    def get_current_state_values(cls, entity_ids: Iterable[int]) -> Dict[int, str]:
+        """
+        Get current state values for many entities in a single query.
+
+        The latest state row per entity is picked by a window function over UUID7 ids,
+        entities without state records are absent from the result.
+        """
+        entity_id_field = f'{cls._get_entity_field_name()}_id'
+        latest = (
+            cls.objects.filter(**{f'{entity_id_field}__in': list(entity_ids)})
+            .annotate(row_number=Window(RowNumber(), partition_by=F(entity_id_field), order_by=F('id').desc()))
+            .filter(row_number=1)
+            .values_list(entity_id_field, 'state')
+        )
+        return dict(latest)
+
     @classmethod
     def get_state_history(cls, entity, limit: int = 100) -> QuerySet['BaseState']:
         """Get complete state history for an entity"""
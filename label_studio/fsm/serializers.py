@@ -0,0 +1,42 @@
+"""
+Serializer helpers to expose current FSM states in API responses.
+
+List endpoints resolve states for a whole page at once:
+
+    class TaskListSerializer(serializers.ModelSerializer):
+        state = FSMStateField()
+
+        class Meta:
+            model = Task
+            fields = ['id', 'state']
+            list_serializer_class = FSMStateListSerializer
+"""
+
+from django.db import models
+from fsm.state_manager import get_state_manager
+from rest_framework import serializers
+
+
+class FSMStateListSerializer(serializers.ListSerializer):
+    """ListSerializer that resolves current states of all items with a bulk lookup before serialization"""
+
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        if items:
+            states = get_state_manager().get_current_states(items)
+            self.context.setdefault('fsm_states', {})[items[0]._meta.label_lower] = states
+        return super().to_representation(items)
+
+
+class FSMStateField(serializers.ReadOnlyField):
+    """Current FSM state of the instance, taken from FSMStateListSerializer bulk lookup when available"""
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        states = self.context.get('fsm_states', {}).get(instance._meta.label_lower)
+        if states is not None and instance.pk in states:
+            return states[instance.pk]
+        return get_state_manager().get_current_state_value(instance)
@@ -6,6 +6,7 @@ that can be extended by Label Studio Enterprise with additional features.
 """
 
 import logging
+from collections import defaultdict
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Type
 
@@ -360,34 +361,107 @@ class StateManager:
         )
 
     @classmethod
-    def warm_cache(cls, entities: List[Model]):
+    def get_current_states(cls, entities: List[Model]) -> Dict[Any, Optional[str]]:
         """
-        Warm cache with current states for a list of entities.
+        Get current states for many entities of the same model.
+
+        Cached states are read with a single cache.get_many, the rest are resolved
+        with one query per state model and written back with cache.set_many.
 
-        Basic implementation that can be optimized by Enterprise with
-        bulk queries and advanced caching strategies.
+        Args:
+            entities: Entities to get current states for
+
+        Returns:
+            Dict of entity pk => current state (None if the entity has no state yet)
+
+        Raises:
+            StateManagerError: If no state model found
+
+        Example:
+            tasks = list(Task.objects.filter(project=project)[:1000])
+            states = StateManager.get_current_states(tasks)
+            completed = [task for task in tasks if states[task.pk] == 'COMPLETED']
         """
+        entities = list(entities)
+        if not entities:
+            return {}
+
+        cache_keys = {cls.get_cache_key(entity): entity for entity in entities}
+        cached = cache.get_many(list(cache_keys))
+        states = {entity.pk: cached.get(key) for key, entity in cache_keys.items()}
+
+        missing = defaultdict(list)
+        for key, entity in cache_keys.items():
+            if key not in cached:
+                state_model = get_state_model_for_entity(entity)
+                if not state_model:
+                    raise StateManagerError(
+                        f'No state model found for {entity._meta.model_name} when getting current states'
+                    )
+                missing[state_model].append(entity)
+
         cache_updates = {}
-        organization_id = None
-        for entity in entities:
-            if organization_id is None:
-                if hasattr(entity, 'organization_id'):
-                    organization_id = entity.organization_id
-            current_state = cls.get_current_state_value(entity)
-            if current_state:
-                cache_key = cls.get_cache_key(entity)
-                cache_updates[cache_key] = current_state
+        for state_model, model_entities in missing.items():
+            try:
+                current_states = state_model.get_current_state_values([entity.pk for entity in model_entities])
+            except Exception as e:
+                logger.error(
+                    'Error getting current states',
+                    extra={
+                        'event': 'fsm.get_states_error',
+                        'entity_type': model_entities[0]._meta.label_lower,
+                        'entity_count': len(model_entities),
+                        'error': str(e),
+                    },
+                    exc_info=True,
+                )
+                raise StateManagerError(f'Error getting current states: {e}') from e
+
+            for entity in model_entities:
+                current_state = current_states.get(entity.pk)
+                states[entity.pk] = current_state
+                if current_state is not None:
+                    cache_updates[cls.get_cache_key(entity)] = current_state
 
         if cache_updates:
             cache.set_many(cache_updates, cls.CACHE_TTL)
-            logger.info(
-                'Cache warmed',
-                extra={
-                    'event': 'fsm.cache_warmed',
-                    'entity_count': len(cache_updates),
-                    **{'organization_id': organization_id if organization_id else None},
-                },
-            )
+
+        logger.info(
+            'FSM bulk state lookup',
+            extra={
+                'event': 'fsm.bulk_lookup',
+                'entity_type': entities[0]._meta.label_lower,
+                'entity_count': len(entities),
+                'cache_hits': len(cached),
+                'cache_updates': len(cache_updates),
+            },
+        )
+        return states
+
+    @classmethod
+    def warm_cache(cls, entities: List[Model]):
+        """
+        Warm cache with current states for a list of entities.
+
+        Already cached states are kept, missing ones are loaded with one query
+        per state model (see get_current_states).
+        """
+        entities = list(entities)
+        if not entities:
+            return
+
+        states = cls.get_current_states(entities)
+        organization_id = next(
+            (entity.organization_id for entity in entities if getattr(entity, 'organization_id', None)), None
+        )
+        logger.info(
+            'Cache warmed',
+            extra={
+                'event': 'fsm.cache_warmed',
+                'entity_count': sum(state is not None for state in states.values()),
+                **{'organization_id': organization_id if organization_id else None},
+            },
+        )
 
     @classmethod
     def execute_transition(
@@ -413,3 +413,66 @@ class TestStateManager(TestCase):
         # Verify get_current_state_value uses the cached value
         current_state = self.StateManager.get_current_state_value(self.task)
         assert current_state == 'CREATED'
+
+
+class TestBulkStateLookup(TestCase):
+    """Test batched current state reads"""
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        self.user = UserFactory(email='test@example.com')
+        self.project = ProjectFactory(created_by=self.user)
+        self.tasks = [TaskFactory(project=self.project, data={'text': f'test {i}'}) for i in range(4)]
+        self.StateManager = get_state_manager()
+        cache.clear()
+
+        for task, states in zip(self.tasks, [['CREATED'], ['CREATED', 'IN_PROGRESS'], ['CREATED', 'COMPLETED']]):
+            for state in states:
+                TaskState.objects.create(task=task, project_id=task.project_id, state=state)
+
+    def test_get_current_states_single_query(self):
+        """States of many entities are resolved with one query and then served from cache"""
+        with self.assertNumQueries(1):
+            states = self.StateManager.get_current_states(self.tasks)
+
+        assert states == {
+            self.tasks[0].pk: 'CREATED',
+            self.tasks[1].pk: 'IN_PROGRESS',
+            self.tasks[2].pk: 'COMPLETED',
+            self.tasks[3].pk: None,
+        }
+
+        # only the task without state is looked up again
+        with self.assertNumQueries(1):
+            assert self.StateManager.get_current_states(self.tasks) == states
+        with self.assertNumQueries(0):
+            assert self.StateManager.get_current_state_value(self.tasks[1]) == 'IN_PROGRESS'
+
+    def test_warm_cache(self):
+        """warm_cache fills the cache for all entities with states"""
+        from django.core.cache import cache
+
+        self.StateManager.warm_cache(self.tasks)
+
+        keys = [self.StateManager.get_cache_key(task) for task in self.tasks]
+        assert cache.get_many(keys) == dict(zip(keys[:3], ['CREATED', 'IN_PROGRESS', 'COMPLETED']))
+
+    def test_list_serializer_bulk_lookup(self):
+        """FSMStateListSerializer resolves states for the whole list at once"""
+        from fsm.serializers import FSMStateField, FSMStateListSerializer
+        from rest_framework import serializers
+        from tasks.models import Task
+
+        class TaskStateSerializer(serializers.ModelSerializer):
+            state = FSMStateField()
+
+            class Meta:
+                model = Task
+                fields = ['id', 'state']
+                list_serializer_class = FSMStateListSerializer
+
+        with self.assertNumQueries(1):
+            data = TaskStateSerializer(self.tasks, many=True).data
+
+        assert [item['state'] for item in data] == ['CREATED', 'IN_PROGRESS', 'COMPLETED', None]
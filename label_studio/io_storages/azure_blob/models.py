@@ -222,7 +222,7 @@ class AzureBlobImportStorageBase(AzureBlobStorageMixin, ImportStorage):
         container = self.get_container()
         blob = container.download_blob(key)
         blob = blob.content_as_bytes()
-        return load_tasks_json(blob, key)
+        return load_tasks_json(blob, key, project=self.project)
 
     def scan_and_create_links(self):
         return self._scan_and_create_links(AzureBlobImportStorageLink)
@@ -36,7 +36,7 @@ from rq.job import Job
 from tasks.models import Annotation, Task
 from tasks.serializers import AnnotationSerializer, PredictionSerializer
 from webhooks.models import WebhookAction
-from webhooks.utils import emit_webhooks_for_instance
+from webhooks.utils import WebhookEventBuffer
 
 from .exceptions import UnsupportedFileFormatError
 
@@ -375,12 +375,19 @@ class ImportStorage(Storage):
         # if not found any occurrences - this Storage can't resolve url
         return False
 
-    def resolve_uri(self, uri, task=None):
+    def resolve_uri(self, uri, task=None, cache=None):
+        """Resolve storage uri (or list/dict of them) to http url
+
+        :param cache: dict shared by calls resolving many uris at once, see resolve_uris()
+        """
+        if cache is None:
+            cache = {}
+
         #  list of objects
         if isinstance(uri, list):
             resolved = []
             for item in uri:
-                result = self.resolve_uri(item, task)
+                result = self.resolve_uri(item, task, cache)
                 resolved.append(result if result else item)
             return resolved
 
@@ -388,7 +395,7 @@ class ImportStorage(Storage):
         elif isinstance(uri, dict):
             resolved = {}
             for key in uri.keys():
-                result = self.resolve_uri(uri[key], task)
+                result = self.resolve_uri(uri[key], task, cache)
                 resolved[key] = result if result else uri[key]
             return resolved
 
@@ -401,25 +408,23 @@ class ImportStorage(Storage):
                     logger.debug(f'No storage info found for URI={uri}')
                     return
 
-                if flag_set('fflag_optic_all_optic_1938_storage_proxy', user=self.project.organization.created_by):
+                if 'storage_proxy' not in cache:
+                    cache['storage_proxy'] = flag_set(
+                        'fflag_optic_all_optic_1938_storage_proxy', user=self.project.organization.created_by
+                    )
+                if cache['storage_proxy']:
                     if task is None:
                         logger.error(f'Task is required to resolve URI={uri}', exc_info=True)
                         raise ValueError(f'Task is required to resolve URI={uri}')
 
-                    proxy_url = urljoin(
-                        settings.HOSTNAME,
-                        reverse('storages:task-storage-data-resolve', kwargs={'task_id': task.id})
-                        + f'?fileuri={base64.urlsafe_b64encode(extracted_uri.encode()).decode()}',
-                    )
+                    proxy_url = self._task_file_url('storages:task-storage-data-resolve', task, extracted_uri, cache)
                     return uri.replace(extracted_uri, proxy_url)
 
                 # ff off: old logic without proxy
                 else:
                     if self.presign and task is not None:
-                        proxy_url = urljoin(
-                            settings.HOSTNAME,
-                            reverse('storages:task-storage-data-presign', kwargs={'task_id': task.id})
-                            + f'?fileuri={base64.urlsafe_b64encode(extracted_uri.encode()).decode()}',
+                        proxy_url = self._task_file_url(
+                            'storages:task-storage-data-presign', task, extracted_uri, cache
                         )
                         return uri.replace(extracted_uri, proxy_url)
                     else:
@@ -432,6 +437,29 @@ class ImportStorage(Storage):
             except Exception:
                 logger.info(f"Can't resolve URI={uri}", exc_info=True)
 
+    @staticmethod
+    def _task_file_url(view_name, task, extracted_uri, cache):
+        key = (view_name, task.id)
+        if key not in cache:
+            cache[key] = urljoin(settings.HOSTNAME, reverse(view_name, kwargs={'task_id': task.id}) + '?fileuri=')
+        return cache[key] + base64.urlsafe_b64encode(extracted_uri.encode()).decode()
+
+    def resolve_uris(self, items):
+        """Resolve many uris in one pass, the same as resolve_uri() for each of them
+
+        :param items: list of (uri, task) pairs
+        :return: list of resolved uris, None for not resolved ones
+        """
+        cache = {}
+        resolved = []
+        for uri, task in items:
+            try:
+                resolved.append(self.resolve_uri(uri, task, cache))
+            except Exception as exc:
+                logger.debug(exc, exc_info=True)
+                resolved.append(None)
+        return resolved
+
     def _scan_and_create_links_v2(self):
         # Async job execution for batch of objects:
         # e.g. GCS example
@@ -547,98 +575,84 @@ class ImportStorage(Storage):
             'fflag_root_212_reduce_importstoragelink_counts', organization=self.project.organization
         )
 
-        tasks_for_webhook = []
-        for keys_batch in _batched(
-            self.iter_keys(), settings.STORAGE_EXISTED_COUNT_BATCH_SIZE if existed_count_flag_set else 1
-        ):
-            deduplicated_keys = list(dict.fromkeys(keys_batch))  # preserve order
-            for key in deduplicated_keys:
-                logger.debug(f'Scanning key {key}')
-
-            # w/o Dataflow
-            # pubsub.push(topic, key)
-            # -> GF.pull(topic, key) + env -> add_task()
-
-            # skip if key has already been synced
-            existing_keys = link_class.exists(deduplicated_keys, self)
-            tasks_existed += link_class.objects.filter(key__in=existing_keys, storage=self.id).count()
-            self.info_update_progress(last_sync_count=tasks_created, tasks_existed=tasks_existed)
-
-            for key in deduplicated_keys:
-                if key in existing_keys:
-                    logger.debug(f'{self.__class__.__name__} already has tasks linked to {key=}')
-                    continue
-
-                logger.debug(f'{self}: found new key {key}')
-
-                # Check if file should be processed as JSON based on extension
-                # Skip non-JSON files if use_blob_urls is False
-                if check_file_extension and not self.use_blob_urls:
-                    _, ext = os.path.splitext(key.lower())
-                    # Only process files with JSON/JSONL/PARQUET extensions
-                    json_extensions = {'.json', '.jsonl', '.parquet'}
-
-                    if ext and ext not in json_extensions:
-                        raise UnsupportedFileFormatError(
-                            f'File "{key}" is not a JSON/JSONL/Parquet file. Only .json, .jsonl, and .parquet files can be processed.\n'
-                            f"If you're trying to import non-JSON data (images, audio, text, etc.), "
-                            f'edit storage settings and enable "Tasks" import method'
-                        )
+        # TASKS_CREATED events are coalesced for the whole sync, tasks created before a failure are still reported
+        with WebhookEventBuffer(
+            self.project.organization, self.project, WebhookAction.TASKS_CREATED
+        ) as webhook_buffer:
+            for keys_batch in _batched(
+                self.iter_keys(), settings.STORAGE_EXISTED_COUNT_BATCH_SIZE if existed_count_flag_set else 1
+            ):
+                deduplicated_keys = list(dict.fromkeys(keys_batch))  # preserve order
+                for key in deduplicated_keys:
+                    logger.debug(f'Scanning key {key}')
 
-                try:
-                    link_objects = self.get_data(key)
-                except (UnicodeDecodeError, json.decoder.JSONDecodeError) as exc:
-                    logger.debug(exc, exc_info=True)
-                    raise ValueError(
-                        f'Error loading JSON from file "{key}".\nIf you\'re trying to import non-JSON data '
-                        f'(images, audio, text, etc.), edit storage settings and enable '
-                        f'"Tasks" import method'
-                    )
+                # w/o Dataflow
+                # pubsub.push(topic, key)
+                # -> GF.pull(topic, key) + env -> add_task()
 
-                for link_object in link_objects:
-                    # TODO: batch this loop body with add_task -> add_tasks in a single bulk write.
-                    # See DIA-2062 for prerequisites
-                    try:
-                        task = self.add_task(
-                            self.project,
-                            maximum_annotations,
-                            max_inner_id,
-                            self,
-                            link_object,
-                            link_class=link_class,
-                        )
-                        max_inner_id += 1
-
-                        # update progress counters for storage info
-                        tasks_created += 1
-
-                        # add task to webhook list
-                        tasks_for_webhook.append(task.id)
-                    except ValidationError as e:
-                        # Log validation errors but continue processing other tasks
-                        error_message = f'Validation error for task from {link_object.key}: {e}'
-                        logger.error(error_message)
-                        validation_errors.append(error_message)
+                # skip if key has already been synced
+                existing_keys = link_class.exists(deduplicated_keys, self)
+                tasks_existed += link_class.objects.filter(key__in=existing_keys, storage=self.id).count()
+                self.info_update_progress(last_sync_count=tasks_created, tasks_existed=tasks_existed)
+
+                for key in deduplicated_keys:
+                    if key in existing_keys:
+                        logger.debug(f'{self.__class__.__name__} already has tasks linked to {key=}')
                         continue
 
-                    # settings.WEBHOOK_BATCH_SIZE
-                    # `WEBHOOK_BATCH_SIZE` sets the maximum number of tasks sent in a single webhook call, ensuring manageable payload sizes.
-                    # When `tasks_for_webhook` accumulates tasks equal to/exceeding `WEBHOOK_BATCH_SIZE`, they're sent in a webhook via
-                    # `emit_webhooks_for_instance`, and `tasks_for_webhook` is cleared for new tasks.
-                    # If tasks remain in `tasks_for_webhook` at process end (less than `WEBHOOK_BATCH_SIZE`), they're sent in a final webhook
-                    # call to ensure all tasks are processed and no task is left unreported in the webhook.
-                    if len(tasks_for_webhook) >= settings.WEBHOOK_BATCH_SIZE:
-                        emit_webhooks_for_instance(
-                            self.project.organization, self.project, WebhookAction.TASKS_CREATED, tasks_for_webhook
-                        )
-                        tasks_for_webhook = []
+                    logger.debug(f'{self}: found new key {key}')
 
-                self.info_update_progress(last_sync_count=tasks_created, tasks_existed=tasks_existed)
+                    # Check if file should be processed as JSON based on extension
+                    # Skip non-JSON files if use_blob_urls is False
+                    if check_file_extension and not self.use_blob_urls:
+                        _, ext = os.path.splitext(key.lower())
+                        # Only process files with JSON/JSONL/PARQUET extensions
+                        json_extensions = {'.json', '.jsonl', '.parquet'}
 
-        if tasks_for_webhook:
-            emit_webhooks_for_instance(
-                self.project.organization, self.project, WebhookAction.TASKS_CREATED, tasks_for_webhook
-            )
+                        if ext and ext not in json_extensions:
+                            raise UnsupportedFileFormatError(
+                                f'File "{key}" is not a JSON/JSONL/Parquet file. Only .json, .jsonl, and .parquet files can be processed.\n'
+                                f"If you're trying to import non-JSON data (images, audio, text, etc.), "
+                                f'edit storage settings and enable "Tasks" import method'
+                            )
+
+                    try:
+                        link_objects = self.get_data(key)
+                    except (UnicodeDecodeError, json.decoder.JSONDecodeError) as exc:
+                        logger.debug(exc, exc_info=True)
+                        raise ValueError(
+                            f'Error loading JSON from file "{key}".\nIf you\'re trying to import non-JSON data '
+                            f'(images, audio, text, etc.), edit storage settings and enable '
+                            f'"Tasks" import method'
+                        )
+
+                    for link_object in link_objects:
+                        # TODO: batch this loop body with add_task -> add_tasks in a single bulk write.
+                        # See DIA-2062 for prerequisites
+                        try:
+                            task = self.add_task(
+                                self.project,
+                                maximum_annotations,
+                                max_inner_id,
+                                self,
+                                link_object,
+                                link_class=link_class,
+                            )
+                            max_inner_id += 1
+
+                            # update progress counters for storage info
+                            tasks_created += 1
+
+                            # add task to coalesced webhook event
+                            webhook_buffer.add(task.id)
+                        except ValidationError as e:
+                            # Log validation errors but continue processing other tasks
+                            error_message = f'Validation error for task from {link_object.key}: {e}'
+                            logger.error(error_message)
+                            validation_errors.append(error_message)
+                            continue
+
+                    self.info_update_progress(last_sync_count=tasks_created, tasks_existed=tasks_existed)
 
         self.project.update_tasks_states(
             maximum_annotations_changed=False, overlap_cohort_percentage_changed=False, tasks_number_changed=True
@@ -213,7 +213,7 @@ class GCSImportStorageBase(GCSStorageMixin, ImportStorage):
             bucket_name=self.bucket,
             key=key,
         )
-        return load_tasks_json(blob, key)
+        return load_tasks_json(blob, key, project=self.project)
 
     def generate_http_url(self, url):
         return GCS.generate_http_url(
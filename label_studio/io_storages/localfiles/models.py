@@ -21,7 +21,13 @@ from io_storages.base_models import (
     ImportStorageLink,
     ProjectStorageMixin,
 )
-from io_storages.utils import StorageObject, load_tasks_json
+from io_storages.utils import (
+    StorageObject,
+    get_parquet_import_columns,
+    is_parquet_key,
+    load_tasks_json,
+    load_tasks_parquet,
+)
 from rest_framework.exceptions import ValidationError
 from tasks.models import Annotation
 
@@ -113,10 +119,14 @@ class LocalFilesImportStorageBase(LocalFilesMixin, ImportStorage):
             }
             return [StorageObject(key=key, task_data=task)]
 
+        if is_parquet_key(key):
+            # read row groups lazily from disk instead of loading the whole file
+            return load_tasks_parquet(path, key, columns=get_parquet_import_columns(self.project))
+
         try:
             with open(path, 'rb') as f:
                 blob = f.read()
-                return load_tasks_json(blob, key)
+                return load_tasks_json(blob, key, project=self.project)
         except OSError as e:
             raise ValueError(f'Failed to read file {path}: {str(e)}')
 
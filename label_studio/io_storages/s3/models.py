@@ -240,7 +240,7 @@ class S3ImportStorageBase(S3StorageMixin, ImportStorage):
         _, s3 = self.get_client_and_resource()
         bucket = s3.Bucket(self.bucket)
         obj = s3.Object(bucket.name, key).get()['Body'].read()
-        return load_tasks_json(obj, key)
+        return load_tasks_json(obj, key, project=self.project)
 
     @catch_and_reraise_from_none
     def generate_http_url(self, url):
@@ -11,7 +11,7 @@ from io_storages.tests.factories import (
     RedisImportStorageFactory,
     S3ImportStorageFactory,
 )
-from io_storages.utils import StorageObject, load_tasks_json
+from io_storages.utils import StorageObject, load_tasks_json, load_tasks_parquet
 from moto import mock_s3
 from projects.tests.factories import ProjectFactory
 from rest_framework.test import APIClient
@@ -417,3 +417,110 @@ def test_list_jsonl_with_datetimes(storage):
     assert list(output) == expected_output
 
     create_tasks(storage, list(output))
+
+
+#
+# Unit tests for Parquet import
+#
+
+
+def _parquet_blob(rows: list[dict], row_group_size: int) -> bytes:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = pa.BufferOutputStream()
+    pq.write_table(pa.Table.from_pylist(rows), sink, row_group_size=row_group_size)
+    return sink.getvalue().to_pybytes()
+
+
+@pytest.mark.parametrize('max_workers', [1, 3])
+def test_parquet_row_groups(storage, max_workers):
+    rows = [{'text': f'Test task {i}', 'score': i} for i in range(5)]
+    blob = _parquet_blob(rows, row_group_size=2)
+
+    output = list(load_tasks_parquet(blob, 'test.parquet', max_workers=max_workers))
+
+    assert [o.task_data for o in output] == rows
+    assert [(o.row_group, o.row_index) for o in output] == [(0, 0), (0, 1), (1, 0), (1, 1), (2, 0)]
+    create_tasks(storage, output)
+
+
+def test_parquet_column_projection(storage):
+    project, _ = storage
+    rows = [{'text': 'Test task 1', 'unused': 'x' * 100, 'meta': {'source': 'a'}}]
+    blob = _parquet_blob(rows, row_group_size=10)
+
+    output = list(load_tasks_json(blob, 'test.parquet', project=project))
+
+    assert output == [
+        StorageObject(
+            key='test.parquet', task_data={'text': 'Test task 1', 'meta': {'source': 'a'}}, row_index=0, row_group=0
+        )
+    ]
+
+
+def test_parquet_column_projection_keeps_all_config_variables():
+    project = ProjectFactory(
+        label_config="""
+        <View>
+          <Header value="$title"/>
+          <Text name="text" value="$text"/>
+          <Choices name="label" toName="text" valueList="$options"/>
+        </View>
+        """
+    )
+    rows = [{'title': 'Title', 'text': 'Test task 1', 'options': ['a', 'b'], 'unused': 'x'}]
+    blob = _parquet_blob(rows, row_group_size=10)
+
+    output = list(load_tasks_json(blob, 'test.parquet', project=project))
+
+    assert output[0].task_data == {'title': 'Title', 'text': 'Test task 1', 'options': ['a', 'b']}
+
+
+def test_parquet_projection_falls_back_to_all_columns():
+    rows = [{'image': 'http://ggg.com/image.jpg', 'caption': 'cat'}]
+    blob = _parquet_blob(rows, row_group_size=10)
+
+    output = list(load_tasks_parquet(blob, 'test.parquet', columns=['text']))
+
+    assert output[0].task_data == rows[0]
+
+
+def test_parquet_nested_tasks_and_timestamps(storage):
+    import datetime
+
+    rows = [
+        {'data': {'text': 'Test task 1'}, 'created': datetime.datetime(2021, 1, 1)},
+        {'data': {'text': 'Test task 2'}, 'created': datetime.datetime(2021, 1, 2)},
+    ]
+    blob = _parquet_blob(rows, row_group_size=10)
+
+    output = list(load_tasks_parquet(blob, 'test.parquet'))
+
+    assert output[0].task_data['data'] == {'text': 'Test task 1'}
+    assert output[1].task_data['created'].startswith('2021-01-02')
+    json.dumps([o.task_data for o in output])
+    create_tasks(storage, output)
+
+
+def test_storagelink_fields_parquet(project):
+    blob = _parquet_blob([{'text': f'Test task {i}'} for i in range(3)], row_group_size=2)
+    with mock_s3():
+        s3 = boto3.client('s3', region_name='us-east-1')
+        s3.create_bucket(Bucket='pytest-s3-parquet')
+        s3.put_object(Bucket='pytest-s3-parquet', Key='test.parquet', Body=blob)
+
+        storage = S3ImportStorage(
+            project=project,
+            bucket='pytest-s3-parquet',
+            aws_access_key_id='example',
+            aws_secret_access_key='example',
+            use_blob_urls=False,
+            recursive_scan=True,
+        )
+        storage.save()
+        storage.sync()
+
+        storage_links = S3ImportStorageLink.objects.filter(storage=storage).order_by('task_id')
+        assert [(link.row_group, link.row_index) for link in storage_links] == [(0, 0), (0, 1), (1, 0)]
+        assert [link.task.data for link in storage_links] == [{'text': f'Test task {i}'} for i in range(3)]
@@ -0,0 +1,91 @@
+import copy
+from unittest import mock
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from io_storages.s3.models import S3ImportStorageLink
+from io_storages.tests.factories import S3ImportStorageFactory
+from projects.tests.factories import ProjectFactory
+from tasks.models import Task
+from tasks.serializers import TaskSerializer
+from tasks.tests.factories import TaskFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def project():
+    project = ProjectFactory()
+    S3ImportStorageFactory(project=project, bucket='bucket', presign=True)
+    for i in range(3):
+        TaskFactory(
+            project=project,
+            data={'image': f's3://bucket/{i}.jpg', 'images': [f's3://bucket/{i}.png'], 'text': 'plain'},
+        )
+    return project
+
+
+@pytest.mark.parametrize('storage_proxy', [False, True])
+def test_resolve_uri_batch_matches_resolve_uri(project, storage_proxy):
+    """Batch resolution gives the same task data as resolving every task separately.
+
+    Purpose: Verify Task.resolve_uri_batch parity with Task.resolve_uri.
+    Setup: Project with a presigned S3 storage and 3 tasks with s3:// uris, a list of uris and plain text.
+    Actions: Resolve task data both ways with the storage proxy flag on and off.
+    Validations: Results are equal and uris point to the task presign/proxy endpoints.
+    """
+    tasks = list(Task.objects.filter(project=project).order_by('id'))
+    with mock.patch('io_storages.base_models.flag_set', return_value=storage_proxy):
+        expected = {task.id: task.resolve_uri(copy.deepcopy(task.data), project) for task in tasks}
+        resolved = Task.resolve_uri_batch(copy.deepcopy(tasks), project)
+
+    assert resolved == expected
+    for task in tasks:
+        assert f'/tasks/{task.id}/' in resolved[task.id]['image']
+        assert f'/tasks/{task.id}/' in resolved[task.id]['images'][0]
+        assert resolved[task.id]['text'] == 'plain'
+
+
+def test_resolve_uris_evaluates_flag_once(project):
+    """The storage resolves a page of uris with one feature flag evaluation.
+
+    Purpose: Ensure per-uri work that does not depend on the uri is shared within a batch.
+    Setup: Project with a presigned S3 storage and 3 tasks.
+    Actions: Serialize the tasks as a list with resolve_uri enabled.
+    Validations: flag_set is called once and every task gets its own resolved urls.
+    """
+    tasks = Task.objects.filter(project=project).order_by('id')
+    with mock.patch('io_storages.base_models.flag_set', return_value=False) as flag_set:
+        data = TaskSerializer(tasks, many=True, context={'resolve_uri': True, 'project': project}).data
+
+    assert flag_set.call_count == 1
+    for item in data:
+        assert f'/tasks/{item["id"]}/presign' in item['data']['image']
+
+
+def test_resolve_uri_batch_loads_storage_links_at_once(project):
+    """Fallback to the storage the task was imported from doesn't query storage links per task.
+
+    Purpose: Keep a page resolution at O(storages) queries when fields don't match any storage.
+    Setup: Project with a presigned S3 storage and tasks linked to it, each with a plain text field.
+    Actions: Resolve task data of 3 and of 6 tasks.
+    Validations: Results match resolve_uri and the number of queries doesn't depend on the number of tasks.
+    """
+    storage = project.get_all_import_storage_objects[0]
+    for i in range(3, 6):
+        TaskFactory(project=project, data={'image': f's3://bucket/{i}.jpg', 'text': 'plain'})
+    for task in Task.objects.filter(project=project):
+        S3ImportStorageLink.objects.create(task=task, key=task.data['image'], storage=storage)
+    tasks = list(Task.objects.filter(project=project).order_by('id'))
+
+    expected = {task.id: task.resolve_uri(copy.deepcopy(task.data), project) for task in tasks}
+    assert Task.resolve_uri_batch(copy.deepcopy(tasks), project) == expected
+
+    queries = []
+    for page in (tasks[:3], tasks):
+        page = list(Task.objects.filter(id__in=[task.id for task in page]))
+        with CaptureQueriesContext(connection) as context:
+            Task.resolve_uri_batch(page, project)
+        queries.append(len(context.captured_queries))
+    assert queries[0] == queries[1]
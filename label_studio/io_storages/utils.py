@@ -3,11 +3,15 @@
 import io
 import json
 import logging
+import os
 import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Optional, Union
+from typing import Iterator, Optional, Union
 
 from core.feature_flags import flag_set
+from core.label_config import get_parsed_label_config
 from core.utils.common import load_func
 from django.conf import settings
 
@@ -236,7 +240,117 @@ def _load_tasks_json_lso_generator(blob: bytes, key: str):
         _error_wrapper()
 
 
-def load_tasks_json(blob: str, key: str) -> list[StorageObject]:
+# Task-level columns that are kept in addition to label config data keys when projecting Parquet columns
+PARQUET_TASK_COLUMNS = ('data', 'annotations', 'predictions', 'meta')
+
+
+def is_parquet_key(key: str) -> bool:
+    return os.path.splitext(str(key).lower())[1] == '.parquet'
+
+
+def get_parquet_import_columns(project) -> list[str] | None:
+    """
+    Columns to read from a Parquet file for a project: data keys referenced by $variables anywhere in the label
+    config, task-level columns (data, annotations, predictions, meta) and settings.PARQUET_IMPORT_EXTRA_COLUMNS.
+
+    Returns None (read all columns) when the project has no custom label config yet.
+    """
+    if project is None or not project.label_config_is_not_default:
+        return None
+    # not only data_types: tags without name (e.g. <Header value="$title"/>) and other attributes count too
+    data_keys = get_parsed_label_config(project.label_config).data_keys
+    if not data_keys:
+        return None
+    columns = [*sorted(data_keys), *PARQUET_TASK_COLUMNS, *settings.PARQUET_IMPORT_EXTRA_COLUMNS]
+    return list(dict.fromkeys(columns))
+
+
+def _open_parquet_file(source):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        # BufferReader is a zero-copy, random-access view on the blob and is safe to share between threads
+        source = pa.BufferReader(source)
+    return pq.ParquetFile(source)
+
+
+def _read_parquet_row_group(source, row_group: int, columns: list[str] | None):
+    return _open_parquet_file(source).read_row_group(row_group, columns=columns, use_threads=False)
+
+
+def _iter_parquet_row_groups(source, num_row_groups: int, columns: list[str] | None, max_workers: int):
+    """Yield (row_group, table) pairs in order, decoding up to max_workers row groups ahead"""
+    if max_workers <= 1 or num_row_groups <= 1:
+        parquet_file = _open_parquet_file(source)
+        for row_group in range(num_row_groups):
+            yield row_group, parquet_file.read_row_group(row_group, columns=columns)
+        return
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque()
+        for row_group in range(num_row_groups):
+            pending.append((row_group, executor.submit(_read_parquet_row_group, source, row_group, columns)))
+            if len(pending) >= max_workers:
+                row_group, future = pending.popleft()
+                yield row_group, future.result()
+        while pending:
+            row_group, future = pending.popleft()
+            yield row_group, future.result()
+
+
+def _parquet_table_to_task_datas(table) -> list[dict]:
+    """Convert an Arrow table to a list of JSON-compatible dicts"""
+    import pyarrow as pa
+
+    for i, field in enumerate(table.schema):
+        if pa.types.is_timestamp(field.type) or pa.types.is_date(field.type) or pa.types.is_time(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(pa.string()))
+        elif pa.types.is_decimal(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(pa.float64()))
+    return table.to_pylist()
+
+
+def load_tasks_parquet(source, key: str, columns: list[str] | None = None, max_workers: int | None = None):
+    """
+    Lazily read tasks from a Parquet file row group by row group.
+
+    Args:
+        source: Parquet content as bytes, a local file path or a binary file-like object.
+        key (str): The key of the file. Used for link params and error messages.
+        columns (list[str] | None): Columns to read; names missing in the file are ignored.
+            If none of them are present in the file, all columns are read.
+        max_workers (int | None): Number of row groups decoded concurrently,
+            defaults to settings.PARQUET_IMPORT_MAX_WORKERS. File-like sources are always read sequentially.
+
+    Yields:
+        StorageObject: link params for each row with row_group and row_index (index inside the row group) set.
+    """
+    try:
+        parquet_file = _open_parquet_file(source)
+    except Exception as exc:
+        raise ValueError(f"Can't import Parquet-formatted tasks from {key}: {exc}") from exc
+
+    if columns is not None:
+        names = set(parquet_file.schema_arrow.names)
+        columns = [column for column in columns if column in names] or None
+
+    if max_workers is None:
+        max_workers = settings.PARQUET_IMPORT_MAX_WORKERS
+    if not isinstance(source, (bytes, bytearray, memoryview, str, os.PathLike)):
+        max_workers = 1
+    elif isinstance(source, (str, os.PathLike)):
+        source = str(source)
+
+    for row_group, table in _iter_parquet_row_groups(source, parquet_file.num_row_groups, columns, max_workers):
+        for row_index, task_data in enumerate(_parquet_table_to_task_datas(table)):
+            yield StorageObject(key=key, task_data=task_data, row_index=row_index, row_group=row_group)
+
+
+def load_tasks_json(blob: str, key: str, project=None) -> Iterator[StorageObject]:
+    if is_parquet_key(key):
+        return load_tasks_parquet(blob, key, columns=get_parquet_import_columns(project))
+
     # uses load_tasks_json_lso here and an LSE-specific implementation in LSE
     load_tasks_json_func = load_func(settings.STORAGE_LOAD_TASKS_JSON)
     return load_tasks_json_func(blob, key)
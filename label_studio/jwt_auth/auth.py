@@ -1,5 +1,6 @@
 import logging
 
+from django.utils.translation import gettext_lazy as _
 from drf_spectacular.extensions import OpenApiAuthenticationExtension
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.exceptions import AuthenticationFailed
@@ -12,9 +13,25 @@ class TokenAuthenticationPhaseout(TokenAuthentication):
 
     Logs usage and triggers a 401 if legacy token auth is not enabled for the organization."""
 
+    def authenticate_credentials(self, key):
+        from jwt_auth.models import AUTH_USER_RELATED
+
+        model = self.get_model()
+        related = ['user'] + [f'user__{field}' for field in AUTH_USER_RELATED]
+        try:
+            token = model.objects.select_related(*related).get(key=key)
+        except model.DoesNotExist:
+            raise AuthenticationFailed(_('Invalid token.'))
+
+        if not token.user.is_active:
+            raise AuthenticationFailed(_('User inactive or deleted.'))
+
+        return token.user, token
+
     def authenticate(self, request):
         """Authenticate the request and log if successful."""
         from core.feature_flags import flag_set
+        from jwt_auth.models import get_jwt_settings
 
         auth_result = super().authenticate(request)
         JWT_ACCESS_TOKEN_ENABLED = flag_set('fflag__feature_develop__prompts__dia_1829_jwt_token_auth')
@@ -24,7 +41,7 @@ class TokenAuthenticationPhaseout(TokenAuthentication):
             org_id = org.id if org else None
 
             # raise 401 if legacy API token auth disabled (i.e. this token is no longer valid)
-            if org and (not org.jwt.legacy_api_tokens_enabled):
+            if org and (not get_jwt_settings(org).legacy_api_tokens_enabled):
                 raise AuthenticationFailed(
                     'Authentication token no longer valid: legacy token authentication has been disabled for this organization'
                 )
@@ -1,13 +1,7 @@
 import logging
 
-from django.contrib.auth import get_user_model
-from django.http import JsonResponse
-from rest_framework import status
-
 logger = logging.getLogger(__name__)
 
-User = get_user_model()
-
 
 class JWTAuthenticationMiddleware:
     def __init__(self, get_response):
@@ -15,22 +9,20 @@ class JWTAuthenticationMiddleware:
 
     def __call__(self, request):
         from core.feature_flags import flag_set
-        from rest_framework_simplejwt.authentication import JWTAuthentication
+        from jwt_auth.models import LSJWTAuthentication, get_jwt_settings
         from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
 
         try:
-            user_and_token = JWTAuthentication().authenticate(request)
+            # user is loaded with active organization and its JWT settings in a single query
+            user_and_token = LSJWTAuthentication().authenticate(request)
             if user_and_token:
-                user = User.objects.get(pk=user_and_token[0].pk)
+                user = user_and_token[0]
                 JWT_ACCESS_TOKEN_ENABLED = flag_set(
                     'fflag__feature_develop__prompts__dia_1829_jwt_token_auth', user=user
                 )
-                if JWT_ACCESS_TOKEN_ENABLED and user.active_organization.jwt.api_tokens_enabled:
+                if JWT_ACCESS_TOKEN_ENABLED and get_jwt_settings(user.active_organization).api_tokens_enabled:
                     request.user = user
                     request.is_jwt = True
-        except User.DoesNotExist:
-            logger.info('JWT authentication failed: User no longer exists')
-            return JsonResponse({'detail': 'User not found'}, status=status.HTTP_401_UNAUTHORIZED)
         except (AuthenticationFailed, InvalidToken, TokenError) as e:
             logger.info('JWT authentication failed: %s', e)
             # don't raise 401 here, fallback to other auth methods (in case token is valid for them)
@@ -5,11 +5,15 @@ from annoying.fields import AutoOneToOneField
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from organizations.models import Organization
+from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.backends import TokenBackend
-from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.tokens import api_settings as simple_jwt_settings
 
+# user, active organization with its owner (for feature flags) and JWT settings are resolved in one query
+AUTH_USER_RELATED = ('active_organization__created_by', 'active_organization__jwt')
+
 
 class JWTSettings(models.Model):
     """Organization-specific JWT settings for authentication"""
@@ -38,6 +42,44 @@ class JWTSettings(models.Model):
         return self.organization.has_permission(user)
 
 
+def get_jwt_settings(organization):
+    """Return organization JWT settings.
+
+    AutoOneToOneField access always opens a transaction, so settings loaded with select_related are taken
+    from the relation cache directly.
+    """
+    related = JWTSettings._meta.get_field('organization').remote_field
+    if related.is_cached(organization):
+        jwt_settings = related.get_cached_value(organization)
+        if jwt_settings is not None:
+            return jwt_settings
+    return organization.jwt
+
+
+class LSJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that loads the user together with the active organization and its JWT settings"""
+
+    def get_user(self, validated_token):
+        if getattr(simple_jwt_settings, 'CHECK_REVOKE_TOKEN', False):
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[simple_jwt_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+
+        try:
+            user = self.user_model.objects.select_related(*AUTH_USER_RELATED).get(
+                **{simple_jwt_settings.USER_ID_FIELD: user_id}
+            )
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+
+        if getattr(simple_jwt_settings, 'CHECK_USER_IS_ACTIVE', True) and not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        return user
+
+
 class LSTokenBackend(TokenBackend):
     """A custom JWT token backend that truncates tokens before storing in the database.
 
@@ -1,34 +1,189 @@
+import logging
+from collections import Counter, defaultdict
+
+from core.label_config import get_region_labels
+from core.models import AsyncMigrationStatus
+from core.redis import start_job_async_or_sync
+from core.utils.common import batch
+from django.conf import settings
 from django.db import transaction
-from tasks.models import Annotation
+from django.db.models import Exists, OuterRef, Sum
+from tasks.models import Annotation, Task
+
+from .models import AnnotationLabel
+
+logger = logging.getLogger(__name__)
+
+# the async migration which fills the label index for annotations created before it
+LABEL_INDEX_MIGRATION = '0004_annotation_label'
+
+
+def get_result_labels(result):
+    """Count labels in annotation result by (from_name, label)"""
+    labels = Counter()
+    if not isinstance(result, list):
+        return labels
+    for region in result:
+        if not isinstance(region, dict) or 'from_name' not in region or not isinstance(region.get('value'), dict):
+            continue
+        for label in get_region_labels(region):
+            labels[(region['from_name'], label)] += 1
+    return labels
+
+
+def index_annotation_labels(annotations):
+    """Replace label index rows of annotations with labels from their current results
+
+    :param annotations: Annotation objects with id, project_id and result loaded
+    """
+    annotations = [annotation for annotation in annotations if annotation.project_id is not None]
+    if not annotations:
+        return
+
+    rows = [
+        AnnotationLabel(
+            annotation_id=annotation.id,
+            project_id=annotation.project_id,
+            from_name=from_name,
+            label=label,
+            count=count,
+        )
+        for annotation in annotations
+        for (from_name, label), count in get_result_labels(annotation.result).items()
+    ]
+    with transaction.atomic():
+        AnnotationLabel.objects.filter(annotation_id__in=[annotation.id for annotation in annotations]).delete()
+        AnnotationLabel.objects.bulk_create(rows, batch_size=settings.BATCH_SIZE)
+
+
+def backfill_annotation_labels(annotations, batch_size=None):
+    """Rebuild label index for annotations queryset in batches
+
+    :return: Number of indexed annotations
+    """
+    batch_size = batch_size or settings.BATCH_SIZE
+    annotation_ids = list(annotations.filter(project__isnull=False).order_by('id').values_list('id', flat=True))
+    for ids in batch(annotation_ids, batch_size):
+        index_annotation_labels(Annotation.objects.filter(id__in=ids).only('id', 'project_id', 'result'))
+    return len(annotation_ids)
+
+
+def _fill_annotation_labels(migration_name):
+    migration = AsyncMigrationStatus.objects.create(name=migration_name, status=AsyncMigrationStatus.STATUS_STARTED)
+    total = 0
+    project_ids = Annotation.objects.filter(project__isnull=False).values_list('project_id', flat=True).distinct()
+    for project_id in sorted(project_ids):
+        logger.debug(f'Start indexing labels for project {project_id}.')
+        total += backfill_annotation_labels(Annotation.objects.filter(project_id=project_id))
+    migration.status = AsyncMigrationStatus.STATUS_FINISHED
+    migration.meta = {'annotations_processed': total}
+    migration.save()
+
+
+def fill_annotation_labels(migration_name):
+    logger.info('Start filling label index')
+    start_job_async_or_sync(_fill_annotation_labels, migration_name=migration_name)
+    logger.info('Finished filling label index')
+
+
+def label_index_is_ready():
+    """Label index covers all annotations once the migration job has filled it"""
+    return AsyncMigrationStatus.objects.filter(
+        name=LABEL_INDEX_MIGRATION, status=AsyncMigrationStatus.STATUS_FINISHED
+    ).exists()
+
+
+def _scan_result_labels(annotations):
+    """Labels from annotation results without the index: yields (task id, labels)"""
+    for task_id, result in annotations.values_list('task_id', 'result').iterator():
+        yield task_id, get_result_labels(result)
+
+
+def get_label_counts(project, from_name=None):
+    """Label frequencies in project annotations: {from_name: {label: number of regions}}"""
+    counts = defaultdict(dict)
+    if not label_index_is_ready():
+        for _, labels in _scan_result_labels(Annotation.objects.filter(project=project)):
+            for (name, label), count in labels.items():
+                if from_name is None or name == from_name:
+                    counts[name][label] = counts[name].get(label, 0) + count
+        return dict(counts)
+
+    rows = AnnotationLabel.objects.filter(project=project)
+    if from_name is not None:
+        rows = rows.filter(from_name=from_name)
+    for row in rows.values('from_name', 'label').annotate(total=Sum('count')).order_by():
+        counts[row['from_name']][row['label']] = row['total']
+    return dict(counts)
+
+
+def tasks_with_label_filter(project, label, from_name=None):
+    """Exists() expression for Task queryset: the task has an annotation with label"""
+    if not label_index_is_ready():
+        task_ids = set()
+        for task_id, labels in _scan_result_labels(Annotation.objects.filter(project=project)):
+            if any(value == label and from_name in (None, name) for name, value in labels):
+                task_ids.add(task_id)
+        return Exists(Task.objects.filter(pk=OuterRef('pk'), id__in=task_ids))
+
+    rows = AnnotationLabel.objects.filter(project=project, label=label, annotation__task=OuterRef('pk'))
+    if from_name is not None:
+        rows = rows.filter(from_name=from_name)
+    return Exists(rows)
+
+
+def _get_index_labels(value):
+    """Index labels which every region with this exact label value has"""
+    if not isinstance(value, list):
+        return set()
+    labels = set()
+    for item in value:
+        labels.add(str(item))
+        if isinstance(item, list):
+            # taxonomy paths are split into separate labels
+            labels.update(str(label) for label in item)
+    return labels
 
 
 def bulk_update_label(old_label, new_label, organization, project=None):
-    annotations = Annotation.objects.filter(project__organization=organization)
-    if project is not None:
-        annotations = annotations.filter(project=project)
+    index_labels = _get_index_labels(old_label)
+    if index_labels and label_index_is_ready():
+        # candidates from the label index, results are still checked below
+        rows = AnnotationLabel.objects.filter(label__in=index_labels, project__organization=organization)
+        if project is not None:
+            rows = rows.filter(project=project)
+        annotation_ids = sorted(set(rows.values_list('annotation_id', flat=True)))
+    else:
+        # non-list label values are not indexed, old annotations aren't indexed until the migration job finishes
+        annotations = Annotation.objects.filter(project__organization=organization)
+        if project is not None:
+            annotations = annotations.filter(project=project)
+        annotation_ids = list(annotations.order_by('id').values_list('id', flat=True))
 
     updated_count = 0
-    with transaction.atomic():
-        update_annotations = []
-        for annotation in annotations.only('result').all():
-            result = annotation.result
-
-            updated_result = []
-            need_update = False
-            for region in result:
-                result_type = region.get('type')
-                if result_type is not None:
-                    label = region['value'].get(result_type)
-                    if label is not None and label == old_label:
-                        region['value'][result_type] = new_label
-                        updated_count += 1
-                        need_update = True
-                updated_result.append(region)
-
-            if need_update:
-                annotation.result = updated_result
-                update_annotations.append(annotation)
-
-        if update_annotations:
-            Annotation.objects.bulk_update(update_annotations, ['result'])
+    for ids in batch(annotation_ids, settings.BATCH_SIZE):
+        with transaction.atomic():
+            update_annotations = []
+            for annotation in Annotation.objects.filter(id__in=ids).only('id', 'project_id', 'result'):
+                result = annotation.result
+
+                updated_result = []
+                need_update = False
+                for region in result:
+                    result_type = region.get('type')
+                    if result_type is not None:
+                        label = region['value'].get(result_type)
+                        if label is not None and label == old_label:
+                            region['value'][result_type] = new_label
+                            updated_count += 1
+                            need_update = True
+                    updated_result.append(region)
+
+                if need_update:
+                    annotation.result = updated_result
+                    update_annotations.append(annotation)
+
+            if update_annotations:
+                Annotation.objects.bulk_update(update_annotations, ['result'])
+                index_annotation_labels(update_annotations)
     return updated_count
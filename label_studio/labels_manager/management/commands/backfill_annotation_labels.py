@@ -0,0 +1,35 @@
+import logging
+
+from django.core.management.base import BaseCommand
+from labels_manager.functions import backfill_annotation_labels
+from projects.models import Project
+from tasks.models import Annotation
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the label index (AnnotationLabel) from annotation results'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--organization', type=int, help='organization id, all organizations if not set')
+        parser.add_argument('--project', type=int, help='project id, all projects if not set')
+        parser.add_argument('--batch-size', type=int, default=None, help='annotations per batch')
+
+    def handle(self, *args, **options):
+        projects = Project.objects.order_by('id')
+        if options['organization']:
+            projects = projects.filter(organization_id=options['organization'])
+        if options['project']:
+            projects = projects.filter(id=options['project'])
+
+        total = 0
+        for project_id in projects.values_list('id', flat=True):
+            logger.debug(f'Start indexing labels for project {project_id}.')
+            count = backfill_annotation_labels(
+                Annotation.objects.filter(project_id=project_id), batch_size=options['batch_size']
+            )
+            total += count
+            self.stdout.write(f'Project {project_id}: {count} annotations indexed')
+
+        self.stdout.write(self.style.SUCCESS(f'Label index is rebuilt for {total} annotations'))
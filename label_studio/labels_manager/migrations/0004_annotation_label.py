@@ -0,0 +1,91 @@
+# Generated by Django 5.1.15 on 2026-10-19 09:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+from labels_manager.functions import fill_annotation_labels
+
+
+def forward(apps, schema_editor):
+    fill_annotation_labels('0004_annotation_label')
+
+
+def backwards(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("labels_manager", "0003_auto_20221213_1612"),
+        ("projects", "0033_projects_soft_delete_indexes_async"),
+        ("tasks", "0058_task_precomputed_agreement"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AnnotationLabel",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "from_name",
+                    models.CharField(
+                        help_text="Control tag name",
+                        max_length=2048,
+                        verbose_name="Tag name",
+                    ),
+                ),
+                (
+                    "label",
+                    models.TextField(
+                        help_text="Label value, taxonomy paths are split into separate labels",
+                        verbose_name="Label",
+                    ),
+                ),
+                (
+                    "count",
+                    models.PositiveIntegerField(
+                        default=1,
+                        help_text="Number of regions with this label",
+                        verbose_name="Count",
+                    ),
+                ),
+                (
+                    "annotation",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="indexed_labels",
+                        to="tasks.annotation",
+                    ),
+                ),
+                (
+                    "project",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="projects.project",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["project", "from_name", "label"],
+                        name="annotation_label_project_idx",
+                    ),
+                    models.Index(
+                        fields=["label", "project"], name="annotation_label_label_idx"
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(forward, backwards),
+    ]
@@ -41,3 +41,23 @@ class LabelLink(models.Model):
     def has_permission(self, user):
         user.project = self.project  # link for activity log
         return self.project.has_permission(user)
+
+
+class AnnotationLabel(models.Model):
+    """Inverted index of labels used in annotation results, one row per annotation, control tag and label.
+
+    Kept in sync on annotation save and bulk annotation creation (see labels_manager.functions),
+    fill it for existing annotations with the backfill_annotation_labels command.
+    """
+
+    annotation = models.ForeignKey('tasks.Annotation', on_delete=models.CASCADE, related_name='indexed_labels')
+    project = models.ForeignKey('projects.Project', on_delete=models.CASCADE, related_name='+', db_index=False)
+    from_name = models.CharField(_('Tag name'), max_length=2048, help_text='Control tag name')
+    label = models.TextField(_('Label'), help_text='Label value, taxonomy paths are split into separate labels')
+    count = models.PositiveIntegerField(_('Count'), default=1, help_text='Number of regions with this label')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['project', 'from_name', 'label'], name='annotation_label_project_idx'),
+            models.Index(fields=['label', 'project'], name='annotation_label_label_idx'),
+        ]
@@ -0,0 +1,150 @@
+from types import SimpleNamespace
+
+import pytest
+from core.models import AsyncMigrationStatus
+from data_manager.actions.experimental import rename_labels
+from django.core.management import call_command
+from labels_manager.functions import (
+    LABEL_INDEX_MIGRATION,
+    bulk_update_label,
+    fill_annotation_labels,
+    get_label_counts,
+    tasks_with_label_filter,
+)
+from labels_manager.models import AnnotationLabel
+from projects.tests.factories import ProjectFactory
+from tasks.models import Annotation, Task
+from tasks.tests.factories import AnnotationFactory, TaskFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def region(labels, from_name='label', result_type='labels'):
+    return {'from_name': from_name, 'to_name': 'text', 'type': result_type, 'value': {result_type: labels}}
+
+
+def indexed(annotation):
+    return set(AnnotationLabel.objects.filter(annotation=annotation).values_list('from_name', 'label', 'count'))
+
+
+def test_index_follows_annotation_result():
+    """Label index rows are replaced on every result change.
+
+    Purpose: The index stays in sync with Annotation.result on regular saves.
+    Setup: Annotation with two "Cat" regions and a taxonomy region.
+    Actions: Create, change result, save other fields only.
+    Validations: Index rows match the current result; taxonomy paths are split.
+    """
+    annotation = AnnotationFactory(
+        result=[region(['Cat']), region(['Cat']), region([['Animal', 'Dog']], 'taxonomy', 'taxonomy')]
+    )
+    assert indexed(annotation) == {('label', 'Cat', 2), ('taxonomy', 'Animal', 1), ('taxonomy', 'Dog', 1)}
+
+    annotation.result = [region(['Dog'])]
+    annotation.save()
+    assert indexed(annotation) == {('label', 'Dog', 1)}
+
+    annotation.lead_time = 10
+    annotation.save(update_fields=['lead_time'])
+    assert indexed(annotation) == {('label', 'Dog', 1)}
+
+
+def test_bulk_update_label_uses_index():
+    project = ProjectFactory()
+    other_project = ProjectFactory()
+    cat = AnnotationFactory(task=TaskFactory(project=project), result=[region(['Cat']), region(['Dog'])])
+    dog = AnnotationFactory(task=TaskFactory(project=project), result=[region(['Dog'])])
+    foreign_cat = AnnotationFactory(task=TaskFactory(project=other_project), result=[region(['Cat'])])
+
+    updated = bulk_update_label(['Cat'], ['Kitten'], project.organization)
+
+    assert updated == 1
+    cat.refresh_from_db()
+    assert cat.result == [region(['Kitten']), region(['Dog'])]
+    assert indexed(cat) == {('label', 'Kitten', 1), ('label', 'Dog', 1)}
+    assert Annotation.objects.get(id=dog.id).result == [region(['Dog'])]
+    assert Annotation.objects.get(id=foreign_cat.id).result == [region(['Cat'])]
+
+
+def test_label_counts_and_task_filter():
+    project = ProjectFactory()
+    cat_task, dog_task = TaskFactory.create_batch(2, project=project)
+    AnnotationFactory(task=cat_task, result=[region(['Cat']), region(['Cat'])])
+    AnnotationFactory(task=cat_task, result=[region(['Cat'])])
+    AnnotationFactory(task=dog_task, result=[region(['Dog'])])
+
+    assert get_label_counts(project) == {'label': {'Cat': 3, 'Dog': 1}}
+    tasks = Task.objects.filter(project=project)
+    assert list(tasks.filter(tasks_with_label_filter(project, 'Cat')).values_list('id', flat=True)) == [cat_task.id]
+    assert list(tasks.exclude(tasks_with_label_filter(project, 'Cat')).values_list('id', flat=True)) == [dog_task.id]
+
+
+def test_backfill_command():
+    annotation = AnnotationFactory(result=[region(['Cat'])])
+    AnnotationLabel.objects.all().delete()
+
+    call_command('backfill_annotation_labels', project=annotation.project_id)
+
+    assert indexed(annotation) == {('label', 'Cat', 1)}
+
+
+def test_migration_fills_index_for_existing_annotations():
+    annotations = [AnnotationFactory(result=[region(['Cat'])]), AnnotationFactory(result=[region(['Dog', 'Cat'])])]
+    AnnotationLabel.objects.all().delete()
+
+    fill_annotation_labels('test_fill_annotation_labels')
+
+    assert indexed(annotations[0]) == {('label', 'Cat', 1)}
+    assert indexed(annotations[1]) == {('label', 'Dog', 1), ('label', 'Cat', 1)}
+    migration = AsyncMigrationStatus.objects.get(name='test_fill_annotation_labels')
+    assert migration.status == AsyncMigrationStatus.STATUS_FINISHED
+    assert migration.meta == {'annotations_processed': 2}
+
+
+def test_rename_labels_action_uses_index():
+    project = ProjectFactory(
+        label_config='<View><Text name="text" value="$text"/>'
+        '<Labels name="label" toName="text"><Label value="Cat"/><Label value="Dog"/></Labels></View>'
+    )
+    annotation = AnnotationFactory(task=TaskFactory(project=project), result=[region(['Cat', 'Dog'])])
+    request = SimpleNamespace(data={'old_label_name': 'Cat', 'new_label_name': 'Kitten', 'control_tag': 'label'})
+
+    rename_labels(project, None, request=request)
+
+    annotation.refresh_from_db()
+    assert annotation.result == [region(['Kitten', 'Dog'])]
+    assert get_label_counts(project) == {'label': {'Kitten': 1, 'Dog': 1}}
+
+
+def test_label_lookups_scan_results_until_index_is_filled():
+    """Label lookups don't rely on the index while the migration job is running.
+
+    Purpose: Annotations created before the index are found until the job fills it.
+    Setup: Annotations without index rows, the migration job is not finished.
+    Actions: Count labels, filter tasks, rename labels with the action and bulk_update_label.
+    Validations: All of them see the un-indexed annotations.
+    """
+    project = ProjectFactory(
+        label_config='<View><Text name="text" value="$text"/>'
+        '<Labels name="label" toName="text"><Label value="Cat"/><Label value="Dog"/></Labels></View>'
+    )
+    cat_task, dog_task = TaskFactory.create_batch(2, project=project)
+    cat = AnnotationFactory(task=cat_task, result=[region(['Cat']), region(['Cat'])])
+    dog = AnnotationFactory(task=dog_task, result=[region(['Dog'])])
+    AnnotationLabel.objects.all().delete()
+    AsyncMigrationStatus.objects.update_or_create(
+        name=LABEL_INDEX_MIGRATION, defaults={'status': AsyncMigrationStatus.STATUS_STARTED}
+    )
+
+    assert get_label_counts(project) == {'label': {'Cat': 2, 'Dog': 1}}
+    tasks = Task.objects.filter(project=project)
+    assert list(tasks.filter(tasks_with_label_filter(project, 'Cat')).values_list('id', flat=True)) == [cat_task.id]
+
+    request = SimpleNamespace(data={'old_label_name': 'Cat', 'new_label_name': 'Kitten', 'control_tag': 'label'})
+    rename_labels(project, None, request=request)
+    cat.refresh_from_db()
+    assert cat.result == [region(['Kitten']), region(['Kitten'])]
+
+    assert bulk_update_label(['Dog'], ['Puppy'], project.organization, project) == 1
+    dog.refresh_from_db()
+    assert dog.result == [region(['Puppy'])]
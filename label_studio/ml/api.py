@@ -4,6 +4,7 @@ import logging
 
 from core.feature_flags import flag_set
 from core.permissions import ViewClassPermission, all_permissions
+from core.utils.params import bool_from_request
 from django.conf import settings
 from django.utils.decorators import method_decorator
 from django_filters.rest_framework import DjangoFilterBackend
@@ -107,6 +108,12 @@ _ml_backend_schema = {
         ),
         parameters=[
             OpenApiParameter(name='project', type=OpenApiTypes.INT, location='query', description='Project ID'),
+            OpenApiParameter(
+                name='refresh',
+                type=OpenApiTypes.BOOL,
+                location='query',
+                description='Check ML backend states right now instead of returning the cached states',
+            ),
         ],
         extensions={
             'x-fern-sdk-group-name': 'ml',
@@ -131,7 +138,11 @@ class MLBackendListAPI(generics.ListCreateAPIView):
 
         self.check_object_permissions(self.request, project)
 
-        ml_backends = project.update_ml_backends_state()
+        # states are checked in background, refresh=true checks them right now
+        refresh = bool_from_request(self.request.query_params, 'refresh', False)
+        ml_backends = project.get_ml_backends()
+        for ml_backend in ml_backends:
+            ml_backend.refresh_state(force=refresh)
 
         return ml_backends
 
@@ -185,6 +196,14 @@ class MLBackendListAPI(generics.ListCreateAPIView):
     """.format(
             host=(settings.HOSTNAME or 'https://localhost:8080')
         ),
+        parameters=[
+            OpenApiParameter(
+                name='refresh',
+                type=OpenApiTypes.BOOL,
+                location='query',
+                description='Check ML backend state right now instead of returning the cached state',
+            ),
+        ],
         request=None,
         extensions={
             'x-fern-sdk-group-name': 'ml',
@@ -223,7 +242,7 @@ class MLBackendDetailAPI(generics.RetrieveUpdateDestroyAPIView):
 
     def get_object(self):
         ml_backend = super(MLBackendDetailAPI, self).get_object()
-        ml_backend.update_state()
+        ml_backend.refresh_state(force=bool_from_request(self.request.query_params, 'refresh', False))
         return ml_backend
 
     def perform_update(self, serializer):
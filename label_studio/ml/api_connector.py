@@ -2,10 +2,13 @@
 """
 import logging
 import os
+import threading
+import time
 import urllib
 
 import requests
 from core.feature_flags import flag_set
+from core.label_config import get_parsed_label_config
 from core.utils.common import load_func
 from core.version import get_git_version
 from data_export.serializers import ExportDataSerializer
@@ -42,6 +45,9 @@ DELETE_URL = 'delete'
 JOB_STATUS_URL = 'job_status'
 VERSIONS_URL = 'versions'
 
+# ML backend response status for predict requests with unknown label_config_hash
+CONTEXT_CACHE_MISS_STATUS = 409
+
 
 class BaseHTTPAPI(object):
     MAX_RETRIES = 2
@@ -62,28 +68,38 @@ class BaseHTTPAPI(object):
         self._basic_auth = (kwargs.get('basic_auth_user'), kwargs.get('basic_auth_pass'))
 
         self._max_retries = max_retries or self.MAX_RETRIES
-        self._sessions = {self._session_key(): self.create_session()}
+        self._sessions = {}
 
     def create_session(self):
         session = requests.Session()
         session.headers.update(self.HEADERS)
         session.headers.update(self._headers)
-        session.mount('http://', HTTPAdapter(max_retries=self._max_retries))
-        session.mount('https://', HTTPAdapter(max_retries=self._max_retries))
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=settings.ML_BACKEND_POOL_MAXSIZE, max_retries=self._max_retries
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
         return session
 
     def _session_key(self):
-        return os.getpid()
+        """Sessions are shared by API objects with the same url, credentials and session options"""
+        return (
+            self._url,
+            self._auth_method,
+            self._basic_auth,
+            self._max_retries,
+            tuple(sorted(self._headers.items())),
+        )
 
     @property
     def http(self):
-        key = self._session_key()
-        if key in self._sessions:
-            return self._sessions[key]
-        else:
-            session = self.create_session()
-            self._sessions[key] = session
-            return session
+        if settings.ML_BACKEND_KEEP_ALIVE > 0:
+            return get_session_pool().get(self._session_key(), self.create_session)
+        # connection reuse is disabled: one session per API object and process
+        key = os.getpid()
+        if key not in self._sessions:
+            self._sessions[key] = self.create_session()
+        return self._sessions[key]
 
     def _prepare_kwargs(self, kwargs):
         # add timeout if it's not presented
@@ -108,6 +124,67 @@ class BaseHTTPAPI(object):
         return self.request('POST', *args, **kwargs)
 
 
+class SessionPool:
+    """Keep-alive sessions shared by all ML API objects of the process.
+
+    MLBackend.api creates a new API object on every access, so sessions are pooled by backend url
+    and credentials to reuse open connections between calls. Sessions unused for
+    ML_BACKEND_KEEP_ALIVE seconds are closed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._used_at = {}
+
+    def get(self, key, create_session):
+        current_time = time.monotonic()
+        with self._lock:
+            self._close_idle(current_time)
+            if key not in self._sessions:
+                self._sessions[key] = create_session()
+            self._used_at[key] = current_time
+            return self._sessions[key]
+
+    def _close_idle(self, current_time):
+        for key, used_at in list(self._used_at.items()):
+            if current_time - used_at > settings.ML_BACKEND_KEEP_ALIVE:
+                self._close(key)
+
+    def _close(self, key):
+        self._sessions.pop(key).close()
+        self._used_at.pop(key)
+
+    def invalidate(self, url):
+        """Close sessions of the backend url, e.g. after its credentials are changed"""
+        with self._lock:
+            for key in [key for key in self._sessions if key[0] == url]:
+                self._close(key)
+
+    def close(self):
+        with self._lock:
+            for key in list(self._sessions):
+                self._close(key)
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+_session_pool = None
+_session_pool_pid = None
+_session_pool_lock = threading.Lock()
+
+
+def get_session_pool():
+    """Return the process-wide session pool, re-created after fork (e.g. in RQ work horses)"""
+    global _session_pool, _session_pool_pid
+    with _session_pool_lock:
+        if _session_pool is None or _session_pool_pid != os.getpid():
+            _session_pool = SessionPool()
+            _session_pool_pid = os.getpid()
+        return _session_pool
+
+
 class MLApiResult:
     """
     Class for storing the result of ML API request
@@ -138,6 +215,8 @@ class MLApi(BaseHTTPAPI):
     def __init__(self, **kwargs):
         super(MLApi, self).__init__(**kwargs)
         self._validate_request_timeout = 10
+        # label config and task data credentials are sent with setup only, see make_predictions()
+        self._cache_project_context = kwargs.get('cache_project_context', False)
 
     def _get_url(self, url_suffix):
         url = self._url
@@ -205,7 +284,15 @@ class MLApi(BaseHTTPAPI):
             }
             return self._request('train', request, verbose=False, timeout=TIMEOUT_PREDICT)
 
-    def _prep_prediction_req(self, tasks, project, context=None):
+    def _prep_prediction_req(self, tasks, project, context=None, cached_context=False):
+        if cached_context:
+            return {
+                'tasks': tasks,
+                'project': self._create_project_uid(project),
+                'label_config_hash': get_parsed_label_config(project.label_config).content_hash,
+                'params': {'context': context},
+            }
+
         request = {
             'tasks': tasks,
             'project': self._create_project_uid(project),
@@ -216,10 +303,36 @@ class MLApi(BaseHTTPAPI):
                 'context': context,
             },
         }
+        if self._cache_project_context:
+            request['label_config_hash'] = get_parsed_label_config(project.label_config).content_hash
 
         return request
 
+    @staticmethod
+    def _project_task_data(tasks, project):
+        """Keep only task data keys used by the label config"""
+        try:
+            keys = get_parsed_label_config(project.label_config).data_keys
+        except Exception as exc:
+            logger.debug(f"Can't get data keys from label config, task data is sent as is: {exc}")
+            return tasks
+        return [
+            {**task, 'data': {key: value for key, value in task['data'].items() if key in keys}}
+            if isinstance(task.get('data'), dict)
+            else task
+            for task in tasks
+        ]
+
     def make_predictions(self, tasks, project, context=None):
+        if self._cache_project_context:
+            tasks = self._project_task_data(tasks, project)
+            request = self._prep_prediction_req(tasks, project, context=context, cached_context=True)
+            result = self._request(PREDICT_URL, request, verbose=False, timeout=TIMEOUT_PREDICT)
+            if result.status_code != CONTEXT_CACHE_MISS_STATUS:
+                return result
+            # ML backend doesn't have this label config (e.g. after restart), send the full request
+            logger.debug(f'ML backend {self._url} has no cached label config, sending it with predict request')
+
         request = self._prep_prediction_req(tasks, project, context=context)
         return self._request(PREDICT_URL, request, verbose=False, timeout=TIMEOUT_PREDICT)
 
@@ -238,10 +351,20 @@ class MLApi(BaseHTTPAPI):
                 'hostname': settings.HOSTNAME if settings.HOSTNAME else ('http://localhost:' + settings.INTERNAL_PORT),
                 'access_token': project.created_by.auth_token.key,
                 'extra_params': extra_params,
+                **self._prep_cached_context(project),
             },
             timeout=TIMEOUT_SETUP,
         )
 
+    def _prep_cached_context(self, project):
+        """Project context which ML backend caches by label config hash to serve predict requests without it"""
+        if not self._cache_project_context:
+            return {}
+        return {
+            'label_config_hash': get_parsed_label_config(project.label_config).content_hash,
+            'params': {'login': project.task_data_login, 'password': project.task_data_password},
+        }
+
     def duplicate_model(self, project_src, project_dst):
         return self._request(
             DUPLICATE_URL,
@@ -0,0 +1,121 @@
+"""This file and its contents are licensed under the Apache License 2.0. Please see the included NOTICE for copyright information and LICENSE for a copy of the license.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class InteractiveRequestSuperseded(Exception):
+    """The user sent a newer interactive request to the same ML backend before this one was answered"""
+
+
+def interactive_request_key(ml_backend, tasks, context):
+    """Hash of everything an interactive prediction depends on: ML backend, serialized task and context"""
+    payload = json.dumps(
+        [ml_backend.id, ml_backend.url, tasks, context], sort_keys=True, default=str, separators=(',', ':')
+    )
+    return 'ml_interactive:' + hashlib.sha256(payload.encode()).hexdigest()
+
+
+class _Call:
+    def __init__(self, key):
+        self.key = key
+        self.future = None
+        self.waiters = 0
+
+
+class _Waiter:
+    def __init__(self, call):
+        self.call = call
+        self.event = threading.Event()
+        self.superseded = False
+
+    def supersede(self):
+        self.superseded = True
+        self.event.set()
+
+
+class InteractiveGateway:
+    """Run interactive ML backend requests in a thread pool with request collapsing.
+
+    Identical concurrent requests (the same key) share one call to the ML backend. A new request from the same
+    user to the same ML backend supersedes the previous one: its waiter returns at once and the call
+    is cancelled if it has not started yet and nobody else waits for it.
+    """
+
+    def __init__(self, max_workers):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ml-interactive')
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._latest = {}
+
+    def run(self, key, func, supersede_key=None):
+        """Return func() result shared with identical in-flight requests,
+        raise InteractiveRequestSuperseded if a newer request with the same supersede_key arrives first
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call(key)
+                call.future = self._executor.submit(self._run_call, call, func)
+            else:
+                logger.debug(f'Interactive request {key} is collapsed with the in-flight one')
+            call.waiters += 1
+            waiter = _Waiter(call)
+            if supersede_key is not None:
+                previous = self._latest.get(supersede_key)
+                if previous is not None and previous.call is not call:
+                    previous.supersede()
+                self._latest[supersede_key] = waiter
+
+        call.future.add_done_callback(lambda _: waiter.event.set())
+        waiter.event.wait()
+
+        with self._lock:
+            call.waiters -= 1
+            if supersede_key is not None and self._latest.get(supersede_key) is waiter:
+                del self._latest[supersede_key]
+            if waiter.superseded and not call.waiters and call.future.cancel():
+                self._calls.pop(key, None)
+
+        # a superseded request fails even if its call has finished meanwhile, the user waits for the newer one
+        if waiter.superseded:
+            raise InteractiveRequestSuperseded()
+        return call.future.result()
+
+    def _run_call(self, call, func):
+        try:
+            return func()
+        finally:
+            with self._lock:
+                if self._calls.get(call.key) is call:
+                    del self._calls[call.key]
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_gateway = None
+_gateway_pid = None
+_gateway_lock = threading.Lock()
+
+
+def get_interactive_gateway():
+    """Return the process-wide interactive gateway, re-created after fork;
+    None if it's disabled with ML_INTERACTIVE_MAX_WORKERS=0
+    """
+    global _gateway, _gateway_pid
+    if not settings.ML_INTERACTIVE_MAX_WORKERS:
+        return None
+    with _gateway_lock:
+        if _gateway is None or _gateway_pid != os.getpid():
+            _gateway = InteractiveGateway(settings.ML_INTERACTIVE_MAX_WORKERS)
+            _gateway_pid = os.getpid()
+        return _gateway
@@ -0,0 +1,42 @@
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from ml.models import probe_ml_backends
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Check ML backend states in background, API requests return these cached states'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='check outdated states once and exit')
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=settings.ML_BACKEND_PROBE_INTERVAL,
+            help='seconds between checks of the same ML backend',
+        )
+        parser.add_argument(
+            '--jitter',
+            type=float,
+            default=settings.ML_BACKEND_PROBE_JITTER,
+            help='randomize the interval by this fraction to spread the checks over time',
+        )
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        jitter = options['jitter']
+        while True:
+            close_old_connections()
+            checked = probe_ml_backends(max_age=interval)
+            logger.debug(f'{checked} ML backend states checked')
+            if options['once']:
+                self.stdout.write(f'{checked} ML backend states checked')
+                return
+            # wake up about twice per interval, so a state is never much older than the interval
+            time.sleep(max(1.0, interval * random.uniform(1 - jitter, 1 + jitter) / 2))
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.15 on 2026-10-19 10:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ml", "0007_auto_20240314_1957"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mlbackend",
+            name="state_checked_at",
+            field=models.DateTimeField(
+                default=None,
+                help_text="Last time the state was checked by requesting the ML backend",
+                null=True,
+                verbose_name="state checked at",
+            ),
+        ),
+    ]
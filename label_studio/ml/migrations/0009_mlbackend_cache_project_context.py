@@ -0,0 +1,22 @@
+# Generated by Django 5.1.15 on 2026-10-19 10:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ml", "0008_mlbackend_state_checked_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mlbackend",
+            name="cache_project_context",
+            field=models.BooleanField(
+                default=False,
+                help_text="Send the label config with setup only, predict requests reference it by hash and include only task data used by the label config. The ML backend must support this mode.",
+                verbose_name="cache project context",
+            ),
+        ),
+    ]
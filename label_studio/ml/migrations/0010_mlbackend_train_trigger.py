@@ -0,0 +1,32 @@
+# Generated by Django 5.1.15 on 2026-10-19 11:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ml", "0009_mlbackend_cache_project_context"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mlbackend",
+            name="annotations_since_train",
+            field=models.IntegerField(
+                default=0,
+                help_text="Number of new annotations since the last scheduled training",
+                verbose_name="annotations since train",
+            ),
+        ),
+        migrations.AddField(
+            model_name="mlbackend",
+            name="train_scheduled_at",
+            field=models.DateTimeField(
+                default=None,
+                help_text="Last time training was scheduled by new annotations",
+                null=True,
+                verbose_name="train scheduled at",
+            ),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.15 on 2026-10-19 13:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ml", "0010_mlbackend_train_trigger"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mlbackend",
+            name="served_model_version",
+            field=models.TextField(
+                blank=True,
+                default="",
+                help_text="Model version reported by the ML backend on the last successful state check",
+                null=True,
+                verbose_name="served model version",
+            ),
+        ),
+    ]
@@ -1,16 +1,23 @@
 """This file and its contents are licensed under the Apache License 2.0. Please see the included NOTICE for copyright information and LICENSE for a copy of the license.
 """
 import logging
+import math
+from datetime import timedelta
 from typing import Dict, List
 
+from core.label_config import replace_task_data_undefined_with_config_field
+from core.redis import redis_connected, start_job_async_or_sync
 from core.utils.common import conditional_atomic, db_is_not_sqlite, load_func
 from django.conf import settings
+from django.core.cache import cache
 from django.db import models, transaction
-from django.db.models import Count, JSONField, Q
+from django.db.models import Count, F, JSONField, Q
 from django.db.models.signals import post_save, pre_delete
 from django.dispatch import receiver
+from django.utils.timezone import now
 from django.utils.translation import gettext_lazy as _
-from ml.api_connector import PREDICT_URL, TIMEOUT_PREDICT, MLApi
+from ml.api_connector import PREDICT_URL, TIMEOUT_PREDICT, TIMEOUT_TRAIN, MLApi, get_session_pool
+from ml.interactive import InteractiveRequestSuperseded, get_interactive_gateway, interactive_request_key
 from projects.models import Project
 from tasks.serializers import PredictionSerializer, TaskSimpleSerializer
 from webhooks.serializers import Webhook, WebhookSerializer
@@ -127,6 +134,36 @@ class MLBackend(models.Model):
         default=True,
         help_text='If false, model version is set by the user, if true - getting latest version from backend.',
     )
+    cache_project_context = models.BooleanField(
+        _('cache project context'),
+        default=False,
+        help_text='Send the label config with setup only, predict requests reference it by hash '
+        'and include only task data used by the label config. The ML backend must support this mode.',
+    )
+    state_checked_at = models.DateTimeField(
+        _('state checked at'),
+        null=True,
+        default=None,
+        help_text='Last time the state was checked by requesting the ML backend',
+    )
+    served_model_version = models.TextField(
+        _('served model version'),
+        blank=True,
+        null=True,
+        default='',
+        help_text='Model version reported by the ML backend on the last successful state check',
+    )
+    annotations_since_train = models.IntegerField(
+        _('annotations since train'),
+        default=0,
+        help_text='Number of new annotations since the last scheduled training',
+    )
+    train_scheduled_at = models.DateTimeField(
+        _('train scheduled at'),
+        null=True,
+        default=None,
+        help_text='Last time training was scheduled by new annotations',
+    )
 
     def __str__(self):
         return f'{self.title} (id={self.id}, url={self.url})'
@@ -134,6 +171,12 @@ class MLBackend(models.Model):
     def __init__(self, *args, **kwargs):
         super(MLBackend, self).__init__(*args, **kwargs)
         self.__original_title = self.title
+        self.__original_connection = self._connection_fields()
+
+    def _connection_fields(self):
+        # deferred fields are not loaded here
+        fields = ('url', 'auth_method', 'basic_auth_user', 'basic_auth_pass')
+        return tuple(self.__dict__.get(field) for field in fields)
 
     def save(self, *args, **kwargs):
         """
@@ -154,6 +197,12 @@ class MLBackend(models.Model):
         else:
             super().save(*args, **kwargs)
 
+        connection = self._connection_fields()
+        if connection != self.__original_connection:
+            # pooled keep-alive sessions use the previous url and credentials
+            get_session_pool().invalidate(self.__original_connection[0])
+            self.__original_connection = connection
+
     @staticmethod
     def healthcheck_(url, auth_method=None, **kwargs):
         return MLApi(url=url, auth_method=auth_method, **kwargs).health()
@@ -183,6 +232,7 @@ class MLBackend(models.Model):
             extra_params=self.extra_params,
             basic_auth_user=self.basic_auth_user,
             basic_auth_pass=self.basic_auth_pass,
+            cache_project_context=self.cache_project_context,
         )
 
     @property
@@ -193,12 +243,38 @@ class MLBackend(models.Model):
             auth_method=self.auth_method,
             basic_auth_user=self.basic_auth_user,
             basic_auth_pass=self.basic_auth_pass,
+            cache_project_context=self.cache_project_context,
         )
 
     @property
     def not_ready(self):
         return self.state in (MLBackendState.DISCONNECTED, MLBackendState.ERROR)
 
+    @property
+    def state_is_expired(self):
+        if self.state_checked_at is None:
+            return True
+        return now() - self.state_checked_at > timedelta(seconds=settings.ML_BACKEND_STATE_TTL)
+
+    def refresh_state(self, force=False):
+        """Keep the cached state, but schedule a state check if it's expired.
+
+        Without Redis the expired state is checked right away.
+
+        :param force: check the state right now
+        """
+        if force:
+            self.update_state()
+            return
+        if not self.state_is_expired:
+            return
+        if not redis_connected():
+            self.update_state()
+            return
+        # one background check per TTL, even if many requests see the expired state
+        if cache.add(f'ml_backend_state_check:{self.id}', True, settings.ML_BACKEND_STATE_TTL):
+            start_job_async_or_sync(update_ml_backend_state, self.id)
+
     def update_state(self):
         model_version = None
         if self.healthcheck().is_error:
@@ -212,11 +288,13 @@ class MLBackend(models.Model):
             else:
                 self.state = MLBackendState.CONNECTED
                 model_version = setup_response.response.get('model_version')
+                self.served_model_version = model_version
                 logger.info(f'ML backend responds with success: {setup_response.response}')
                 if self.auto_update:
                     logger.debug(f'Changing model version: {self.model_version} -> {model_version}')
                     self.model_version = model_version
                 self.error_message = None
+        self.state_checked_at = now()
         self.save()
         return model_version
 
@@ -232,6 +310,46 @@ class MLBackend(models.Model):
                 MLBackendTrainJob.objects.create(job_id=current_train_job, ml_backend=self)
         self.save()
 
+    @classmethod
+    def count_new_annotations(cls, project, count=1):
+        """Count new annotations and schedule training of project ML backends
+        which got project.min_annotations_to_start_training annotations since their last training.
+
+        Training is scheduled once per ML_BACKEND_TRAIN_DEBOUNCE seconds, a burst of annotations
+        produces one train request. Annotations counted inside the window are trained at its end.
+        """
+        every = project.min_annotations_to_start_training
+        if not every or count <= 0:
+            return
+        ml_backends = cls.objects.filter(project=project)
+        if not ml_backends.update(annotations_since_train=F('annotations_since_train') + count):
+            return
+
+        for ml_backend_id in ml_backends.filter(annotations_since_train__gte=every).values_list('id', flat=True):
+            cls.schedule_training(ml_backend_id, every)
+
+    @classmethod
+    def schedule_training(cls, ml_backend_id, every):
+        """Schedule training if the ML backend got every new annotations and the debounce window is over,
+        otherwise check it again at the end of the window
+        """
+        debounce = now() - timedelta(seconds=settings.ML_BACKEND_TRAIN_DEBOUNCE)
+        enough = Q(id=ml_backend_id, annotations_since_train__gte=every)
+        ready = enough & (Q(train_scheduled_at__isnull=True) | Q(train_scheduled_at__lte=debounce))
+        # only one of concurrent requests resets the counter and schedules training
+        if cls.objects.filter(ready).update(annotations_since_train=0, train_scheduled_at=now()):
+            start_job_async_or_sync(train_ml_backend, ml_backend_id)
+            return
+
+        # blocked by the debounce window only: without a delayed check no annotation may come after it
+        train_scheduled_at = cls.objects.filter(enough).values_list('train_scheduled_at', flat=True).first()
+        if train_scheduled_at is None or not redis_connected():
+            return
+        delay = math.ceil((train_scheduled_at - debounce).total_seconds())
+        # one delayed check per window, even if many annotations are counted inside it
+        if delay > 0 and cache.add(f'ml_backend_train_delayed:{ml_backend_id}', True, delay):
+            start_job_async_or_sync(schedule_ml_backend_training, ml_backend_id, in_seconds=delay)
+
     def _predict(self, task):
         """This is low level prediction method that is used for debugging"""
         ml_api = self.api
@@ -339,11 +457,22 @@ class MLBackend(models.Model):
                 )
         return predictions
 
+    def _serialize_tasks(self, tasks):
+        if not self.cache_project_context:
+            return TaskSimpleSerializer(tasks, many=True).data
+        # the ML backend gets only task fields required for predictions, without annotations and predictions
+        tasks_ser = list(tasks.values('id', 'data', 'meta', 'project'))
+        for task in tasks_ser:
+            replace_task_data_undefined_with_config_field(task['data'], self.project)
+        return tasks_ser
+
     def predict_tasks(self, tasks):
-        model_version = self.update_state()
+        self.refresh_state()
         if self.not_ready:
             logger.debug(f'ML backend {self} is not ready')
             return
+        # tasks are filtered by the version the ML backend served on the last state check, not the pinned one
+        model_version = self.served_model_version or self.model_version
 
         if isinstance(tasks, list):
             from tasks.models import Task
@@ -357,7 +486,7 @@ class MLBackend(models.Model):
         if not tasks.exists():
             logger.debug(f'All tasks already have prediction from model version={self.model_version}')
             return model_version
-        tasks_ser = TaskSimpleSerializer(tasks, many=True).data
+        tasks_ser = self._serialize_tasks(tasks)
         predictions = self._get_predictions_from_ml_backend(tasks_ser)
         with conditional_atomic(predicate=db_is_not_sqlite):
             prediction_ser = PredictionSerializer(data=predictions, many=True)
@@ -377,11 +506,28 @@ class MLBackend(models.Model):
         tasks_ser = InteractiveAnnotatingDataSerializer(
             [task], many=True, expand=['drafts', 'predictions', 'annotations'], context=options
         ).data
-        ml_api_result = self.api.make_predictions(
-            tasks=tasks_ser,
-            project=self.project,
-            context=context,
-        )
+        key = interactive_request_key(self, tasks_ser, context)
+        if settings.ML_INTERACTIVE_CACHE_TTL:
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+
+        # objects used by the request are loaded here, gateway threads don't touch the database
+        api, project = self.api, self.project
+
+        def predict():
+            return api.make_predictions(tasks=tasks_ser, project=project, context=context)
+
+        gateway = get_interactive_gateway()
+        if gateway is None:
+            ml_api_result = predict()
+        else:
+            try:
+                ml_api_result = gateway.run(key, predict, supersede_key=(user.id, self.id) if user else None)
+            except InteractiveRequestSuperseded:
+                result['errors'] = ['Request is superseded by a newer interactive request']
+                return result
+
         if ml_api_result.is_error:
             logger.info(f'Prediction not created for project {self}: {ml_api_result.error_message}')
             result['errors'] = [ml_api_result.error_message]
@@ -407,6 +553,8 @@ class MLBackend(models.Model):
             ]
             return result
         result['data'] = ml_results[0]
+        if settings.ML_INTERACTIVE_CACHE_TTL:
+            cache.set(key, result, settings.ML_INTERACTIVE_CACHE_TTL)
         return result
 
     @staticmethod
@@ -479,6 +627,53 @@ class MLBackendTrainJob(models.Model):
         return status['job_status'] in ('queued', 'started')
 
 
+def update_ml_backend_state(ml_backend_id):
+    ml_backend = MLBackend.objects.filter(id=ml_backend_id).select_related('project').first()
+    if ml_backend is not None:
+        ml_backend.update_state()
+
+
+def schedule_ml_backend_training(ml_backend_id):
+    ml_backend = MLBackend.objects.filter(id=ml_backend_id).select_related('project').first()
+    if ml_backend is not None and ml_backend.project.min_annotations_to_start_training:
+        MLBackend.schedule_training(ml_backend_id, ml_backend.project.min_annotations_to_start_training)
+
+
+def train_ml_backend(ml_backend_id):
+    """Send a train request unless another one to the same ML backend is in flight"""
+    lock = f'ml_backend_train:{ml_backend_id}'
+    if not cache.add(lock, True, TIMEOUT_TRAIN):
+        logger.info(f'Train request to ML backend {ml_backend_id} is in flight, skip training')
+        return
+    try:
+        ml_backend = MLBackend.objects.filter(id=ml_backend_id).select_related('project').first()
+        if ml_backend is not None:
+            ml_backend.train()
+    finally:
+        cache.delete(lock)
+
+
+def probe_ml_backends(max_age=None):
+    """Check states of ML backends which were checked more than max_age seconds ago
+
+    :param max_age: seconds, ML_BACKEND_STATE_TTL by default
+    :return: Number of checked ML backends
+    """
+    if max_age is None:
+        max_age = settings.ML_BACKEND_STATE_TTL
+    outdated = Q(state_checked_at__isnull=True) | Q(state_checked_at__lt=now() - timedelta(seconds=max_age))
+    ml_backends = MLBackend.objects.filter(outdated).select_related('project')
+    ml_backends = ml_backends.order_by(F('state_checked_at').asc(nulls_first=True), 'id')
+    checked = 0
+    for ml_backend in ml_backends.iterator():
+        try:
+            ml_backend.update_state()
+        except Exception as exc:
+            logger.warning(f'Failed to check the state of {ml_backend}: {exc}', exc_info=True)
+        checked += 1
+    return checked
+
+
 def _validate_ml_api_result(ml_api_result, tasks, curr_logger):
     if ml_api_result.is_error:
         curr_logger.info(ml_api_result.error_message)
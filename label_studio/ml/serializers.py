@@ -14,6 +14,7 @@ class MLBackendSerializer(serializers.ModelSerializer):
     readable_state = serializers.SerializerMethodField()
     basic_auth_pass = serializers.CharField(write_only=True, required=False, allow_null=True, allow_blank=True)
     basic_auth_pass_is_set = serializers.SerializerMethodField()
+    state_checked_at = serializers.DateTimeField(read_only=True)
 
     def get_basic_auth_pass_is_set(self, obj):
         return bool(obj.basic_auth_pass)
@@ -106,7 +107,9 @@ class MLBackendSerializer(serializers.ModelSerializer):
             'timeout',
             'created_at',
             'updated_at',
+            'state_checked_at',
             'auto_update',
+            'cache_project_context',
             'project',
         ]
 
@@ -9,7 +9,7 @@ from django.utils.translation import gettext_lazy as _
 from ml_model_providers.models import ModelProviderConnection, ModelProviders
 from projects.models import Project
 from rest_framework.exceptions import ValidationError
-from tasks.models import Annotation, FailedPrediction, Prediction, PredictionMeta
+from tasks.models import Annotation, FailedPrediction, Prediction, PredictionMeta, PredictionModelVersion
 
 logger = logging.getLogger(__name__)
 
@@ -222,6 +222,7 @@ class ModelRun(models.Model):
         PredictionMeta.objects.filter(failed_prediction__in=failed_predictions_ids).delete()
 
         # remove predictions from db
+        PredictionModelVersion.remove_predictions(predictions)
         predictions._raw_delete(predictions.db)
         failed_predictions._raw_delete(failed_predictions.db)
 
@@ -24,12 +24,15 @@ def add_stream_history(next_task, user, project):
 
 
 def fill_history_annotation(user, task, annotation):
-    history = user.histories.filter(project=task.project).first()
+    history = user.histories.filter(project_id=task.project_id).first()
     if history and history.data:
+        updated = False
         for item in history.data:
             if item[TASK_ID_KEY] == task.id:
                 item[ANNOTATION_ID_KEY] = annotation.id
-        history.save()
+                updated = True
+        if updated:
+            history.save(update_fields=['data'])
 
 
 def get_label_stream_history(user, project):
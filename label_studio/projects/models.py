@@ -1,21 +1,16 @@
 """This file and its contents are licensed under the Apache License 2.0. Please see the included NOTICE for copyright information and LICENSE for a copy of the license.
 """
+import copy
 import json
 import logging
 from typing import Any, Mapping, Optional
 
 from annoying.fields import AutoOneToOneField
 from core.label_config import (
-    check_control_in_config_by_regex,
-    check_toname_in_config_by_regex,
     config_line_stipped,
-    extract_data_types,
-    get_all_control_tag_tuples,
-    get_all_labels,
-    get_all_object_tag_names,
-    get_all_types,
     get_annotation_tuple,
-    get_original_fromname_by_regex,
+    get_parsed_label_config,
+    get_region_labels,
     get_sample_task,
     validate_label_config,
 )
@@ -30,11 +25,26 @@ from django.conf import settings
 from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MaxLengthValidator, MinLengthValidator
 from django.db import connection, models, transaction
-from django.db.models import Avg, BooleanField, Case, Count, GeneratedField, JSONField, Max, Q, Sum, Value, When
+from django.db.models import (
+    Avg,
+    BooleanField,
+    Case,
+    Count,
+    F,
+    GeneratedField,
+    JSONField,
+    Max,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
 from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
 from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
-from label_studio_sdk._extensions.label_studio_tools.core.label_config import parse_config
 from labels_manager.models import Label
 from projects.functions import (
     annotate_finished_task_number,
@@ -49,10 +59,13 @@ from projects.functions import (
 from projects.functions.utils import make_queryset_from_iterable
 from projects.signals import ProjectSignals
 from rest_framework.exceptions import ValidationError
+from rq import get_current_job
 from tasks.models import (
     Annotation,
     AnnotationDraft,
     Prediction,
+    PredictionModelVersion,
+    Q_finished_annotations,
     Q_task_finished_annotations,
     Task,
     bulk_update_stats_project_tasks,
@@ -326,9 +339,9 @@ class Project(ProjectMixin, models.Model):
         # TODO: once bugfix with incorrect data types in List
         # logging.warning('! Please, remove code below after patching of all projects (extract_data_types)')
         if self.label_config is not None:
-            data_types = extract_data_types(self.label_config)
+            data_types = get_parsed_label_config(self.label_config).data_types
             if self.data_types != data_types:
-                self.data_types = data_types
+                self.data_types = dict(data_types)
 
     @property
     def num_tasks(self):
@@ -456,25 +469,20 @@ class Project(ProjectMixin, models.Model):
         if maximum_annotations_changed and not overlap_cohort_percentage_changed:
             # if there are tasks with overlap > 1 and maximum annotations has not been set to 1, preserve the cohort.
             # but if maximum_annotations is set to 1, then all tasks should be affected (since there is no longer a distinct cohort)
-            tasks_with_overlap = self.tasks.filter(overlap__gt=1) if self.maximum_annotations > 1 else self.tasks.all()
-            if tasks_with_overlap.exists():
+            if self.maximum_annotations > 1 and self.tasks.filter(overlap__gt=1).exists():
                 # if there is a part with overlapped tasks, affect only them
-                tasks_with_overlap.update(overlap=self.maximum_annotations)
-            elif self.overlap_cohort_percentage < 100:
+                self._update_tasks_overlap(cohort_q=Q(overlap__gt=1))
+            elif self.maximum_annotations > 1 and self.overlap_cohort_percentage < 100:
                 self._rearrange_overlap_cohort()
             else:
                 # otherwise affect all tasks
-                self.tasks.update(overlap=self.maximum_annotations)
-                tasks_with_overlap = self.tasks.all()
-            # update is_labeled after change
-            bulk_update_stats_project_tasks(tasks_with_overlap, project=self)
+                self._update_tasks_overlap()
 
         # if cohort slider is tweaked
         elif overlap_cohort_percentage_changed:
             if self.maximum_annotations == 1:
                 if maximum_annotations_changed:
-                    self.tasks.update(overlap=1)
-                    bulk_update_stats_project_tasks(self.tasks.all(), project=self)
+                    self._update_tasks_overlap()
                 else:
                     logger.info(
                         f'Project {str(self)}: cohort percentage was changed but maximum annotations was not and is 1; taking no action'
@@ -489,50 +497,114 @@ class Project(ProjectMixin, models.Model):
     def _batch_update_with_retry(self, queryset, batch_size=500, max_retries=3, **update_fields):
         batch_update_with_retry(queryset, batch_size, max_retries, **update_fields)
 
+    def _iter_task_id_ranges(self, batch_size):
+        """Walk project tasks by primary key, yielding (first_id, last_id, count) for each chunk"""
+        last_id = 0
+        while True:
+            ids = list(
+                Task.objects.filter(project=self, id__gt=last_id)
+                .order_by('id')
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                return
+            yield ids[0], ids[-1], len(ids)
+            last_id = ids[-1]
+
+    def _report_tasks_states_progress(self, processed, total, updated):
+        logger.info(f'Project {self.id}: tasks states processed {processed}/{total}, updated {updated}')
+        job = get_current_job()
+        if job is not None:
+            job.meta['progress'] = {'processed': processed, 'total': total, 'updated': updated}
+            job.save_meta()
+
+    def _update_tasks_overlap(self, cohort_q=None, tasks=None):
+        """
+        Set overlap=maximum_annotations for tasks matching cohort_q and overlap=1 for the rest,
+        or overlap=maximum_annotations for all tasks if cohort_q is None.
+
+        Tasks are processed in id-ordered chunks of settings.BATCH_SIZE; only tasks whose overlap
+        actually changes are written and get is_labeled recalculated.
+        :param cohort_q: Q filter describing the overlapped cohort
+        :param tasks: Project tasks queryset with annotations used by cohort_q
+        :return: Number of tasks with changed overlap
+        """
+        max_annotations = self.maximum_annotations
+        tasks = Task.objects.filter(project=self) if tasks is None else tasks
+        total = self.tasks.count()
+        processed = updated = 0
+
+        for first_id, last_id, count in self._iter_task_id_ranges(settings.BATCH_SIZE):
+            chunk = tasks.filter(id__gte=first_id, id__lte=last_id)
+            if cohort_q is None:
+                to_max_ids, to_one_ids = list(chunk.exclude(overlap=max_annotations).values_list('id', flat=True)), []
+            else:
+                to_max_ids = list(chunk.filter(cohort_q).exclude(overlap=max_annotations).values_list('id', flat=True))
+                to_one_ids = list(chunk.exclude(cohort_q).exclude(overlap=1).values_list('id', flat=True))
+
+            if to_max_ids:
+                self._batch_update_with_retry(Task.objects.filter(id__in=to_max_ids), overlap=max_annotations)
+            if to_one_ids:
+                self._batch_update_with_retry(Task.objects.filter(id__in=to_one_ids), overlap=1)
+            if to_max_ids or to_one_ids:
+                # update is_labeled after overlap change
+                bulk_update_stats_project_tasks(Task.objects.filter(id__in=to_max_ids + to_one_ids), project=self)
+
+            processed += count
+            updated += len(to_max_ids) + len(to_one_ids)
+            self._report_tasks_states_progress(processed, total, updated)
+
+        return updated
+
     def _rearrange_overlap_cohort(self):
         """
         Rearrange overlap depending on annotation count in tasks
+        :return: Number of tasks with changed overlap
         """
-        all_project_tasks = Task.objects.filter(project=self)
         max_annotations = self.maximum_annotations
         must_tasks = int(self.tasks.count() * self.overlap_cohort_percentage / 100 + 0.5)
         logger.info(
             f'Starting _rearrange_overlap_cohort with params: Project {str(self)} maximum_annotations '
             f'{max_annotations} and percentage {self.overlap_cohort_percentage}'
         )
-        tasks_with_max_annotations = all_project_tasks.annotate(
-            anno=Count('annotations', filter=Q_task_finished_annotations & Q(annotations__ground_truth=False))
-        ).filter(anno__gte=max_annotations)
+        finished_annotations = (
+            Annotation.objects.filter(Q_finished_annotations, task=OuterRef('pk'), ground_truth=False)
+            .values('task')
+            .annotate(count=Count('id'))
+            .values('count')
+        )
+        tasks = Task.objects.filter(project=self).annotate(
+            finished_anno=Coalesce(Subquery(finished_annotations, output_field=models.IntegerField()), 0),
+            anno=F('total_annotations') + F('cancelled_annotations'),
+        )
+        with_max_annotations_q = Q(finished_anno__gte=max_annotations)
 
-        tasks_with_min_annotations = all_project_tasks.exclude(id__in=tasks_with_max_annotations)
         # check how many tasks left to finish
-        left_must_tasks = max(must_tasks - tasks_with_max_annotations.count(), 0)
+        left_must_tasks = max(must_tasks - tasks.filter(with_max_annotations_q).count(), 0)
         logger.info(f'Required tasks {must_tasks} and left required tasks {left_must_tasks}')
+
+        cohort_q = with_max_annotations_q
         if left_must_tasks > 0:
-            # if there are unfinished tasks update tasks with count(annotations) >= overlap
-            ids = list(tasks_with_max_annotations.values_list('id', flat=True))
-            self._batch_update_with_retry(
-                all_project_tasks.filter(id__in=ids), overlap=max_annotations, is_labeled=True
-            )
-            # order other tasks by count(annotations)
-            tasks_with_min_annotations = (
-                tasks_with_min_annotations.annotate(anno=Count('annotations')).order_by('-anno').distinct()
-            )
-            # assign overlap depending on annotation count
-            # assign max_annotations and update is_labeled
-            ids = list(tasks_with_min_annotations[:left_must_tasks].values_list('id', flat=True))
-            self._batch_update_with_retry(all_project_tasks.filter(id__in=ids), overlap=max_annotations)
-            # assign 1 to left
-            ids = list(tasks_with_min_annotations[left_must_tasks:].values_list('id', flat=True))
-            min_tasks_to_update = all_project_tasks.filter(id__in=ids)
-            self._batch_update_with_retry(min_tasks_to_update, overlap=1)
-        else:
-            ids = list(tasks_with_max_annotations.values_list('id', flat=True))
-            self._batch_update_with_retry(all_project_tasks.filter(id__in=ids), overlap=max_annotations)
-            ids = list(tasks_with_min_annotations.values_list('id', flat=True))
-            self._batch_update_with_retry(all_project_tasks.filter(id__in=ids), overlap=1)
-        # update is labeled after tasks rearrange overlap
-        bulk_update_stats_project_tasks(all_project_tasks, project=self)
+            # add tasks with the most annotations among unfinished ones
+            cohort_q |= self._overlap_cohort_top_tasks_q(tasks.exclude(with_max_annotations_q), left_must_tasks)
+        return self._update_tasks_overlap(cohort_q=cohort_q, tasks=tasks)
+
+    @staticmethod
+    def _overlap_cohort_top_tasks_q(tasks, number):
+        """
+        Build a Q filter selecting `number` tasks with the highest annotation count (`anno` annotation),
+        ties are broken by task id. Uses a histogram of annotation counts instead of ordering all tasks.
+        """
+        histogram = tasks.values('anno').annotate(tasks_count=Count('id')).order_by('-anno')
+        selected = 0
+        for row in histogram:
+            if selected + row['tasks_count'] >= number:
+                remainder = number - selected
+                id_cut = tasks.filter(anno=row['anno']).order_by('id').values_list('id', flat=True)[remainder - 1]
+                return Q(anno__gt=row['anno']) | Q(anno=row['anno'], id__lte=id_cut)
+            selected += row['tasks_count']
+        # less tasks than required: all of them belong to the cohort
+        return Q(id__isnull=False)
 
     def remove_tasks_by_file_uploads(self, file_upload_ids):
         self.tasks.filter(file_upload_id__in=file_upload_ids).delete()
@@ -576,41 +648,39 @@ class Project(ProjectMixin, models.Model):
         if not hasattr(self, 'summary'):
             return
 
-        with transaction.atomic():
-            # Lock summary for update to avoid race conditions
-            summary = ProjectSummary.objects.select_for_update().get(project=self)
-
-            if self.num_tasks == 0:
-                logger.debug(f'Project {self} has no tasks: nothing to validate here. Ensure project summary is empty')
-                summary.reset()
-                return
+        if not self.tasks.exists():
+            logger.debug(f'Project {self} has no tasks: nothing to validate here. Ensure project summary is empty')
+            self._reset_summary_if_empty(tasks_data_based=True)
+            return
 
-            # validate data columns consistency
-            fields_from_config = get_all_object_tag_names(config_string)
-            if not fields_from_config:
-                logger.debug('Data fields not found in labeling config')
-                return
+        config = get_parsed_label_config(config_string)
 
-            # TODO: DEV-2939 Add validation for fields addition in label config
-            """fields_from_config = {field.split('[')[0] for field in fields_from_config}  # Repeater tag support
-            fields_from_data = set(self.summary.common_data_columns)
-            fields_from_data.discard(settings.DATA_UNDEFINED_NAME)
-            if fields_from_data and not fields_from_config.issubset(fields_from_data):
-                different_fields = list(fields_from_config.difference(fields_from_data))
-                raise ValidationError(
-                    f'These fields are not present in the data: {",".join(different_fields)}'
-                )"""
+        # validate data columns consistency
+        fields_from_config = config.object_tag_names
+        if not fields_from_config:
+            logger.debug('Data fields not found in labeling config')
+            return
 
-            if self.num_annotations == 0 and self.num_drafts == 0:
-                logger.debug(
-                    f'Project {self} has no annotations and drafts: nothing to validate here. '
-                    f'Ensure annotations-related project summary is empty'
-                )
-                summary.reset(tasks_data_based=False)
-                return
+        # TODO: DEV-2939 Add validation for fields addition in label config
+        """fields_from_config = {field.split('[')[0] for field in fields_from_config}  # Repeater tag support
+        fields_from_data = set(self.summary.common_data_columns)
+        fields_from_data.discard(settings.DATA_UNDEFINED_NAME)
+        if fields_from_data and not fields_from_config.issubset(fields_from_data):
+            different_fields = list(fields_from_config.difference(fields_from_data))
+            raise ValidationError(
+                f'These fields are not present in the data: {",".join(different_fields)}'
+            )"""
+
+        if not self._has_annotations_or_drafts():
+            logger.debug(
+                f'Project {self} has no annotations and drafts: nothing to validate here. '
+                f'Ensure annotations-related project summary is empty'
+            )
+            self._reset_summary_if_empty(tasks_data_based=False)
+            return
 
         # validate annotations consistency
-        annotations_from_config = set(get_all_control_tag_tuples(config_string))
+        annotations_from_config = set(config.control_tag_tuples)
         if not annotations_from_config:
             logger.debug('Annotation schema is not found in config')
             return
@@ -625,11 +695,7 @@ class Project(ProjectMixin, models.Model):
                     continue
                 if t.lower() == 'textarea':  # avoid textarea to_name check (see DEV-1598)
                     continue
-                if (
-                    not check_control_in_config_by_regex(config_string, from_name)
-                    or not check_toname_in_config_by_regex(config_string, to_name)
-                    or t not in get_all_types(config_string)
-                ):
+                if not config.has_control(from_name) or not config.has_to_name(to_name) or t not in config.types:
                     diff_str.append(
                         f'{self.summary.created_annotations[ann_tuple]} '
                         f'with from_name={from_name}, to_name={to_name}, type={t}'
@@ -641,7 +707,7 @@ class Project(ProjectMixin, models.Model):
                 )
 
         # validate labels consistency
-        labels_from_config, dynamic_label_from_config = get_all_labels(config_string)
+        labels_from_config, dynamic_label_from_config = config.labels
         created_labels = merge_labels_counters(self.summary.created_labels, self.summary.created_labels_drafts)
 
         def display_count(count: int, type: str) -> Optional[str]:
@@ -660,17 +726,16 @@ class Project(ProjectMixin, models.Model):
                     (control_tag_from_data not in labels_from_config)
                     and (control_tag_from_data not in dynamic_label_from_config)
                 )
-                and not check_control_in_config_by_regex(config_string, control_tag_from_data)
+                and not config.has_control(control_tag_from_data)
             ):
                 raise ValidationError(
                     f'There are {sum(labels_from_data.values(), 0)} annotation(s) created with tag '
                     f'"{control_tag_from_data}", you can\'t remove it'
                 )
             labels_from_config_by_tag = set(
-                labels_from_config[get_original_fromname_by_regex(config_string, control_tag_from_data)]
+                labels_from_config.get(config.original_from_name(control_tag_from_data), [])
             )
-            parsed_config = parse_config(config_string)
-            tag_types = [tag_info['type'] for _, tag_info in parsed_config.items()]
+            tag_types = config.tag_types
             # DEV-1990 Workaround for Video labels as there are no labels in VideoRectangle tag
             if 'VideoRectangle' in tag_types:
                 for key in labels_from_config:
@@ -695,11 +760,7 @@ class Project(ProjectMixin, models.Model):
 
                 if (strict is True) and (
                     (control_tag_from_data not in dynamic_label_from_config)
-                    and (
-                        not check_control_in_config_by_regex(
-                            config_string, control_tag_from_data, filter=dynamic_label_from_config.keys()
-                        )
-                    )
+                    and (not config.has_control(control_tag_from_data, filter=dynamic_label_from_config.keys()))
                 ):
                     # raise error if labels not dynamic and not in regex rules
                     raise ValidationError(
@@ -709,6 +770,24 @@ class Project(ProjectMixin, models.Model):
                 else:
                     logger.info(f'project_id={self.id} inconsistent labels in config and annotations: {diff_str}')
 
+    def _has_annotations_or_drafts(self):
+        return (
+            Annotation.objects.filter(project=self).exists()
+            or AnnotationDraft.objects.filter(task__project=self).exists()
+        )
+
+    def _reset_summary_if_empty(self, tasks_data_based):
+        """Reset summary under the summary lock; emptiness is re-checked there because
+        imports and annotation saves update the summary under the same lock"""
+        with transaction.atomic():
+            summary = ProjectSummary.objects.select_for_update().get(project=self)
+            if tasks_data_based:
+                if self.tasks.exists():
+                    return
+            elif self._has_annotations_or_drafts():
+                return
+            summary.reset(tasks_data_based=tasks_data_based)
+
     def _label_config_has_changed(self):
         return self.label_config != self.__original_label_config
 
@@ -747,7 +826,7 @@ class Project(ProjectMixin, models.Model):
                 self.model_version = None
                 self.save(update_fields=['model_version'])
 
-            _, deleted_map = predictions.delete()
+            _, deleted_map = PredictionModelVersion.delete_predictions(predictions)
 
         count = deleted_map.get('tasks.Prediction', 0)
         return {'deleted_predictions': count}
@@ -791,8 +870,9 @@ class Project(ProjectMixin, models.Model):
         )
 
         if label_config_has_changed or project_with_config_just_created:
-            self.data_types = extract_data_types(self.label_config)
-            self.parsed_label_config = parse_config(self.label_config)
+            config = get_parsed_label_config(self.label_config)
+            self.data_types = dict(config.data_types)
+            self.parsed_label_config = copy.deepcopy(config.parsed)
             self.label_config_hash = hash(str(self.parsed_label_config))
             if update_fields is not None:
                 update_fields = {'data_types', 'parsed_label_config', 'label_config_hash'}.union(update_fields)
@@ -964,7 +1044,7 @@ class Project(ProjectMixin, models.Model):
     def get_parsed_config(self):
         if self.parsed_label_config is None:
             try:
-                self.parsed_label_config = parse_config(self.label_config)
+                self.parsed_label_config = copy.deepcopy(get_parsed_label_config(self.label_config).parsed)
                 self.save(update_fields=['parsed_label_config'])
             except Exception as e:
                 logger.error(f'Error parsing label config for project {self.id}: {e}', exc_info=True)
@@ -983,18 +1063,23 @@ class Project(ProjectMixin, models.Model):
 
     def get_model_versions(self, with_counters=False, extended=False, limit=None):
         """
-        Get model_versions from project predictions.
+        Get model_versions from project prediction counters (PredictionModelVersion).
         :param with_counters: Boolean, if True, counts predictions for each version. Default is False.
         :param extended: Boolean, if True, returns additional information. Default is False.
         :return: Dict or list containing model versions and their count predictions.
         """
-        predictions = Prediction.objects.filter(project=self)
-
-        model_versions = (
-            predictions.values('model_version')
-            .annotate(count=Count('model_version'), latest=Max('created_at'))
-            .order_by('-latest')
-        )
+        if PredictionModelVersion.counters_are_ready():
+            model_versions = PredictionModelVersion.objects.filter(project=self, count__gt=0).values(
+                'model_version', 'count', 'latest'
+            )
+        else:
+            # counters are still being filled by the migration job
+            model_versions = (
+                Prediction.objects.filter(project=self)
+                .values('model_version')
+                .annotate(count=Count('model_version'), latest=Max('created_at'))
+            )
+        model_versions = model_versions.order_by('-latest')
 
         if extended:
             return list(model_versions)
@@ -1416,23 +1501,7 @@ class ProjectSummary(models.Model):
         return key
 
     def _get_labels(self, result):
-        result_type = result.get('type')
-        # DEV-1990 Workaround for Video labels as there are no labels in VideoRectangle tag
-        if result_type in ['videorectangle']:
-            result_type = 'labels'
-        result_value = result['value'].get(result_type)
-        if not result_value or not isinstance(result_value, list) or result_type == 'text':
-            # Non-list values are not labels. TextArea list values (texts) are not labels too.
-            return []
-        # Labels are stored in list
-        labels = []
-        for label in result_value:
-            if result_type == 'taxonomy' and isinstance(label, list):
-                for label_ in label:
-                    labels.append(str(label_))
-            else:
-                labels.append(str(label))
-        return labels
+        return get_region_labels(result)
 
     def update_created_annotations_and_labels(self, annotations):
         created_annotations = dict(self.created_annotations)
@@ -1,10 +1,16 @@
+from io import StringIO
+
+from core.models import AsyncMigrationStatus
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.http import urlencode
 from projects.tests.factories import ProjectFactory
 from rest_framework.test import APIClient, APITestCase
-from tasks.models import Task
+from tasks.models import Prediction, PredictionModelVersion, Task
 from tasks.tests.factories import PredictionFactory, TaskFactory
 
 
@@ -90,3 +96,79 @@ class TestProjectModelVersionsAPI(APITestCase):
         assert response.json()['static'][1]['count'] == 1
         assert response.json()['static'][2]['model_version'] == 'model_1'
         assert response.json()['static'][2]['count'] == 2
+
+
+class TestPredictionModelVersionCounters(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = ProjectFactory()
+        cls.task = TaskFactory(project=cls.project)
+
+    def get_counters(self):
+        counters = PredictionModelVersion.objects.filter(project=self.project, count__gt=0)
+        return list(counters.values_list('model_version', 'count', 'latest').order_by('model_version'))
+
+    def test_counters_follow_prediction_changes(self):
+        PredictionFactory(task=self.task, model_version='model_1')
+        Prediction.objects.bulk_create(
+            [Prediction(task=self.task, project=self.project, model_version=f'model_{i % 2 + 1}') for i in range(5)]
+        )
+        assert self.project.get_model_versions(with_counters=True) == {'model_2': 2, 'model_1': 4}
+
+        prediction = Prediction.objects.filter(model_version='model_1').first()
+        prediction.model_version = 'model_3'
+        prediction.save()
+        Prediction.objects.filter(model_version='model_2').delete()
+        assert self.project.get_model_versions(with_counters=True) == {'model_3': 1, 'model_1': 3}
+
+        # incremental counters match the recount
+        counters = self.get_counters()
+        call_command('rebuild_prediction_model_versions', project=self.project.id, stdout=StringIO())
+        assert self.get_counters() == counters
+
+    def test_get_model_versions_does_not_scan_predictions(self):
+        PredictionFactory(task=self.task, model_version='model_1')
+        with CaptureQueriesContext(connection) as queries:
+            self.project.get_model_versions(with_counters=True, extended=True)
+        assert 'prediction"' not in ' '.join(query['sql'] for query in queries.captured_queries)
+
+    def test_get_model_versions_aggregates_predictions_until_counters_are_filled(self):
+        PredictionFactory(task=self.task, model_version='model_1')
+        PredictionModelVersion.objects.all().delete()
+        AsyncMigrationStatus.objects.update_or_create(
+            name=PredictionModelVersion.FILL_MIGRATION, defaults={'status': AsyncMigrationStatus.STATUS_STARTED}
+        )
+
+        assert self.project.get_model_versions(with_counters=True) == {'model_1': 1}
+
+    def test_rebuild_command(self):
+        PredictionFactory(task=self.task, model_version='model_1')
+        PredictionModelVersion.objects.all().delete()
+        assert self.project.get_model_versions() == []
+
+        call_command('rebuild_prediction_model_versions', stdout=StringIO())
+        assert self.project.get_model_versions(with_counters=True) == {'model_1': 1}
+
+    def test_bulk_deletes_update_counters_once(self):
+        tasks = [TaskFactory(project=self.project) for _ in range(3)]
+        Prediction.objects.bulk_create(
+            [
+                Prediction(task=task, project=self.project, model_version=f'model_{i % 2 + 1}')
+                for task in tasks
+                for i in range(4)
+            ]
+        )
+        assert self.project.get_model_versions(with_counters=True) == {'model_2': 6, 'model_1': 6}
+
+        with CaptureQueriesContext(connection) as queries:
+            Task.delete_tasks_without_signals(Task.objects.filter(id=tasks[0].id))
+        counter_updates = [q for q in queries.captured_queries if q['sql'].startswith('UPDATE "tasks_predictionmodel')]
+        assert len(counter_updates) == 2
+        assert self.project.get_model_versions(with_counters=True) == {'model_2': 4, 'model_1': 4}
+
+        self.project.delete_predictions(model_version='model_1')
+        assert self.project.get_model_versions(with_counters=True) == {'model_2': 4}
+
+        # the per-prediction receiver is connected again
+        Prediction.objects.filter(task=tasks[1]).first().delete()
+        assert self.project.get_model_versions(with_counters=True) == {'model_2': 3}
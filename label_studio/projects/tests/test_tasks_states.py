@@ -0,0 +1,81 @@
+from unittest import mock
+
+import pytest
+from projects.tests.factories import ProjectFactory
+from tasks.models import Task
+from tasks.tests.factories import AnnotationFactory, TaskFactory
+
+pytestmark = pytest.mark.django_db
+
+RESULT = [{'from_name': 'label', 'to_name': 'text', 'type': 'choices', 'value': {'choices': ['pos']}}]
+
+
+@pytest.fixture
+def project():
+    project = ProjectFactory(maximum_annotations=2, overlap_cohort_percentage=30)
+    tasks = TaskFactory.create_batch(10, project=project)
+    # two tasks finished with maximum annotations, one task with a single annotation
+    for task in tasks[:2]:
+        AnnotationFactory.create_batch(2, task=task, result=RESULT)
+    AnnotationFactory(task=tasks[5], result=RESULT)
+    Task.objects.filter(project=project).update(overlap=1, is_labeled=False)
+    return project
+
+
+def test_rearrange_overlap_cohort(project):
+    """Rearrange puts finished tasks and the most annotated tasks into the cohort.
+
+    Purpose: Verify cohort assignment and is_labeled recalculation without a full project recount.
+    Setup: 10 tasks, 30% cohort with maximum_annotations=2; 2 finished tasks and 1 task with 1 annotation.
+    Actions: Run _rearrange_overlap_cohort.
+    Validations: 3 tasks have overlap 2, finished tasks are labeled, others keep overlap 1.
+    """
+    tasks = list(Task.objects.filter(project=project).order_by('id'))
+
+    project._rearrange_overlap_cohort()
+
+    overlapped = set(Task.objects.filter(project=project, overlap=2).values_list('id', flat=True))
+    assert overlapped == {tasks[0].id, tasks[1].id, tasks[5].id}
+    assert set(Task.objects.filter(project=project, is_labeled=True).values_list('id', flat=True)) == {
+        tasks[0].id,
+        tasks[1].id,
+    }
+
+
+def test_rearrange_overlap_cohort_updates_only_changed_tasks(project):
+    """A repeated rearrange with unchanged settings writes nothing.
+
+    Purpose: Ensure is_labeled recalculation is limited to tasks whose overlap changes.
+    Setup: Project after the first rearrange.
+    Actions: Run _rearrange_overlap_cohort again with bulk_update_stats_project_tasks mocked.
+    Validations: No tasks are reported as updated and is_labeled is not recalculated.
+    """
+    project._rearrange_overlap_cohort()
+
+    with mock.patch('projects.models.bulk_update_stats_project_tasks') as bulk_update:
+        updated = project._rearrange_overlap_cohort()
+
+    assert updated == 0
+    bulk_update.assert_not_called()
+
+
+def test_maximum_annotations_change_preserves_cohort(project):
+    """Changing maximum_annotations affects only the existing cohort.
+
+    Purpose: Verify the maximum_annotations branch of _update_tasks_states.
+    Setup: Project after rearrange (3 tasks in cohort).
+    Actions: Set maximum_annotations=3 and update tasks states.
+    Validations: Cohort tasks get overlap 3, finished tasks are no longer labeled, other tasks untouched.
+    """
+    project._rearrange_overlap_cohort()
+    cohort_ids = set(Task.objects.filter(project=project, overlap=2).values_list('id', flat=True))
+
+    project.maximum_annotations = 3
+    project.save(update_fields=['maximum_annotations'])
+    project._update_tasks_states(
+        maximum_annotations_changed=True, overlap_cohort_percentage_changed=False, tasks_number_changed=False
+    )
+
+    assert set(Task.objects.filter(project=project, overlap=3).values_list('id', flat=True)) == cohort_ids
+    assert Task.objects.filter(project=project, overlap=1).count() == 7
+    assert not Task.objects.filter(project=project, is_labeled=True).exists()
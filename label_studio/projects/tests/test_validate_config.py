@@ -0,0 +1,65 @@
+from unittest import mock
+
+import pytest
+from core import label_config
+from projects.tests.factories import ProjectFactory
+from rest_framework.exceptions import ValidationError
+from tasks.tests.factories import AnnotationFactory, TaskFactory
+
+pytestmark = pytest.mark.django_db
+
+LABEL_CONFIG = """
+<View>
+  <Text name="text" value="$text"/>
+  <Choices name="sentiment" toName="text">
+    <Choice value="Positive"/>
+    <Choice value="Negative"/>
+  </Choices>
+</View>
+"""
+
+RESULT = [{'from_name': 'sentiment', 'to_name': 'text', 'type': 'choices', 'value': {'choices': ['Negative']}}]
+
+
+@pytest.fixture
+def project():
+    project = ProjectFactory(label_config=LABEL_CONFIG)
+    AnnotationFactory(task=TaskFactory(project=project, data={'text': 'bad'}), result=RESULT)
+    project.refresh_from_db()
+    return project
+
+
+def test_validate_config_parses_config_once(project):
+    """Validation of a changed config parses the config string only once.
+
+    Purpose: validate_config must not re-parse the config for every annotation tuple and label.
+    Setup: Project with an annotation using the "Negative" choice.
+    Actions: Validate a config that keeps the annotated choice.
+    Validations: No error; the sdk parser is called once.
+    """
+    config = LABEL_CONFIG.replace('<Choice value="Positive"/>', '<Choice value="Neutral"/>')
+    label_config.get_parsed_label_config.cache_clear()
+    with mock.patch.object(
+        label_config.label_config, 'parse_config', wraps=label_config.label_config.parse_config
+    ) as parse:
+        project.validate_config(config, strict=True)
+
+    assert parse.call_count == 1
+
+
+def test_validate_config_rejects_removed_label(project):
+    config = LABEL_CONFIG.replace('<Choice value="Negative"/>', '')
+
+    with pytest.raises(ValidationError, match='Negative'):
+        project.validate_config(config, strict=True)
+
+
+def test_validate_config_resets_summary_without_tasks():
+    project = ProjectFactory(label_config=LABEL_CONFIG)
+    project.summary.created_annotations = {'stale|text|Choices': 1}
+    project.summary.save()
+
+    project.validate_config(LABEL_CONFIG)
+
+    project.summary.refresh_from_db()
+    assert project.summary.created_annotations == {}
@@ -13,7 +13,6 @@ from data_manager.models import PrepareParams
 from data_manager.serializers import DataManagerTaskSerializer
 from django.db import transaction
 from django.db.models import Q
-from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.types import OpenApiTypes
@@ -24,7 +23,7 @@ from rest_framework import generics, viewsets
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 from rest_framework.response import Response
-from tasks.models import Annotation, AnnotationDraft, Prediction, Task
+from tasks.models import Annotation, AnnotationDraft, Prediction, Task, TaskLock
 from tasks.openapi_schema import (
     annotation_request_schema,
     annotation_response_example,
@@ -35,6 +34,7 @@ from tasks.openapi_schema import (
     task_response_example,
 )
 from tasks.serializers import (
+    AnnotationBulkCreateSerializer,
     AnnotationDraftSerializer,
     AnnotationSerializer,
     PredictionSerializer,
@@ -43,6 +43,7 @@ from tasks.serializers import (
 )
 from webhooks.models import WebhookAction
 from webhooks.utils import (
+    WebhookEventBuffer,
     api_webhook,
     api_webhook_for_delete,
     emit_webhooks_for_instance,
@@ -567,7 +568,7 @@ class AnnotationsListAPI(GetParentObjectMixin, generics.ListCreateAPIView):
         GET=all_permissions.annotations_view,
         POST=all_permissions.annotations_create,
     )
-    parent_queryset = Task.objects.all()
+    parent_queryset = Task.objects.select_related('project')
 
     serializer_class = AnnotationSerializer
 
@@ -582,9 +583,8 @@ class AnnotationsListAPI(GetParentObjectMixin, generics.ListCreateAPIView):
         task = generics.get_object_or_404(Task.objects.for_user(self.request.user), pk=self.kwargs.get('pk', 0))
         return Annotation.objects.filter(Q(task=task) & Q(was_cancelled=False)).order_by('pk')
 
-    def delete_draft(self, draft_id, annotation_id):
+    def delete_draft(self, draft, annotation_id):
         try:
-            draft = AnnotationDraft.objects.get(id=draft_id)
             # We call delete on the individual draft object because
             # AnnotationDraft#delete has special behavior (updating created_labels_drafts).
             # This special behavior won't be triggered if we call delete on the queryset.
@@ -594,20 +594,26 @@ class AnnotationsListAPI(GetParentObjectMixin, generics.ListCreateAPIView):
             pass
 
     def perform_create(self, ser):
+        """Annotation submit is the most frequent write, keep its number of queries fixed.
+
+        Besides saving the annotation it makes at most one query for each step: prediction, draft,
+        user activity, task locks release, draft deletion, ground truth and label stream history.
+        The total is checked by test_create_annotation_query_budget.
+        """
         task = self.parent_object
         # annotator has write access only to annotations and it can't be checked it after serializer.save()
         user = self.request.user
 
         # updates history
         result = ser.validated_data.get('result')
-        extra_args = {'task_id': self.kwargs['pk'], 'project_id': task.project_id}
+        # annotation gets the loaded task and project, so signals don't fetch them again
+        extra_args = {'task': task, 'project': task.project}
 
         # save stats about how well annotator annotations coincide with current prediction
         # only for finished task annotations
         if result is not None:
-            prediction = Prediction.objects.filter(task=task, model_version=task.project.model_version)
-            if prediction.exists():
-                prediction = prediction.first()
+            prediction = Prediction.objects.filter(task=task, model_version=task.project.model_version).first()
+            if prediction is not None:
                 prediction_ser = PredictionSerializer(prediction).data
             else:
                 logger.debug(f'User={self.request.user}: there are no predictions for task={task}')
@@ -622,8 +628,11 @@ class AnnotationsListAPI(GetParentObjectMixin, generics.ListCreateAPIView):
             extra_args['completed_by'] = self.request.user
 
         draft_id = self.request.data.get('draft_id')
-        draft = AnnotationDraft.objects.filter(id=draft_id).first()
+        draft = AnnotationDraft.objects.filter(id=draft_id).first() if draft_id is not None else None
         if draft:
+            if draft.task_id == task.id:
+                # reuse the loaded task and project for the permission check and draft deletion
+                draft.task = task
             # draft permission check
             if draft.task_id != task.id or not draft.has_permission(user) or draft.user_id != user.id:
                 raise PermissionDenied(f'You have no permission to draft id:{draft_id}')
@@ -637,17 +646,17 @@ class AnnotationsListAPI(GetParentObjectMixin, generics.ListCreateAPIView):
         annotation = ser.save(**extra_args)
 
         logger.debug(f'Save activity for user={self.request.user}')
-        self.request.user.activity_at = timezone.now()
-        self.request.user.save()
+        # activity_at is updated automatically (auto_now)
+        user.save(update_fields=['activity_at'])
 
         # Release task if it has been taken at work (it should be taken by the same user, or it makes sentry error
         logger.debug(f'User={user} releases task={task}')
         task.release_lock(user)
 
         # if annotation created from draft - remove this draft
-        if draft_id is not None:
+        if draft is not None:
             logger.debug(f'Remove draft {draft_id} after creating annotation {annotation.id}')
-            self.delete_draft(draft_id, annotation.id)
+            self.delete_draft(draft, annotation.id)
 
         if self.request.data.get('ground_truth'):
             annotation.task.ensure_unique_groundtruth(annotation_id=annotation.id)
@@ -657,6 +666,52 @@ class AnnotationsListAPI(GetParentObjectMixin, generics.ListCreateAPIView):
         return annotation
 
 
+@method_decorator(
+    name='post',
+    decorator=extend_schema(
+        tags=['Annotations'],
+        summary='Create annotations in bulk',
+        description="""
+        Create many annotations for existing tasks of one project in a single request.
+        Annotations are completed by the current user. Task counters, the project summary
+        and webhooks are updated once for the whole batch, so use this endpoint for programmatic labeling
+        instead of creating annotations one by one.
+        """,
+        request=AnnotationBulkCreateSerializer,
+        responses={
+            '201': OpenApiResponse(
+                description='IDs of created annotations in the order of the request',
+                examples=[OpenApiExample(name='response', value={'ids': [1, 2]}, media_type='application/json')],
+            )
+        },
+        extensions={
+            'x-fern-sdk-group-name': 'annotations',
+            'x-fern-sdk-method-name': 'create_bulk',
+            'x-fern-audiences': ['public'],
+        },
+    ),
+)
+class AnnotationsBulkCreateAPI(generics.CreateAPIView):
+    parser_classes = (JSONParser,)
+    permission_required = ViewClassPermission(POST=all_permissions.annotations_create)
+    serializer_class = AnnotationBulkCreateSerializer
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        project = serializer.validated_data['project']
+        user = request.user
+        annotations = serializer.save()
+        task_ids = {annotation.task_id for annotation in annotations}
+
+        user.save(update_fields=['activity_at'])
+        TaskLock.objects.filter(task_id__in=task_ids, user=user).delete()
+        # one ANNOTATIONS_CREATED event for the batch (split only above WEBHOOK_BATCH_SIZE annotations)
+        with WebhookEventBuffer(user.active_organization, project, WebhookAction.ANNOTATIONS_CREATED) as buffer:
+            buffer.add(annotations)
+        return Response({'ids': [annotation.id for annotation in annotations]}, status=201)
+
+
 @extend_schema(exclude=True)
 class AnnotationDraftListAPI(generics.ListCreateAPIView):
     parser_classes = (JSONParser, MultiPartParser, FormParser)
@@ -17,7 +17,7 @@ from django.db.models import Count, F, Q
 from django.db.models.lookups import GreaterThanOrEqual
 from organizations.models import Organization
 from projects.models import Project
-from tasks.models import Annotation, Prediction, Task
+from tasks.models import Annotation, Prediction, PredictionModelVersion, Task
 
 logger = logging.getLogger(__name__)
 
@@ -174,6 +174,33 @@ def fill_predictions_project(migration_name):
     logger.info('Finished filling project field for Prediction model')
 
 
+def rebuild_prediction_model_versions(projects):
+    """Recount prediction model version counters for projects queryset
+
+    :return: Number of counted predictions
+    """
+    total = 0
+    for project_id in projects.order_by('id').values_list('id', flat=True):
+        count = PredictionModelVersion.rebuild(project_id)
+        logger.debug(f'Prediction model versions are rebuilt for project {project_id}: {count} predictions')
+        total += count
+    return total
+
+
+def _fill_prediction_model_versions(migration_name):
+    migration = AsyncMigrationStatus.objects.create(name=migration_name, status=AsyncMigrationStatus.STATUS_STARTED)
+    total = rebuild_prediction_model_versions(Project.objects.all())
+    migration.status = AsyncMigrationStatus.STATUS_FINISHED
+    migration.meta = {'predictions_processed': total}
+    migration.save()
+
+
+def fill_prediction_model_versions(migration_name):
+    logger.info('Start filling prediction model version counters')
+    start_job_async_or_sync(_fill_prediction_model_versions, migration_name=migration_name)
+    logger.info('Finished filling prediction model version counters')
+
+
 def update_tasks_counters(queryset, from_scratch=True):
     """
     Update tasks counters for the passed queryset of Tasks
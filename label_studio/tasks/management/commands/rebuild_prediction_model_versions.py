@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from projects.models import Project
+from tasks.functions import rebuild_prediction_model_versions
+
+
+class Command(BaseCommand):
+    help = 'Recount prediction model version counters (PredictionModelVersion) from predictions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--organization', type=int, help='organization id, all organizations if not set')
+        parser.add_argument('--project', type=int, help='project id, all projects if not set')
+
+    def handle(self, *args, **options):
+        projects = Project.objects.all()
+        if options['organization']:
+            projects = projects.filter(organization_id=options['organization'])
+        if options['project']:
+            projects = projects.filter(id=options['project'])
+
+        total = rebuild_prediction_model_versions(projects)
+        self.stdout.write(self.style.SUCCESS(f'Prediction model versions are rebuilt for {total} predictions'))
@@ -0,0 +1,80 @@
+# Generated by Django 5.1.15 on 2026-10-19 11:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+from tasks.functions import fill_prediction_model_versions
+
+
+def forward(apps, schema_editor):
+    fill_prediction_model_versions('0059_predictionmodelversion')
+
+
+def backwards(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0033_projects_soft_delete_indexes_async"),
+        ("tasks", "0058_task_precomputed_agreement"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PredictionModelVersion",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "model_version",
+                    models.TextField(
+                        help_text="Model version of predictions",
+                        null=True,
+                        verbose_name="model version",
+                    ),
+                ),
+                (
+                    "count",
+                    models.BigIntegerField(
+                        default=0,
+                        help_text="Number of predictions with this model version",
+                        verbose_name="count",
+                    ),
+                ),
+                (
+                    "latest",
+                    models.DateTimeField(
+                        help_text="Creation time of the latest prediction with this model version",
+                        null=True,
+                        verbose_name="latest",
+                    ),
+                ),
+                (
+                    "project",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="prediction_model_versions",
+                        to="projects.project",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("project", "model_version"),
+                        name="unique_project_model_version",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(forward, backwards),
+    ]
@@ -8,6 +8,7 @@ import os
 import random
 import traceback
 import uuid
+from collections import defaultdict
 from typing import Any, Mapping, Optional, Union, cast
 from urllib.parse import urljoin
 
@@ -16,10 +17,12 @@ from core.bulk_update_utils import bulk_update
 from core.current_request import get_current_request
 from core.feature_flags import flag_set
 from core.label_config import SINGLE_VALUED_TAGS
+from core.models import AsyncMigrationStatus
 from core.redis import start_job_async_or_sync
 from core.utils.common import (
     find_first_one_to_one_related_field_by_prefix,
     load_func,
+    prefetch_first_one_to_one_related_field_by_prefix,
     string_is_url,
     temporary_disconnect_list_signal,
 )
@@ -28,8 +31,9 @@ from core.utils.params import get_env
 from data_import.models import FileUpload
 from data_manager.managers import PreparedTaskManager, TaskManager
 from django.conf import settings
-from django.db import OperationalError, models, transaction
-from django.db.models import CheckConstraint, F, JSONField, Q
+from django.db import IntegrityError, OperationalError, models, transaction
+from django.db.models import CheckConstraint, Count, DateTimeField, F, JSONField, Max, Q, Value
+from django.db.models.functions import Coalesce, Greatest
 from django.db.models.lookups import GreaterThanOrEqual
 from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.dispatch import Signal, receiver
@@ -399,15 +403,20 @@ class Task(TaskMixin, models.Model):
         """
 
         if user is not None:
-            self.locks.filter(user=user).delete()
+            # expired locks are cleared in the same statement
+            self.locks.filter(Q(user=user) | Q(expire_at__lt=now())).delete()
         else:
             self.locks.all().delete()
-        self.clear_expired_locks()
 
     def get_storage_link(self):
         # TODO: how to get neatly any storage class here?
         return find_first_one_to_one_related_field_by_prefix(self, '.*io_storages_')
 
+    @staticmethod
+    def prefetch_storage_links(tasks):
+        """Load storage links of many tasks for get_storage_link() with one query per storage type"""
+        prefetch_first_one_to_one_related_field_by_prefix(tasks, '.*io_storages_', select_related=['storage'])
+
     @staticmethod
     def is_upload_file(filename):
         if not isinstance(filename, str):
@@ -482,6 +491,83 @@ class Task(TaskMixin, models.Model):
                         task_data[field] = resolved_uri
             return task_data
 
+    @staticmethod
+    def resolve_uri_batch(tasks, project):
+        """Resolve uris in data of many tasks at once, the same as resolve_uri() for each task.
+
+        Uris of all tasks are grouped by storage and resolved in one pass per storage,
+        uploaded files are looked up in one query.
+
+        :return: {task.id: resolved task data}
+        """
+        from io_storages.functions import get_storage_by_url
+
+        tasks = list(tasks)
+        if project.task_data_login and project.task_data_password:
+            proxy_url = urljoin(settings.HOSTNAME, reverse('projects-file-proxy', kwargs={'pk': project.pk}) + '?url=')
+            return {
+                task.id: {
+                    key: proxy_url + base64.urlsafe_b64encode(value.encode()).decode()
+                    if isinstance(value, str) and string_is_url(value)
+                    else value
+                    for key, value in task.data.items()
+                }
+                for task in tasks
+            }
+
+        file_upload_urls = {}
+        if settings.CLOUD_FILE_STORAGE_ENABLED:
+            filenames = {
+                Task.prepare_filename(value)
+                for task in tasks
+                for value in task.data.values()
+                if Task.is_upload_file(Task.prepare_filename(value))
+            }
+            if filenames:
+                # permission check: resolve uploaded files to the project only
+                for file_upload in FileUpload.objects.filter(project=project, file__in=filenames).order_by('id'):
+                    file_upload_urls.setdefault(file_upload.file.name, file_upload.url)
+
+        storage_objects = project.get_all_import_storage_objects
+        storages, pending, fallback = {}, defaultdict(list), defaultdict(list)
+        for task in tasks:
+            task_data = task.data
+            for field in task_data:
+                # file saved in django file storage
+                prepared_filename = Task.prepare_filename(task_data[field])
+                if settings.CLOUD_FILE_STORAGE_ENABLED and Task.is_upload_file(prepared_filename):
+                    if prepared_filename in file_upload_urls:
+                        task_data[field] = file_upload_urls[prepared_filename]
+                    else:
+                        task_data[field] = task_data[field] + '?not_uploaded_project_file'
+                    continue
+
+                # project storage, the storage the task was imported from is the last fallback
+                storage = get_storage_by_url(task_data[field], storage_objects)
+                if storage is None:
+                    fallback[task].append(field)
+                    continue
+                key = (type(storage), storage.pk)
+                storages.setdefault(key, storage)
+                pending[key].append((task, field))
+
+        # storage links of all fallback tasks are loaded at once
+        Task.prefetch_storage_links(list(fallback))
+        for task, fields in fallback.items():
+            storage = task.storage
+            if storage:
+                key = (type(storage), storage.pk)
+                storages.setdefault(key, storage)
+                pending[key].extend((task, field) for field in fields)
+
+        for key, items in pending.items():
+            resolved = storages[key].resolve_uris([(task.data[field], task) for task, field in items])
+            for (task, field), resolved_uri in zip(items, resolved):
+                if resolved_uri:
+                    task.data[field] = resolved_uri
+
+        return {task.id: task.data for task in tasks}
+
     @property
     def storage(self):
         # maybe task has storage link
@@ -544,7 +630,10 @@ class Task(TaskMixin, models.Model):
         signals = [
             (post_delete, update_all_task_states_after_deleting_task, Task),
             (pre_delete, remove_data_columns, Task),
+            (post_delete, remove_prediction_model_versions, Prediction),
         ]
+        # cascaded predictions are subtracted from model version counters once, not one by one
+        PredictionModelVersion.remove_predictions(Prediction.objects.filter(task__in=queryset))
         with temporary_disconnect_list_signal(signals):
             return batch_delete(queryset, batch_size=500)
 
@@ -887,9 +976,19 @@ class AnnotationDraft(models.Model):
             super().delete(*args, **kwargs)
 
 
+class PredictionManager(models.Manager):
+    def bulk_create(self, objs, batch_size=None, **kwargs):
+        pre_bulk_create.send(sender=self.model, objs=objs, batch_size=batch_size)
+        res = super().bulk_create(objs, batch_size, **kwargs)
+        post_bulk_create.send(sender=self.model, objs=res, batch_size=batch_size)
+        return res
+
+
 class Prediction(models.Model):
     """ML backend / Prompts predictions"""
 
+    objects = PredictionManager()
+
     result = JSONField('result', null=True, default=dict, help_text='Prediction result')
     score = models.FloatField(_('score'), default=None, help_text='Prediction score', null=True)
     model_version = models.TextField(
@@ -933,6 +1032,13 @@ class Prediction(models.Model):
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
     updated_at = models.DateTimeField(_('updated at'), auto_now=True)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # model version the prediction is counted under in PredictionModelVersion
+        instance._counted_model_version = instance.__dict__.get('model_version', models.DEFERRED)
+        return instance
+
     def created_ago(self):
         """Humanize date"""
         return timesince(self.created_at)
@@ -1214,6 +1320,127 @@ class PredictionMeta(models.Model):
         ]
 
 
+class PredictionModelVersion(models.Model):
+    """Number of predictions and the latest prediction time per project and model version.
+
+    Counters are updated on prediction save and delete and on Prediction.objects.bulk_create,
+    so Project.get_model_versions doesn't aggregate the predictions table.
+    Recount them with the rebuild_prediction_model_versions command.
+    """
+
+    # the async migration which fills counters for predictions created before them
+    FILL_MIGRATION = '0059_predictionmodelversion'
+
+    project = models.ForeignKey(
+        'projects.Project', on_delete=models.CASCADE, related_name='prediction_model_versions', db_index=False
+    )
+    model_version = models.TextField(_('model version'), null=True, help_text='Model version of predictions')
+    count = models.BigIntegerField(_('count'), default=0, help_text='Number of predictions with this model version')
+    latest = models.DateTimeField(
+        _('latest'), null=True, help_text='Creation time of the latest prediction with this model version'
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'model_version'], name='unique_project_model_version')
+        ]
+
+    @classmethod
+    def _counter(cls, project_id, model_version):
+        counters = cls.objects.filter(project_id=project_id)
+        if model_version is None:
+            return counters.filter(model_version__isnull=True)
+        return counters.filter(model_version=model_version)
+
+    @classmethod
+    def add(cls, project_id, model_version, count=1, latest=None):
+        """Add predictions to the counter, latest is the creation time of the newest one"""
+        update = {'count': F('count') + count}
+        if latest is not None:
+            latest_value = Value(latest, output_field=DateTimeField())
+            update['latest'] = Greatest(Coalesce('latest', latest_value), latest_value)
+        if cls._counter(project_id, model_version).update(**update):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(project_id=project_id, model_version=model_version, count=count, latest=latest)
+        except IntegrityError:
+            # the counter is created by a concurrent request
+            cls._counter(project_id, model_version).update(**update)
+
+    @classmethod
+    def remove(cls, project_id, model_version, count=1):
+        """Subtract deleted predictions, counters reaching zero are kept until the next rebuild"""
+        cls._counter(project_id, model_version).update(count=F('count') - count)
+
+    @classmethod
+    def add_predictions(cls, predictions):
+        """Count new prediction objects with one update per (project, model version)"""
+        groups = {}
+        for prediction in predictions:
+            if prediction.project_id is None:
+                continue
+            key = (prediction.project_id, prediction.model_version)
+            count, latest = groups.get(key, (0, None))
+            groups[key] = (count + 1, max(filter(None, (latest, prediction.created_at)), default=None))
+        for (project_id, model_version), (count, latest) in groups.items():
+            cls.add(project_id, model_version, count, latest)
+
+    @classmethod
+    def remove_predictions(cls, predictions):
+        """Subtract predictions queryset which is going to be deleted without signals"""
+        groups = predictions.order_by().values('project_id', 'model_version').annotate(total=Count('id'))
+        for group in groups:
+            if group['project_id'] is not None:
+                cls.remove(group['project_id'], group['model_version'], group['total'])
+
+    @classmethod
+    def delete_predictions(cls, predictions):
+        """Delete predictions queryset subtracting grouped counts once instead of one update per prediction
+
+        :return: Result of QuerySet.delete()
+        """
+        with transaction.atomic():
+            cls.remove_predictions(predictions)
+            with temporary_disconnect_list_signal([(post_delete, remove_prediction_model_versions, Prediction)]):
+                return predictions.delete()
+
+    @classmethod
+    def counters_are_ready(cls):
+        """Counters cover all predictions once the migration job has filled them"""
+        return AsyncMigrationStatus.objects.filter(
+            name=cls.FILL_MIGRATION, status=AsyncMigrationStatus.STATUS_FINISHED
+        ).exists()
+
+    @classmethod
+    def rebuild(cls, project_id):
+        """Recount counters of the project from its predictions
+
+        :return: Number of counted predictions
+        """
+        with transaction.atomic():
+            # concurrent counter updates wait until the recount replaces the rows
+            list(cls.objects.select_for_update().filter(project_id=project_id).values_list('id', flat=True))
+            groups = (
+                Prediction.objects.filter(project_id=project_id)
+                .order_by()
+                .values('model_version')
+                .annotate(total=Count('id'), last_created_at=Max('created_at'))
+            )
+            counters = [
+                cls(
+                    project_id=project_id,
+                    model_version=group['model_version'],
+                    count=group['total'],
+                    latest=group['last_created_at'],
+                )
+                for group in groups
+            ]
+            cls.objects.filter(project_id=project_id).delete()
+            cls.objects.bulk_create(counters)
+        return sum(counter.count for counter in counters)
+
+
 @receiver(post_delete, sender=Task)
 def update_all_task_states_after_deleting_task(sender, instance, **kwargs):
     """after deleting_task
@@ -1240,7 +1467,7 @@ def remove_data_columns(sender, instance, **kwargs):
 
 
 def _task_data_is_not_updated(update_fields):
-    if update_fields and list(update_fields) == ['is_labeled']:
+    if update_fields and 'data' not in update_fields:
         return True
 
 
@@ -1327,9 +1554,52 @@ def save_predictions_to_project(sender, instance, **kwargs):
     logger.debug(f'Updated total_predictions for {instance.task.id}.')
 
 
+def _counted_model_version(prediction):
+    """Model version the prediction was loaded with, i.e. counted under in PredictionModelVersion"""
+    model_version = getattr(prediction, '_counted_model_version', models.DEFERRED)
+    return prediction.model_version if model_version is models.DEFERRED else model_version
+
+
+@receiver(post_save, sender=Prediction)
+def update_prediction_model_versions(sender, instance, created, **kwargs):
+    if instance.project_id is None:
+        return
+    counted_model_version = _counted_model_version(instance)
+    if created:
+        PredictionModelVersion.add(instance.project_id, instance.model_version, latest=instance.created_at)
+    elif counted_model_version != instance.model_version:
+        PredictionModelVersion.remove(instance.project_id, counted_model_version)
+        PredictionModelVersion.add(instance.project_id, instance.model_version, latest=instance.created_at)
+    else:
+        # created_at can be changed explicitly
+        PredictionModelVersion.add(instance.project_id, instance.model_version, count=0, latest=instance.created_at)
+    instance._counted_model_version = instance.model_version
+
+
+@receiver(post_delete, sender=Prediction)
+def remove_prediction_model_versions(sender, instance, **kwargs):
+    if instance.project_id is not None:
+        PredictionModelVersion.remove(instance.project_id, _counted_model_version(instance))
+
+
+@receiver(post_bulk_create, sender=Prediction)
+def add_bulk_prediction_model_versions(sender, objs, **kwargs):
+    PredictionModelVersion.add_predictions(objs)
+
+
 # =========== END OF PROJECT SUMMARY UPDATES ===========
 
 
+@receiver(post_save, sender=Annotation)
+def update_annotation_labels_index(sender, instance, update_fields=None, **kwargs):
+    """Keep the label index (labels_manager.AnnotationLabel) in sync with annotation result"""
+    if update_fields is not None and 'result' not in update_fields:
+        return
+    from labels_manager.functions import index_annotation_labels
+
+    index_annotation_labels([instance])
+
+
 @receiver(post_save, sender=Annotation)
 def delete_draft(sender, instance, **kwargs):
     task = instance.task
@@ -1348,19 +1618,14 @@ def delete_draft(sender, instance, **kwargs):
 
 
 @receiver(post_save, sender=Annotation)
-def update_ml_backend(sender, instance, **kwargs):
-    if instance.ground_truth:
+def update_ml_backend(sender, instance, created, **kwargs):
+    if not created or instance.ground_truth or instance.project_id is None:
         return
 
-    project = instance.project
-
-    if hasattr(project, 'ml_backends') and project.min_annotations_to_start_training:
-        annotation_count = Annotation.objects.filter(project=project).count()
+    from ml.models import MLBackend
 
-        # start training every N annotation
-        if annotation_count % project.min_annotations_to_start_training == 0:
-            for ml_backend in project.ml_backends.all():
-                ml_backend.train()
+    # start training every N new annotations
+    MLBackend.count_new_annotations(instance.project)
 
 
 def update_task_stats(task, stats=('is_labeled',), save=True):
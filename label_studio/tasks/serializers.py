@@ -5,20 +5,24 @@ import logging
 import ujson as json
 from core.current_request import get_current_request
 from core.feature_flags import flag_set
-from core.label_config import replace_task_data_undefined_with_config_field
+from core.label_config import get_parsed_label_config, replace_task_data_undefined_with_config_field
 from core.utils.common import load_func, retry_database_locked
 from core.utils.db import fast_first
 from django.conf import settings
 from django.db import IntegrityError, transaction
+from django.db.models import QuerySet
+from django.utils.timezone import now
 from drf_spectacular.utils import extend_schema_field
 from label_studio_sdk.label_interface import LabelInterface
+from labels_manager.functions import index_annotation_labels
 from projects.models import Project
 from rest_flex_fields import FlexFieldsModelSerializer
 from rest_framework import generics, serializers
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.fields import SkipField
 from rest_framework.serializers import ModelSerializer
 from rest_framework.settings import api_settings
+from tasks.choices import ActionType
 from tasks.exceptions import AnnotationDuplicateError
 from tasks.models import Annotation, AnnotationDraft, Prediction, PredictionMeta, Task
 from tasks.validation import TaskValidator
@@ -28,6 +32,19 @@ from users.serializers import UserSerializer
 logger = logging.getLogger(__name__)
 
 
+def get_list_instances(serializer):
+    """Instances of the list which the serializer is a child of, None if it serializes a single instance.
+
+    Children can load data for the whole list at once and keep it on the parent serializer.
+    """
+    parent = serializer.parent
+    instances = parent.instance if isinstance(parent, serializers.ListSerializer) else None
+    if isinstance(instances, QuerySet):
+        # already evaluated by ListSerializer.to_representation
+        instances = instances._result_cache
+    return instances if isinstance(instances, list) else None
+
+
 class PredictionQuerySerializer(serializers.Serializer):
     task = serializers.IntegerField(required=False, help_text='Task ID to filter predictions')
     project = serializers.IntegerField(required=False, help_text='Project ID to filter predictions')
@@ -238,7 +255,7 @@ class BaseTaskSerializer(FlexFieldsModelSerializer):
         if project:
             # resolve uri for storage (s3/gcs/etc)
             if self.context.get('resolve_uri', False):
-                instance.data = instance.resolve_uri(instance.data, project)
+                instance.data = self._resolve_uri(instance, project)
 
             # resolve $undefined$ key in task data
             data = instance.data
@@ -246,6 +263,23 @@ class BaseTaskSerializer(FlexFieldsModelSerializer):
 
         return super().to_representation(instance)
 
+    def _resolve_uri(self, instance, project):
+        """Resolve uris in task data; when serializing a list, uris of all its tasks are resolved at once"""
+        tasks = get_list_instances(self)
+        if tasks is None:
+            return instance.resolve_uri(instance.data, project)
+
+        parent = self.parent
+        resolved = getattr(parent, '_resolved_task_data', None)
+        if resolved is None:
+            resolved = Task.resolve_uri_batch(
+                [task for task in tasks if isinstance(task, Task) and task.project_id == project.id], project
+            )
+            parent._resolved_task_data = resolved
+        if instance.id not in resolved:
+            return instance.resolve_uri(instance.data, project)
+        return resolved[instance.id]
+
     class Meta:
         model = Task
         exclude = ('precomputed_agreement',)
@@ -618,6 +652,7 @@ class BaseTaskSerializerBulk(serializers.ListSerializer):
             self.db_annotations = Annotation.objects.bulk_create(db_annotations, batch_size=settings.BATCH_SIZE)
         else:
             self.db_annotations = Annotation.objects.bulk_create(db_annotations, batch_size=settings.BATCH_SIZE)
+        index_annotation_labels(self.db_annotations)
         logging.info(f'Annotations serialization success, len = {len(self.db_annotations)}')
 
         return self.db_annotations
@@ -834,3 +869,146 @@ class PredictionMetaSerializer(ModelSerializer):
 
 # LSE inherits this serializer
 TaskSerializerBulk = load_func(settings.TASK_SERIALIZER_BULK)
+
+
+class AnnotationBulkCreateSerializer(serializers.Serializer):
+    """Create many annotations for existing tasks of one project in a single request.
+
+    Annotations are validated against the project label config parsed once and inserted with bulk_create.
+    Per-annotation signals are not sent: task counters, the label index and the project summary
+    are updated once for the whole batch.
+    """
+
+    project = serializers.PrimaryKeyRelatedField(queryset=Project.objects.all(), help_text='Project ID')
+    annotations = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        help_text='Annotations: [{"task": <task id>, "result": [...], "lead_time": <seconds>, '
+        '"was_cancelled": false, "ground_truth": false}, ...]',
+    )
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is not None:
+            # projects of other organizations are not found, so their task ids can't be probed
+            fields['project'].queryset = Project.objects.for_user(request.user)
+        return fields
+
+    def validate_project(self, value):
+        # checked before annotations are validated
+        if not value.has_permission(self.context['request'].user):
+            raise PermissionDenied(f'You have no permission to project id:{value.id}')
+        return value
+
+    def validate_annotations(self, value):
+        if len(value) > settings.ANNOTATIONS_BULK_CREATE_MAX:
+            raise ValidationError(f'Too many annotations, maximum is {settings.ANNOTATIONS_BULK_CREATE_MAX}')
+        return value
+
+    def validate(self, attrs):
+        project = attrs['project']
+        annotations = attrs['annotations']
+        parsed_config = get_parsed_label_config(project.label_config)
+        task_ids = {annotation.get('task') for annotation in annotations}
+        existing_task_ids = set(
+            Task.objects.filter(project=project, id__in=[i for i in task_ids if isinstance(i, int)]).values_list(
+                'id', flat=True
+            )
+        )
+
+        errors = []
+        for i, annotation in enumerate(annotations):
+            try:
+                self._validate_annotation(annotation, existing_task_ids, parsed_config)
+            except ValidationError as exc:
+                errors.append(f'Error at item {i}: {exc.detail[0]}')
+                # do not print to user too many errors
+                if len(errors) >= 100:
+                    errors.append('...')
+                    break
+        if errors:
+            raise ValidationError({'annotations': errors})
+        return attrs
+
+    @staticmethod
+    def _validate_annotation(annotation, existing_task_ids, parsed_config):
+        if annotation.get('task') not in existing_task_ids:
+            raise ValidationError(f'task {annotation.get("task")} not found in the project')
+        result = annotation.get('result')
+        if not isinstance(result, list):
+            raise ValidationError('"result" field in annotation must be list')
+        for region in result:
+            if not isinstance(region, dict):
+                raise ValidationError('"result" items must be dicts')
+            from_name = region.get('from_name')
+            if from_name is None:
+                # relations and other results without control tags
+                continue
+            if not parsed_config.has_control(from_name):
+                raise ValidationError(f'from_name="{from_name}" not found in the labeling config')
+            to_name = region.get('to_name')
+            if not parsed_config.has_to_name(to_name, parsed_config.original_from_name(from_name)):
+                raise ValidationError(f'to_name="{to_name}" is not connected to "{from_name}"')
+        lead_time = annotation.get('lead_time')
+        if lead_time is not None and not isinstance(lead_time, (int, float)):
+            raise ValidationError('"lead_time" must be a number')
+        for field in ('was_cancelled', 'ground_truth'):
+            if not isinstance(annotation.get(field, False), bool):
+                raise ValidationError(f'"{field}" must be boolean')
+
+    def create(self, validated_data):
+        project = validated_data['project']
+        user = self.context['request'].user
+
+        db_annotations = []
+        for annotation in validated_data['annotations']:
+            was_cancelled = annotation.get('was_cancelled', False)
+            body = {
+                'task_id': annotation['task'],
+                'project': project,
+                'completed_by_id': user.id,
+                'updated_by_id': user.id,
+                'result': annotation['result'],
+                'result_count': len({region.get('id') for region in annotation['result']}),
+                'lead_time': annotation.get('lead_time'),
+                'was_cancelled': was_cancelled,
+                'ground_truth': annotation.get('ground_truth', False),
+            }
+            action = ActionType.SKIPPED if was_cancelled else ActionType.SUBMITTED
+            db_annotations.append(Annotation(**TaskSerializerBulk.add_annotation_fields(body, user, action)))
+        task_ids = sorted({annotation.task_id for annotation in db_annotations})
+
+        with transaction.atomic():
+            db_annotations = Annotation.objects.bulk_create(db_annotations, batch_size=settings.BATCH_SIZE)
+            index_annotation_labels(db_annotations)
+            if hasattr(project, 'summary'):
+                project.summary.update_created_annotations_and_labels(db_annotations)
+
+            ground_truth_ids = {
+                annotation.task_id: annotation.id for annotation in db_annotations if annotation.ground_truth
+            }
+            if ground_truth_ids:
+                # the last ground truth annotation in the batch stays the only one for its task
+                Annotation.objects.filter(task_id__in=ground_truth_ids, ground_truth=True).exclude(
+                    id__in=ground_truth_ids.values()
+                ).update(ground_truth=False)
+
+            Task.objects.filter(id__in=task_ids).update(updated_at=now(), updated_by=user)
+
+        for action in (ActionType.SUBMITTED, ActionType.SKIPPED):
+            annotations = [a for a in db_annotations if a.was_cancelled == (action == ActionType.SKIPPED)]
+            if annotations:
+                TaskSerializerBulk.post_process_annotations(user, annotations, action)
+        # counters affect is_labeled, so they are updated together
+        project.update_tasks_counters_and_is_labeled(Task.objects.filter(id__in=task_ids))
+        self._start_training(project, db_annotations)
+        return db_annotations
+
+    @staticmethod
+    def _start_training(project, db_annotations):
+        from ml.models import MLBackend
+
+        MLBackend.count_new_annotations(
+            project, len([annotation for annotation in db_annotations if not annotation.ground_truth])
+        )
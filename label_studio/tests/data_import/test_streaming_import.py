@@ -98,6 +98,83 @@ class TestJSONStreamingReader:
         assert batches[0][0]['data'] == {'text': 'T0'}
 
 
+class TestTabularStreamingReader:
+    def test_csv_batches(self, user, project):
+        content = b'text,score\n' + b''.join(f'T{i},{i}\n'.encode() for i in range(5))
+        fu = create_file_upload(user, project, content, 'tasks.csv')
+
+        batches = list(fu.read_tasks_streaming(batch_size=2))
+
+        assert [len(b) for b in batches] == [2, 2, 1]
+        assert batches[0][0]['data'] == {'text': 'T0', 'score': 0}
+        assert batches[2][0]['data'] == {'text': 'T4', 'score': 4}
+
+    def test_csv_semicolon_separator_and_empty_values(self, user, project):
+        content = b'text;meta\nA;x\nB;\n'
+        fu = create_file_upload(user, project, content, 'tasks.csv')
+
+        tasks = [t for batch in fu.read_tasks_list_from_csv_streaming(batch_size=10) for t in batch]
+
+        assert [t['data'] for t in tasks] == [{'text': 'A', 'meta': 'x'}, {'text': 'B', 'meta': ''}]
+
+    def test_tsv_batches(self, user, project):
+        content = b'text\tid\nA\t1\nB\t2\nC\t3\n'
+        fu = create_file_upload(user, project, content, 'tasks.tsv')
+
+        batches = list(fu.read_tasks_streaming(batch_size=2))
+
+        assert [len(b) for b in batches] == [2, 1]
+        assert batches[1][0]['data'] == {'text': 'C', 'id': 3}
+
+    def test_txt_batches(self, user, project, settings):
+        content = b'line 1\r\nline 2\nline 3'
+        fu = create_file_upload(user, project, content, 'tasks.txt')
+
+        batches = list(fu.read_tasks_streaming(batch_size=2))
+
+        assert [len(b) for b in batches] == [2, 1]
+        assert [t['data'][settings.DATA_UNDEFINED_NAME] for b in batches for t in b] == [
+            'line 1',
+            'line 2',
+            'line 3',
+        ]
+
+    def test_streaming_matches_non_streaming(self, user, project):
+        content = b'text,label\n' + b''.join(f'T{i},L{i % 3}\n'.encode() for i in range(10))
+        fu = create_file_upload(user, project, content, 'tasks.csv')
+
+        streamed = [t for batch in fu.read_tasks_streaming(batch_size=4) for t in batch]
+
+        assert streamed == fu.read_tasks_list_from_csv()
+
+    def test_column_types_are_kept_across_chunks(self, user, project):
+        content = b'text,score,code\nA,1,1\nB,2,2\nC,,x\nD,4.5,4\n'
+        fu = create_file_upload(user, project, content, 'tasks.csv')
+
+        streamed = [t for batch in fu.read_tasks_streaming(batch_size=2) for t in batch]
+
+        assert streamed == fu.read_tasks_list_from_csv()
+        assert [t['data']['score'] for t in streamed] == [1.0, 2.0, '', 4.5]
+        assert [t['data']['code'] for t in streamed] == ['1', '2', 'x', '4']
+
+
+class TestParquetReader:
+    def test_parquet_batches_and_projection(self, user, project):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        sink = pa.BufferOutputStream()
+        table = pa.Table.from_pylist([{'text': f'T{i}', 'unused': i} for i in range(5)])
+        pq.write_table(table, sink, row_group_size=2)
+        fu = create_file_upload(user, project, sink.getvalue().to_pybytes(), 'tasks.parquet')
+
+        batches = list(fu.read_tasks_streaming(batch_size=3))
+
+        assert [len(b) for b in batches] == [3, 2]
+        assert [t['data'] for b in batches for t in b] == [{'text': f'T{i}'} for i in range(5)]
+        assert fu.read_tasks() == [t for b in batches for t in b]
+
+
 class TestEndToEndStreamingFromUploads:
     def test_load_tasks_from_uploaded_files_streaming_real_files(self, user, project):
         content1 = b'[{"text":"A1"},{"text":"A2"},{"text":"A3"},{"text":"A4"}]'
@@ -3,7 +3,11 @@
 import json
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from projects.models import Project
+from tasks.models import AnnotationDraft
+from users.models import User
 
 from ..utils import make_annotation, make_prediction, make_task, project_id  # noqa
 
@@ -128,3 +132,66 @@ def test_views_total_counters(tasks_count, annotations_count, predictions_count,
     assert response_data['total'] == tasks_count, response_data
     assert response_data['total_annotations'] == tasks_count * annotations_count, response_data
     assert response_data['total_predictions'] == tasks_count * predictions_count, response_data
+
+
+@pytest.mark.django_db
+def test_views_tasks_api_hidden_columns(business_client, project_id):
+    hidden = ['tasks:annotators', 'tasks:annotations_results', 'tasks:storage_filename']
+    payload = dict(project=project_id, data={'hiddenColumns': {'explore': hidden, 'labeling': hidden}})
+    response = business_client.post('/api/dm/views/', data=json.dumps(payload), content_type='application/json')
+    assert response.status_code == 201, response.content
+    view_id = response.json()['id']
+
+    project = Project.objects.get(pk=project_id)
+    task_id = make_task({'data': {'text': 'bbb'}}, project).id
+    result = {'from_name': 'my_class', 'to_name': 'text', 'type': 'choices', 'value': {'choices': ['pos']}}
+    make_annotation({'result': [result]}, task_id)
+
+    # hidden columns are not rendered
+    response = business_client.get(f'/api/tasks?view={view_id}')
+    assert response.status_code == 200, response.content
+    task = response.json()['tasks'][0]
+    assert 'annotators' not in task
+    assert 'annotations_results' not in task
+    assert 'storage_filename' not in task
+    assert 'annotations_ids' in task
+    assert task['data'] == {'text': 'bbb'}
+
+    # fields=all renders everything
+    response = business_client.get(f'/api/tasks?fields=all&view={view_id}')
+    task = response.json()['tasks'][0]
+    assert 'annotators' in task
+    assert 'annotations_results' in task
+
+
+@pytest.mark.django_db
+def test_views_tasks_api_drafts(business_client, project_id, django_assert_max_num_queries):
+    project = Project.objects.get(pk=project_id)
+    other_user = User.objects.create(email='other@pytest.net')
+    task_ids = [make_task({'data': {'text': str(i)}}, project).id for i in range(5)]
+    for task_id in task_ids[:3]:
+        AnnotationDraft.objects.create(task_id=task_id, user=business_client.user, result=[])
+        AnnotationDraft.objects.create(task_id=task_id, user=other_user, result=[])
+
+    def get_drafts():
+        response = business_client.get(f'/api/tasks?fields=all&project={project_id}')
+        assert response.status_code == 200, response.content
+        return {task['id']: task['drafts'] for task in response.json()['tasks']}
+
+    drafts = get_drafts()
+
+    # only drafts of the current user
+    for task_id in task_ids:
+        expected = 1 if task_id in task_ids[:3] else 0
+        assert len(drafts[task_id]) == expected
+        assert all(draft['user'] == str(business_client.user) for draft in drafts[task_id])
+
+    # drafts are loaded for the whole page at once, the number of queries doesn't grow with the tasks number
+    with CaptureQueriesContext(connection) as queries:
+        get_drafts()
+    for i in range(5):
+        task_id = make_task({'data': {'text': str(i)}}, project).id
+        AnnotationDraft.objects.create(task_id=task_id, user=business_client.user, result=[])
+    with django_assert_max_num_queries(len(queries)):
+        drafts = get_drafts()
+    assert len(drafts) == 10
@@ -143,3 +143,37 @@ def test_user_with_default_auth_settings_can_use_jwt_but_not_legacy_token():
 
     response = client.get('/api/projects/')
     assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@mock_feature_flag(flag_name='fflag__feature_develop__prompts__dia_1829_jwt_token_auth', value=True)
+@pytest.mark.django_db
+def test_jwt_middleware_resolves_user_in_single_query(django_assert_num_queries):
+    from django.test import RequestFactory
+    from jwt_auth.middleware import JWTAuthenticationMiddleware
+
+    user = create_user_with_token_settings(api_tokens_enabled=True, legacy_api_tokens_enabled=False)
+    refresh = LSAPIToken.for_user(user)
+    request = RequestFactory().get('/api/projects/', HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+    middleware = JWTAuthenticationMiddleware(lambda request: request)
+
+    with django_assert_num_queries(1):
+        middleware(request)
+        assert request.is_jwt
+
+    assert request.user == user
+
+
+@mock_feature_flag(flag_name='fflag__feature_develop__prompts__dia_1829_jwt_token_auth', value=True)
+@pytest.mark.django_db
+def test_legacy_token_auth_resolves_user_in_single_query(django_assert_num_queries):
+    from django.test import RequestFactory
+    from jwt_auth.auth import TokenAuthenticationPhaseout
+
+    user = create_user_with_token_settings(api_tokens_enabled=True, legacy_api_tokens_enabled=True)
+    token, _ = Token.objects.get_or_create(user=user)
+    request = RequestFactory().get('/api/projects/', HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    with django_assert_num_queries(1):
+        authenticated_user, _ = TokenAuthenticationPhaseout().authenticate(request)
+
+    assert authenticated_user == user
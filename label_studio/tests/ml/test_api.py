@@ -305,3 +305,50 @@ def test_ml_backend_predict_test_api_post_random_true(business_client):
     r = response.json()
     assert r['url'] == 'http://localhost:8999/predict'
     assert r['status'] == 200
+
+
+@pytest.mark.django_db
+def test_ml_backend_cached_state(business_client, ml_backend_for_test_api, mock_gethostbyname):
+    from datetime import timedelta
+
+    import requests
+    from django.utils.timezone import now
+    from ml.models import MLBackend, probe_ml_backends
+
+    project = make_project(
+        config=dict(is_published=True, label_config=PROJECT_CONFIG, title='test_ml_backend_state'),
+        user=business_client.user,
+        use_ml_backend=False,
+    )
+    response = business_client.post(
+        '/api/ml/', data={'project': project.id, 'title': 'ml_backend', 'url': 'https://ml_backend_for_test_api'}
+    )
+    assert response.status_code == 201
+    ml_backend_id = response.json()['id']
+    assert response.json()['state'] == 'CO'
+    assert response.json()['state_checked_at'] is not None
+
+    # ML backend goes down: the cached state is returned without requests to the ML backend
+    ml_backend_for_test_api.get('https://ml_backend_for_test_api/health', exc=requests.exceptions.ConnectTimeout)
+    calls = ml_backend_for_test_api.call_count
+    response = business_client.get(f'/api/ml?project={project.id}')
+    assert response.json()[0]['state'] == 'CO'
+    response = business_client.get(f'/api/ml/{ml_backend_id}')
+    assert response.json()['state'] == 'CO'
+    assert ml_backend_for_test_api.call_count == calls
+
+    # explicit refresh checks the state right now
+    response = business_client.get(f'/api/ml?project={project.id}&refresh=true')
+    assert response.json()[0]['state'] == 'DI'
+
+    # expired state is checked again
+    ml_backend_for_test_api.get('https://ml_backend_for_test_api/health', text=json.dumps({'status': 'UP'}))
+    MLBackend.objects.filter(id=ml_backend_id).update(state_checked_at=now() - timedelta(hours=1))
+    response = business_client.get(f'/api/ml/{ml_backend_id}')
+    assert response.json()['state'] == 'CO'
+
+    # the prober checks only outdated states
+    assert probe_ml_backends() == 0
+    MLBackend.objects.filter(id=ml_backend_id).update(state='DI', state_checked_at=None)
+    assert probe_ml_backends() == 1
+    assert MLBackend.objects.get(id=ml_backend_id).state == 'CO'
@@ -0,0 +1,144 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from ml.api_connector import get_session_pool
+from ml.models import MLBackend
+from projects.tests.factories import ProjectFactory
+from tasks.models import Prediction
+from tasks.tests.factories import TaskFactory
+
+
+class MLBackendHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def _respond(self, data, status=200):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._respond({'status': 'UP', 'model_class': 'Test'})
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        self.server.requests.append((self.path, request))
+        if self.path == '/setup':
+            self.server.label_configs.add(request.get('label_config_hash'))
+            return self._respond({'model_version': 'v1'})
+
+        if 'label_config' in request:
+            self.server.label_configs.add(request.get('label_config_hash'))
+        elif request.get('label_config_hash') not in self.server.label_configs:
+            return self._respond({'error': 'unknown label config'}, status=409)
+        self._respond({'results': [{'result': [], 'score': 1} for _ in request['tasks']]})
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def ml_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), MLBackendHandler)
+    server.connections = 0
+    server.requests = []
+    server.label_configs = set()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    get_session_pool().close()
+
+
+@pytest.mark.django_db
+def test_ml_backend_calls_reuse_connection(ml_server):
+    project = ProjectFactory()
+    ml_backend = MLBackend.objects.create(project=project, url=f'http://127.0.0.1:{ml_server.server_port}')
+
+    for _ in range(20):
+        response = ml_backend.api.make_predictions([{'data': {}}], project)
+        assert not response.is_error
+    ml_backend.api.health()
+
+    # every call creates a new MLApi object, but they share one keep-alive connection
+    assert ml_server.connections == 1
+
+
+@pytest.mark.django_db
+def test_ml_backend_credentials_change_invalidates_session(ml_server):
+    project = ProjectFactory()
+    ml_backend = MLBackend.objects.create(project=project, url=f'http://127.0.0.1:{ml_server.server_port}')
+    old_session = ml_backend.api.http
+    ml_backend.api.health()
+    assert len(get_session_pool()) == 1
+
+    ml_backend.auth_method = 'BASIC_AUTH'
+    ml_backend.basic_auth_user = 'user'
+    ml_backend.basic_auth_pass = 'pass'
+    ml_backend.save()
+
+    assert len(get_session_pool()) == 0
+    assert ml_backend.api.http is not old_session
+    assert not ml_backend.api.health().is_error
+    assert ml_server.connections == 2
+
+
+@pytest.mark.django_db
+def test_ml_backend_cached_project_context(ml_server):
+    project = ProjectFactory(
+        label_config='<View><Image name="image" value="$image"/><Choices name="label" toName="image">'
+        '<Choice value="pos"/></Choices></View>'
+    )
+    tasks = [TaskFactory(project=project, data={'image': f'{i}.jpg', 'text': 'x' * 1000}) for i in range(3)]
+    ml_backend = MLBackend.objects.create(
+        project=project, url=f'http://127.0.0.1:{ml_server.server_port}', cache_project_context=True
+    )
+    ml_backend.update_state()
+    assert ml_server.requests[-1][0] == '/setup'
+    assert ml_server.label_configs
+    # ML backend is restarted and loses cached label configs
+    ml_server.label_configs.clear()
+    ml_server.requests.clear()
+
+    ml_backend.predict_tasks(tasks[:2])
+    ml_backend.predict_tasks(tasks[2:])
+
+    assert Prediction.objects.filter(project=project).count() == 3
+    slim, full, slim_after_fallback = [request for _, request in ml_server.requests]
+    for request in (slim, slim_after_fallback):
+        assert 'label_config' not in request
+        assert 'login' not in request['params']
+    assert full['label_config'] == project.label_config
+    assert full['label_config_hash'] == slim['label_config_hash']
+    for task in slim['tasks'] + slim_after_fallback['tasks']:
+        assert set(task) == {'id', 'data', 'meta', 'project'}
+        assert set(task['data']) == {'image'}
+
+
+@pytest.mark.django_db
+def test_predict_tasks_skips_tasks_with_served_model_version(ml_server):
+    project = ProjectFactory()
+    tasks = [TaskFactory(project=project) for _ in range(2)]
+    Prediction.objects.create(task=tasks[0], project=project, result=[], model_version='v1')
+    # the user pinned another version, but the backend serves v1
+    ml_backend = MLBackend.objects.create(
+        project=project, url=f'http://127.0.0.1:{ml_server.server_port}', auto_update=False, model_version='pinned'
+    )
+    ml_backend.update_state()
+    assert ml_backend.served_model_version == 'v1'
+    ml_server.requests.clear()
+
+    ml_backend.predict_tasks(tasks)
+
+    # the served version is taken from the last state check, without a new /setup
+    assert [path for path, _ in ml_server.requests] == ['/predict']
+    assert [task['id'] for task in ml_server.requests[0][1]['tasks']] == [tasks[1].id]
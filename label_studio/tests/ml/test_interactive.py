@@ -0,0 +1,86 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests_mock
+from ml.interactive import InteractiveGateway, InteractiveRequestSuperseded
+
+
+@pytest.fixture
+def gateway():
+    gateway = InteractiveGateway(max_workers=4)
+    yield gateway
+    gateway.shutdown()
+
+
+def test_identical_requests_are_collapsed(gateway):
+    calls = []
+    release = threading.Event()
+
+    def predict():
+        calls.append(1)
+        release.wait(5)
+        return {'x': len(calls)}
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        futures = [pool.submit(gateway.run, 'key', predict) for _ in range(5)]
+        # wait until every request joins the in-flight call
+        while not gateway._calls or gateway._calls['key'].waiters < 5:
+            time.sleep(0.01)
+        release.set()
+        results = [future.result(5) for future in futures]
+
+    assert calls == [1]
+    assert results == [{'x': 1}] * 5
+    assert not gateway._calls
+
+
+def test_newer_request_supersedes_previous_one(gateway):
+    release = threading.Event()
+    started = threading.Event()
+
+    def slow():
+        started.set()
+        release.wait()
+        return 'slow'
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        previous = pool.submit(gateway.run, 'first', slow, supersede_key=(1, 1))
+        started.wait()
+        assert gateway.run('second', lambda: 'fast', supersede_key=(1, 1)) == 'fast'
+        # the previous call finishes, but its result is stale for the superseded request
+        release.set()
+        with pytest.raises(InteractiveRequestSuperseded):
+            previous.result()
+
+    # other users are not affected
+    assert gateway.run('third', lambda: 'other', supersede_key=(2, 1)) == 'other'
+
+
+@pytest.mark.django_db
+def test_interactive_annotating_results_are_cached(business_client, configured_project, settings):
+    settings.ML_INTERACTIVE_CACHE_TTL = 10
+    ml_backend = configured_project.ml_backends.first()
+    ml_backend.is_interactive = True
+    ml_backend.save()
+    task = configured_project.tasks.first()
+
+    def post(context):
+        r = business_client.post(
+            f'/api/ml/{ml_backend.pk}/interactive-annotating',
+            data=json.dumps({'task': task.id, 'context': context}),
+            content_type='application/json',
+        )
+        assert r.status_code == 200
+        return r.json()
+
+    with requests_mock.Mocker(real_http=True) as m:
+        m.register_uri('POST', f'{ml_backend.url}/predict', json={'results': [{'x': 'x'}]}, status_code=200)
+        results = [post({'y': 'y'}), post({'y': 'y'}), post({'y': 'z'})]
+        predict_requests = [req for req in m.request_history if req.path == '/predict']
+
+    assert results == [{'data': {'x': 'x'}}] * 3
+    # the repeated interaction is served from the cache
+    assert [json.loads(req.text)['params']['context'] for req in predict_requests] == [{'y': 'y'}, {'y': 'z'}]
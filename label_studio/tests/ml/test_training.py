@@ -0,0 +1,109 @@
+from datetime import timedelta
+
+import mock
+import pytest
+import requests_mock
+from django.core.cache import cache
+from django.utils.timezone import now
+from ml.models import MLBackend, schedule_ml_backend_training, train_ml_backend
+from projects.tests.factories import ProjectFactory
+from tasks.models import Annotation
+from tasks.tests.factories import AnnotationFactory, TaskFactory
+
+ML_URL = 'http://ml.training.test'
+
+
+@pytest.fixture
+def training_ml_backend():
+    project = ProjectFactory(min_annotations_to_start_training=2)
+    return MLBackend.objects.create(project=project, url=ML_URL)
+
+
+def train_requests(m):
+    # training is started with /webhook or /train request depending on the feature flag
+    return [request for request in m.request_history if request.path in ('/train', '/webhook')]
+
+
+@pytest.mark.django_db
+def test_burst_of_annotations_trains_once(training_ml_backend, settings):
+    settings.ML_BACKEND_TRAIN_DEBOUNCE = 60
+    project = training_ml_backend.project
+    tasks = [TaskFactory(project=project) for _ in range(6)]
+
+    with requests_mock.Mocker() as m:
+        m.post(f'{ML_URL}/train', json={})
+        m.post(f'{ML_URL}/webhook', json={})
+        AnnotationFactory(task=tasks[0], project=project)
+        assert not train_requests(m)
+        for task in tasks[1:]:
+            AnnotationFactory(task=task, project=project)
+        # annotation updates and ground truth annotations are not counted
+        Annotation.objects.first().save()
+        AnnotationFactory(task=tasks[0], project=project, ground_truth=True)
+        assert len(train_requests(m)) == 1
+
+        training_ml_backend.refresh_from_db()
+        assert training_ml_backend.annotations_since_train == 4
+
+        # the next annotation after the debounce window starts training
+        MLBackend.objects.filter(id=training_ml_backend.id).update(train_scheduled_at=now() - timedelta(seconds=61))
+        AnnotationFactory(task=tasks[1], project=project)
+        assert len(train_requests(m)) == 2
+
+    training_ml_backend.refresh_from_db()
+    assert training_ml_backend.annotations_since_train == 0
+
+
+@pytest.mark.django_db
+def test_bulk_annotations_are_counted_once(training_ml_backend):
+    project = training_ml_backend.project
+
+    with requests_mock.Mocker() as m:
+        m.post(f'{ML_URL}/train', json={})
+        m.post(f'{ML_URL}/webhook', json={})
+        MLBackend.count_new_annotations(project, 10)
+        MLBackend.count_new_annotations(project, 10)
+        assert len(train_requests(m)) == 1
+
+
+@pytest.mark.django_db
+def test_train_request_in_flight_is_not_repeated(training_ml_backend):
+    with requests_mock.Mocker() as m:
+        m.post(f'{ML_URL}/train', json={})
+        m.post(f'{ML_URL}/webhook', json={})
+        cache.add(f'ml_backend_train:{training_ml_backend.id}', True)
+        try:
+            train_ml_backend(training_ml_backend.id)
+        finally:
+            cache.delete(f'ml_backend_train:{training_ml_backend.id}')
+        assert not train_requests(m)
+
+        train_ml_backend(training_ml_backend.id)
+        assert len(train_requests(m)) == 1
+
+
+@pytest.mark.django_db
+def test_annotations_inside_debounce_window_are_trained_at_its_end(training_ml_backend, settings):
+    settings.ML_BACKEND_TRAIN_DEBOUNCE = 60
+    project = training_ml_backend.project
+    jobs = []
+
+    with mock.patch('ml.models.redis_connected', return_value=True), mock.patch(
+        'ml.models.start_job_async_or_sync', side_effect=lambda job, *args, **kwargs: jobs.append((job, kwargs))
+    ):
+        MLBackend.count_new_annotations(project, 2)
+        # the threshold is reached again inside the window, no annotation comes after it
+        MLBackend.count_new_annotations(project, 2)
+        MLBackend.count_new_annotations(project, 2)
+
+        assert [job for job, _ in jobs] == [train_ml_backend, schedule_ml_backend_training]
+        assert 0 < jobs[1][1]['in_seconds'] <= 60
+
+        # the delayed check runs at the end of the window
+        MLBackend.objects.filter(id=training_ml_backend.id).update(train_scheduled_at=now() - timedelta(seconds=61))
+        schedule_ml_backend_training(training_ml_backend.id)
+
+    assert [job for job, _ in jobs] == [train_ml_backend, schedule_ml_backend_training, train_ml_backend]
+    training_ml_backend.refresh_from_db()
+    assert training_ml_backend.annotations_since_train == 0
+    cache.delete(f'ml_backend_train_delayed:{training_ml_backend.id}')
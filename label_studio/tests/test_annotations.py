@@ -6,8 +6,12 @@ import pytest
 import requests_mock
 from django.apps import apps
 from django.urls import reverse
+from labels_manager.models import AnnotationLabel
 from projects.models import Project
-from tasks.models import Annotation, Task
+from projects.tests.factories import ProjectFactory
+from tasks.models import Annotation, AnnotationDraft, Prediction, Task, TaskLock
+from tasks.tests.factories import TaskFactory
+from users.models import User
 
 from .utils import _client_is_annotator, invite_client_to_project
 
@@ -132,6 +136,143 @@ def test_delete_annotation(business_client, configured_project):
     assert task.annotations.count() == 0
 
 
+# maximum number of queries for the annotation submit request, including authentication,
+# annotation signals, webhooks and the response
+ANNOTATION_CREATE_MAX_QUERIES = 54
+ANNOTATIONS_BULK_CREATE_MAX_QUERIES = 44
+
+
+@pytest.mark.django_db
+def test_create_annotation_query_budget(business_client, configured_project, django_assert_max_num_queries):
+    user = business_client.user
+    tasks = list(Task.objects.filter(project=configured_project).order_by('id'))
+    other_user = User.objects.create(email='other@pytest.net')
+    result = [
+        {
+            'from_name': 'text_class',
+            'to_name': 'text',
+            'type': 'choices',
+            'origin': 'manual',
+            'value': {'choices': ['class_A']},
+        }
+    ]
+
+    def submit(task, n):
+        for version in ('', 'old'):
+            for _ in range(n):
+                Prediction.objects.create(task=task, project=configured_project, result=[], model_version=version)
+        for _ in range(n):
+            AnnotationDraft.objects.create(task=task, user=other_user, result=[])
+        draft = AnnotationDraft.objects.create(task=task, user=user, result=[])
+        task.set_lock(user)
+        data = {'result': result, 'lead_time': 2.5, 'draft_id': draft.id, 'ground_truth': True}
+        with django_assert_max_num_queries(ANNOTATION_CREATE_MAX_QUERIES):
+            r = business_client.post(
+                f'/api/tasks/{task.id}/annotations/', data=json.dumps(data), content_type='application/json'
+            )
+        assert r.status_code == 201, r.content
+        return Annotation.objects.get(id=r.json()['id'])
+
+    # session related queries of the first request are not counted
+    assert business_client.get(f'/api/tasks/{tasks[0].id}/').status_code == 200
+    # the number of queries doesn't depend on the number of task predictions and drafts
+    for task, n in zip(tasks, (1, 10)):
+        annotation = submit(task, n)
+        assert annotation.prediction['model_version'] == ''
+        assert annotation.draft_created_at is not None
+        assert not AnnotationDraft.objects.filter(task=task, user=user).exists()
+        assert AnnotationDraft.objects.filter(task=task, user=other_user).count() == n
+        assert not TaskLock.objects.filter(task=task).exists()
+    user.refresh_from_db()
+    assert user.activity_at >= annotation.created_at
+
+
+@pytest.mark.django_db
+def test_create_annotations_bulk(business_client, configured_project, django_assert_max_num_queries):
+    Task.objects.bulk_create([Task(data={'text': f'text {i}'}, project=configured_project) for i in range(18)])
+    tasks = list(Task.objects.filter(project=configured_project).order_by('id'))
+
+    def result(choice):
+        return [{'from_name': 'text_class', 'to_name': 'text', 'type': 'choices', 'value': {'choices': [choice]}}]
+
+    def create(items):
+        return business_client.post(
+            '/api/annotations/bulk/',
+            data=json.dumps({'project': configured_project.id, 'annotations': items}),
+            content_type='application/json',
+        )
+
+    # session related queries of the first request are not counted
+    assert business_client.get(f'/api/tasks/{tasks[0].id}/').status_code == 200
+    with django_assert_max_num_queries(ANNOTATIONS_BULK_CREATE_MAX_QUERIES) as small:
+        r = create([{'task': tasks[0].id, 'result': result('class_A'), 'lead_time': 1}])
+    assert r.status_code == 201, r.content
+    with django_assert_max_num_queries(ANNOTATIONS_BULK_CREATE_MAX_QUERIES) as large:
+        r = create(
+            [{'task': task.id, 'result': result('class_B'), 'ground_truth': True} for task in tasks]
+            + [{'task': tasks[1].id, 'result': [], 'was_cancelled': True}]
+        )
+    assert r.status_code == 201, r.content
+    # the number of queries doesn't depend on the number of annotations (+1 is the ground truth reset)
+    assert len(large.captured_queries) <= len(small.captured_queries) + 1
+
+    ids = r.json()['ids']
+    assert len(ids) == len(tasks) + 1
+    assert list(Annotation.objects.filter(id__in=ids).order_by('id').values_list('id', flat=True)) == ids
+    assert Annotation.objects.filter(project=configured_project, ground_truth=True).count() == len(tasks)
+    assert AnnotationLabel.objects.filter(project=configured_project, label='class_B').count() == len(tasks)
+    configured_project.summary.refresh_from_db()
+    assert configured_project.summary.created_labels == {'text_class': {'class_A': 1, 'class_B': len(tasks)}}
+    for task in Task.objects.filter(project=configured_project):
+        assert task.is_labeled
+        assert task.total_annotations == (2 if task.id == tasks[0].id else 1)
+    assert Task.objects.get(id=tasks[1].id).cancelled_annotations == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'item, error',
+    [
+        ({'task': 999999, 'result': []}, 'task 999999 not found in the project'),
+        ({'result': [{'from_name': 'unknown', 'to_name': 'text', 'value': {}}]}, 'from_name="unknown"'),
+        ({'result': [{'from_name': 'text_class', 'to_name': 'meta_info', 'value': {}}]}, 'to_name="meta_info"'),
+        ({'result': {}}, '"result" field in annotation must be list'),
+        ({'result': [], 'ground_truth': 'yes'}, '"ground_truth" must be boolean'),
+    ],
+)
+def test_create_annotations_bulk_validation(business_client, configured_project, item, error):
+    task = Task.objects.filter(project=configured_project).first()
+    item = {'task': task.id, **item}
+    r = business_client.post(
+        '/api/annotations/bulk/',
+        data=json.dumps({'project': configured_project.id, 'annotations': [{'task': task.id, 'result': []}, item]}),
+        content_type='application/json',
+    )
+
+    assert r.status_code == 400
+    errors = r.json()['validation_errors']['annotations']
+    assert len(errors) == 1
+    assert errors[0].startswith('Error at item 1: ') and error in errors[0]
+    assert not Annotation.objects.filter(project=configured_project).exists()
+
+
+@pytest.mark.django_db
+def test_create_annotations_bulk_in_foreign_project(business_client):
+    project = ProjectFactory()
+    task = TaskFactory(project=project)
+
+    r = business_client.post(
+        '/api/annotations/bulk/',
+        data=json.dumps({'project': project.id, 'annotations': [{'task': task.id}, {'task': 999999}]}),
+        content_type='application/json',
+    )
+
+    # the project is not found before task ids are looked up
+    assert r.status_code == 400
+    assert list(r.json()['validation_errors']) == ['project']
+    assert not Annotation.objects.filter(project=project).exists()
+
+
 @pytest.fixture
 def annotations():
     task = Task.objects.first()
@@ -403,6 +403,36 @@ def test_webhooks_for_tasks_from_storages(configured_project, business_client, o
     assert 'project' in r.json()
 
 
+@pytest.mark.django_db
+def test_webhooks_for_tasks_from_failed_storage_sync(configured_project, organization_webhook):
+    from unittest.mock import patch
+
+    from io_storages.base_models import StorageObject
+    from io_storages.s3.models import S3ImportStorage, S3ImportStorageLink
+
+    webhook = organization_webhook
+    storage = S3ImportStorage.objects.create(project=configured_project, bucket='pytest-s3-images', use_blob_urls=True)
+    storage.info_set_queued()
+    # the second file fails after a task has been created from the first one
+    get_data = [
+        [StorageObject(key='first.jpg', task_data={'image': 's3://pytest-s3-images/first.jpg'})],
+        ValueError('broken file'),
+    ]
+
+    with patch.object(S3ImportStorage, 'iter_keys', return_value=iter(['first.jpg', 'second.jpg'])), patch.object(
+        S3ImportStorage, 'get_data', side_effect=get_data
+    ), requests_mock.Mocker(real_http=True) as m:
+        m.register_uri('POST', webhook.url)
+        with pytest.raises(ValueError, match='broken file'):
+            storage._scan_and_create_links(S3ImportStorageLink)
+
+    # the task created before the failure is still reported
+    webhook_requests = [r for r in m.request_history if r.url == webhook.url]
+    assert len(webhook_requests) == 1
+    assert webhook_requests[0].json()['action'] == WebhookAction.TASKS_CREATED
+    assert len(webhook_requests[0].json()['tasks']) == 1
+
+
 @pytest.mark.django_db
 def test_start_training_webhook(setup_project_dialog, ml_start_training_webhook, business_client):
     """
@@ -533,3 +563,137 @@ def test_webhook_no_batching_without_feature_flag(configured_project, organizati
             request_data = webhook_requests[0].json()
             assert 'tasks' in request_data
             assert len(request_data['tasks']) == 150
+
+
+@pytest.fixture
+def http_sink():
+    """Local HTTP server recording received webhooks and client connections"""
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    received = []
+    connections = set()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers['Content-Length']))
+            received.append((self.path, json.loads(body)))
+            connections.add(self.client_address)
+            self.send_response(200)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}', received, connections
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.django_db
+def test_dispatcher_delivers_to_local_sink(configured_project, http_sink):
+    from webhooks.dispatcher import WebhookDispatcher
+
+    url, received, connections = http_sink
+    webhooks = [
+        Webhook.objects.create(organization=configured_project.organization, url=f'{url}/hook{i}', send_payload=i == 0)
+        for i in range(3)
+    ]
+    dispatcher = WebhookDispatcher(max_workers=3, max_connections_per_endpoint=1)
+    try:
+        for _ in range(5):
+            responses = dispatcher.send(webhooks, WebhookAction.TASKS_CREATED, {'tasks': [{'id': 1}]})
+            assert [r.status_code for r in responses] == [200, 200, 200]
+
+        assert len(received) == 15
+        assert {path for path, _ in received} == {'/hook0', '/hook1', '/hook2'}
+        # payload is sent only to webhooks with send_payload=True
+        assert all(('tasks' in data) == (path == '/hook0') for path, data in received)
+        # a single pooled keep-alive connection serves all deliveries to the endpoint
+        assert len(connections) == 1
+
+        stats = dispatcher.stats
+        assert stats['queue_depth'] == 0
+        assert stats['endpoints'][url]['delivered'] == 15
+        assert stats['endpoints'][url]['failed'] == 0
+    finally:
+        dispatcher.close()
+
+
+@pytest.mark.django_db
+def test_emit_webhooks_for_queryset_uses_keyset_batches(configured_project, organization_webhook):
+    from unittest.mock import patch
+
+    from tasks.models import Task
+    from webhooks.utils import emit_webhooks_for_instance_sync
+
+    webhook = organization_webhook
+    ids = [Task.objects.create(data={'text': f'Test task {i}'}, project=configured_project).id for i in range(5)]
+
+    with patch('webhooks.utils.flag_set', return_value=True), patch(
+        'webhooks.utils.settings.WEBHOOK_BATCH_SIZE', 2
+    ), requests_mock.Mocker(real_http=True) as m:
+        m.register_uri('POST', webhook.url)
+        emit_webhooks_for_instance_sync(
+            webhook.organization, configured_project, WebhookAction.TASKS_CREATED, instance=ids
+        )
+
+    webhook_requests = [r for r in m.request_history if r.url == webhook.url]
+    assert [len(r.json()['tasks']) for r in webhook_requests] == [2, 2, 1]
+    assert [t['id'] for r in webhook_requests for t in r.json()['tasks']] == sorted(ids)
+
+
+@pytest.mark.django_db
+def test_webhook_event_buffer_compact_payload(configured_project, organization_webhook):
+    from tasks.models import Task
+    from webhooks.utils import WebhookEventBuffer, ids_to_ranges
+
+    assert ids_to_ranges([7, 1, 3, 2, 2]) == [[1, 3], [7, 7]]
+
+    webhook = organization_webhook
+    ids = [Task.objects.create(data={'text': f'Test task {i}'}, project=configured_project).id for i in range(5)]
+
+    with requests_mock.Mocker(real_http=True) as m:
+        m.register_uri('POST', webhook.url)
+        with WebhookEventBuffer(
+            webhook.organization, configured_project, WebhookAction.TASKS_CREATED, compact=True
+        ) as buffer:
+            for pk in ids:
+                buffer.add(pk)
+
+    webhook_requests = [r for r in m.request_history if r.url == webhook.url]
+    assert len(webhook_requests) == 1
+    payload = webhook_requests[0].json()
+    assert payload['action'] == WebhookAction.TASKS_CREATED
+    assert payload['tasks_id_ranges'] == [[ids[0], ids[-1]]]
+    assert payload['count'] == 5
+    assert 'tasks' not in payload
+    assert 'project' in payload
+
+
+@pytest.mark.django_db
+def test_webhook_event_buffer_flushes_on_max_ids(configured_project, organization_webhook):
+    from unittest.mock import patch
+
+    from tasks.models import Task
+    from webhooks.utils import WebhookEventBuffer
+
+    webhook = organization_webhook
+    tasks = [Task.objects.create(data={'text': f'Test task {i}'}, project=configured_project) for i in range(5)]
+
+    with patch('webhooks.utils.settings.WEBHOOK_COALESCE_MAX_IDS', 3), requests_mock.Mocker(real_http=True) as m:
+        m.register_uri('POST', webhook.url)
+        with WebhookEventBuffer(
+            webhook.organization, configured_project, WebhookAction.TASKS_CREATED, compact=False
+        ) as buffer:
+            buffer.add(tasks)
+            buffer.add(tasks[:1])
+
+    webhook_requests = [r for r in m.request_history if r.url == webhook.url]
+    assert [len(r.json()['tasks']) for r in webhook_requests] == [5, 1]
@@ -6,13 +6,16 @@ with batch synchronization to the database to reduce database load.
 """
 
 import logging
+import threading
+import time
 from datetime import datetime
 from typing import List, Optional, Set
 
 from core.redis import _redis, redis_connected, start_job_async_or_sync
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import transaction
+from django.db import connection, transaction
+from django.db.models import Case, DateTimeField, Q, Value, When
 from django.utils import timezone as django_timezone
 from django_rq import get_connection, job
 
@@ -28,6 +31,15 @@ USER_ACTIVITY_BATCH_KEY = f'{USER_ACTIVITY_KEY_PREFIX}_batch'
 BATCH_SIZE = getattr(settings, 'USER_ACTIVITY_BATCH_SIZE', 100)
 SYNC_THRESHOLD = getattr(settings, 'USER_ACTIVITY_SYNC_THRESHOLD', 50)
 REDIS_TTL = getattr(settings, 'USER_ACTIVITY_REDIS_TTL', 86400)  # 24 hours
+LOCAL_INTERVAL = getattr(settings, 'USER_ACTIVITY_LOCAL_INTERVAL', 30)
+SYNC_MAX_USERS = getattr(settings, 'USER_ACTIVITY_SYNC_MAX_USERS', 10000)
+# databases supporting UPDATE ... FROM (VALUES ...), others update with CASE expression
+VALUES_UPDATE_VENDORS = ('postgresql', 'sqlite')
+
+# Per-process rate limit of activity writes: user_id => monotonic time of the last write
+_recorded_activity = {}
+_recorded_activity_lock = threading.Lock()
+_RECORDED_ACTIVITY_MAX_USERS = 100000
 
 
 def _get_user_activity_key(user_id: int) -> str:
@@ -35,20 +47,42 @@ def _get_user_activity_key(user_id: int) -> str:
     return f'{USER_ACTIVITY_KEY_PREFIX}:{user_id}'
 
 
-def set_user_last_activity(user_id: int, timestamp: Optional[datetime] = None) -> bool:
+def should_record_activity(user_id: int) -> bool:
     """
-    Set user last activity timestamp in Redis.
+    Check the per-process rate limit for activity writes of a user.
+
+    Returns:
+        True if activity of the user was not recorded by this process during the last LOCAL_INTERVAL seconds
+    """
+    if LOCAL_INTERVAL <= 0:
+        return True
+
+    now = time.monotonic()
+    with _recorded_activity_lock:
+        recorded_at = _recorded_activity.get(user_id)
+        if recorded_at is not None and now - recorded_at < LOCAL_INTERVAL:
+            return False
+        if len(_recorded_activity) >= _RECORDED_ACTIVITY_MAX_USERS:
+            _recorded_activity.clear()
+        _recorded_activity[user_id] = now
+    return True
+
+
+def record_user_activity(user_id: int, timestamp: Optional[datetime] = None) -> Optional[int]:
+    """
+    Set user last activity timestamp in Redis and add the user to the sync batch.
+
+    All writes are sent in one pipeline, i.e. a single network round trip.
 
     Args:
         user_id: User ID
         timestamp: Activity timestamp (defaults to current time)
 
     Returns:
-        True if successfully set, False otherwise
+        Activity counter value after the update, None if Redis is not available
     """
-    if not redis_connected():
-        logger.warning('Redis not connected, skipping activity update for user %s', user_id)
-        return False
+    if _redis is None:
+        return None
 
     if timestamp is None:
         timestamp = django_timezone.now()
@@ -58,27 +92,39 @@ def set_user_last_activity(user_id: int, timestamp: Optional[datetime] = None) -
         timestamp_str = timestamp.isoformat()
         redis_key = _get_user_activity_key(user_id)
 
-        # Get Redis connection
-        redis_client = get_connection()
+        pipeline = get_connection().pipeline(transaction=False)
+        pipeline.setex(redis_key, REDIS_TTL, timestamp_str)
+        pipeline.sadd(USER_ACTIVITY_BATCH_KEY, user_id)
+        pipeline.expire(USER_ACTIVITY_BATCH_KEY, REDIS_TTL)
+        pipeline.incr(USER_ACTIVITY_COUNTER_KEY)
+        pipeline.expire(USER_ACTIVITY_COUNTER_KEY, REDIS_TTL)
+        current_count = pipeline.execute()[3]
 
-        # Set user activity with TTL
-        redis_client.setex(redis_key, REDIS_TTL, timestamp_str)
+        logger.debug('Updated activity for user %s, counter at %s', user_id, current_count)
+        return current_count
 
-        # Add user to batch set for later synchronization (atomic operation)
-        redis_client.sadd(USER_ACTIVITY_BATCH_KEY, user_id)
-        redis_client.expire(USER_ACTIVITY_BATCH_KEY, REDIS_TTL)
+    except Exception as e:
+        logger.error('Failed to set user activity for user %s: %s', user_id, e)
+        return None
 
-        # Increment counter
-        current_count = increment_activity_counter()
 
-        logger.debug('Updated activity for user %s, counter at %s', user_id, current_count)
+def set_user_last_activity(user_id: int, timestamp: Optional[datetime] = None) -> bool:
+    """
+    Set user last activity timestamp in Redis.
 
-        return True
+    Args:
+        user_id: User ID
+        timestamp: Activity timestamp (defaults to current time)
 
-    except Exception as e:
-        logger.error('Failed to set user activity for user %s: %s', user_id, e)
+    Returns:
+        True if successfully set, False otherwise
+    """
+    if not redis_connected():
+        logger.warning('Redis not connected, skipping activity update for user %s', user_id)
         return False
 
+    return record_user_activity(user_id, timestamp) is not None
+
 
 def get_user_last_activity(user_id: int) -> Optional[datetime]:
     """
@@ -195,6 +241,22 @@ def get_batch_user_ids() -> Set[int]:
         return set()
 
 
+def pop_batch_user_ids(count: int) -> Set[int]:
+    """
+    Atomically remove and return up to `count` user IDs from batch set.
+
+    Returns:
+        Set of user IDs to be synchronized
+    """
+    try:
+        user_ids = get_connection().spop(USER_ACTIVITY_BATCH_KEY, count) or []
+        return {int(uid) for uid in user_ids if uid}
+
+    except Exception as e:
+        logger.error('Failed to pop batch user IDs: %s', e)
+        return set()
+
+
 def clear_batch_user_ids(user_ids: Optional[Set[int]] = None) -> bool:
     """
     Clear user IDs from batch set.
@@ -227,14 +289,18 @@ def clear_batch_user_ids(user_ids: Optional[Set[int]] = None) -> bool:
         return False
 
 
-def should_sync_activities() -> bool:
+def should_sync_activities(current_count: Optional[int] = None) -> bool:
     """
     Check if activities should be synchronized to database.
 
+    Args:
+        current_count: Known activity counter value (read from Redis if not provided)
+
     Returns:
         True if sync threshold is reached, False otherwise
     """
-    current_count = get_activity_counter()
+    if current_count is None:
+        current_count = get_activity_counter()
     should_sync = current_count >= SYNC_THRESHOLD
 
     if should_sync:
@@ -253,19 +319,26 @@ def get_user_activities_for_sync(user_ids: Set[int]) -> List[dict]:
     Returns:
         List of dictionaries with user_id and last_activity
     """
-    if not redis_connected():
+    if not redis_connected() or not user_ids:
         return []
 
-    activities = []
+    user_ids = list(user_ids)
+    try:
+        values = get_connection().mget([_get_user_activity_key(user_id) for user_id in user_ids])
+    except Exception as e:
+        logger.error('Failed to get activities during sync: %s', e)
+        return []
 
-    for user_id in user_ids:
-        try:
-            timestamp = get_user_last_activity(user_id)
-            if timestamp:
-                activities.append({'user_id': user_id, 'last_activity': timestamp})
-        except Exception as e:
-            logger.error('Failed to get activity for user %s during sync: %s', user_id, e)
+    activities = []
+    for user_id, timestamp_str in zip(user_ids, values):
+        if not timestamp_str:
             continue
+        try:
+            if isinstance(timestamp_str, bytes):
+                timestamp_str = timestamp_str.decode('utf-8')
+            activities.append({'user_id': user_id, 'last_activity': datetime.fromisoformat(timestamp_str)})
+        except ValueError as e:
+            logger.error('Failed to parse activity for user %s during sync: %s', user_id, e)
 
     return activities
 
@@ -284,15 +357,14 @@ def cleanup_redis_activity_data(user_ids: Set[int]) -> bool:
         return False
 
     try:
-        redis_client = get_connection()
-
-        # Delete individual user activity keys
-        keys_to_delete = [_get_user_activity_key(user_id) for user_id in user_ids]
-        if keys_to_delete:
-            redis_client.delete(*keys_to_delete)
+        if not user_ids:
+            return True
 
-        # Remove from batch set
-        clear_batch_user_ids(user_ids)
+        # Delete individual user activity keys and remove users from batch set in one round trip
+        pipeline = get_connection().pipeline(transaction=False)
+        pipeline.delete(*[_get_user_activity_key(user_id) for user_id in user_ids])
+        pipeline.srem(USER_ACTIVITY_BATCH_KEY, *user_ids)
+        pipeline.execute()
 
         logger.debug('Cleaned up Redis data for %s users', len(user_ids))
         return True
@@ -307,57 +379,57 @@ def sync_user_activities_to_db(max_users: int = None) -> dict:
     """
     Synchronize user activities from Redis to database.
 
+    The batch set is drained with SPOP in chunks of BATCH_SIZE users, each chunk is written
+    with a single bulk UPDATE. If a chunk fails, its users are returned to the batch set.
+
     Args:
-        max_users: Maximum number of users to process (defaults to BATCH_SIZE)
+        max_users: Maximum number of users to process (defaults to USER_ACTIVITY_SYNC_MAX_USERS)
 
     Returns:
         Dictionary with sync results
     """
     if max_users is None:
-        max_users = BATCH_SIZE
+        max_users = SYNC_MAX_USERS
 
     logger.info('Starting user activity sync to database')
+    result = {'success': True, 'processed': 0, 'errors': 0, 'updated': 0}
 
     try:
-        # Get user IDs to sync
-        user_ids = get_batch_user_ids()
-
-        if not user_ids:
-            logger.info('No user activities to sync')
-            return {'success': True, 'processed': 0, 'errors': 0, 'message': 'No activities to sync'}
-
-        # Limit batch size
-        if len(user_ids) > max_users:
-            user_ids = set(list(user_ids)[:max_users])
-            logger.info('Limited batch to %s users', max_users)
-
-        logger.info('Syncing activities for %s users', len(user_ids))
-
-        # Get activity data from Redis
-        activities = get_user_activities_for_sync(user_ids)
-
-        if not activities:
-            logger.warning('No activity data found for %s users', len(user_ids))
-            # Still clean up the batch set
-            cleanup_redis_activity_data(user_ids)
-            return {'success': True, 'processed': 0, 'errors': len(user_ids), 'message': 'No activity data found'}
-
-        # Sync to database
-        sync_result = _bulk_update_user_activities(activities)
-
-        if sync_result['success']:
-            # Clean up Redis data only if database sync was successful
-            cleanup_redis_activity_data(user_ids)
-
-            # Reset counter only if we processed all pending activities
-            # or if remaining users are below the threshold
-            remaining_users = get_batch_user_ids()
-            if not remaining_users or len(remaining_users) < SYNC_THRESHOLD:
+        if not redis_connected():
+            return {'success': False, 'processed': 0, 'errors': 1, 'message': 'Redis not connected'}
+
+        remaining = max_users
+        while remaining > 0:
+            user_ids = pop_batch_user_ids(min(BATCH_SIZE, remaining))
+            if not user_ids:
+                break
+            remaining -= len(user_ids)
+
+            activities = get_user_activities_for_sync(user_ids)
+            sync_result = _bulk_update_user_activities(activities)
+            if not sync_result['success']:
+                # return users to the batch to retry with the next sync
+                get_connection().sadd(USER_ACTIVITY_BATCH_KEY, *user_ids)
+                result.update(sync_result)
+                break
+
+            # activity keys are kept until they expire: a user could become active again after SPOP,
+            # and the key is still the freshest source for get_user_last_activity
+            result['processed'] += sync_result['processed']
+            result['errors'] += sync_result['errors'] + len(user_ids) - len(activities)
+            result['updated'] += sync_result.get('updated', 0)
+
+        if result['success']:
+            # reset counter only if remaining users are below the threshold, otherwise the next sync is due at once
+            remaining_users = get_connection().scard(USER_ACTIVITY_BATCH_KEY)
+            if remaining_users < SYNC_THRESHOLD:
                 reset_activity_counter()
-                logger.info('Reset activity counter after successful sync (remaining users: %s)', len(remaining_users))
+                logger.info('Reset activity counter after successful sync (remaining users: %s)', remaining_users)
 
-        logger.info('Activity sync completed: %s', sync_result)
-        return sync_result
+        if not result['processed'] and not result['errors']:
+            result['message'] = 'No activities to sync'
+        logger.info('Activity sync completed: %s', result)
+        return result
 
     except Exception as e:
         logger.error('Failed to sync user activities: %s', e, exc_info=True)
@@ -366,7 +438,7 @@ def sync_user_activities_to_db(max_users: int = None) -> dict:
 
 def _bulk_update_user_activities(activities: List[dict]) -> dict:
     """
-    Bulk update user activities in database.
+    Bulk update user activities in database with one UPDATE statement per chunk.
 
     Args:
         activities: List of activity dictionaries
@@ -377,71 +449,87 @@ def _bulk_update_user_activities(activities: List[dict]) -> dict:
     if not activities:
         return {'success': True, 'processed': 0, 'errors': 0}
 
-    processed = 0
-    errors = 0
+    User = get_user_model()
+    # the latest activity per user
+    latest = {}
+    for activity in activities:
+        user_id, new_activity = activity['user_id'], activity['last_activity']
+        if user_id not in latest or new_activity > latest[user_id]:
+            latest[user_id] = new_activity
 
     try:
         with transaction.atomic():
-            # Get existing users
-            User = get_user_model()
-            user_ids = [activity['user_id'] for activity in activities]
-            existing_users = User.objects.filter(id__in=user_ids).only('id', 'last_activity')
-            user_dict = {user.id: user for user in existing_users}
-
-            # Update activities
-            users_to_update = []
-
-            for activity in activities:
-                user_id = activity['user_id']
-                new_activity = activity['last_activity']
-
-                user = user_dict.get(user_id)
-                if user:
-                    # Only update if the new activity is more recent
-                    if user.last_activity is None or new_activity > user.last_activity:
-                        user.last_activity = new_activity
-                        users_to_update.append(user)
-                        processed += 1
-                    else:
-                        logger.debug(
-                            'Skipping outdated activity for user %s: %s <= %s',
-                            user_id,
-                            new_activity,
-                            user.last_activity,
-                        )
-                        processed += 1
-                else:
-                    logger.warning('User %s not found in database', user_id)
-                    errors += 1
-
-            # Bulk update
-            if users_to_update:
-                User.objects.bulk_update(users_to_update, ['last_activity'], batch_size=100)
-                logger.info('Bulk updated %s users', len(users_to_update))
-
-            return {'success': True, 'processed': processed, 'errors': errors, 'updated': len(users_to_update)}
+            existing_ids = set(User.objects.filter(id__in=list(latest)).values_list('id', flat=True))
+            errors = len(latest) - len(existing_ids)
+            if errors:
+                logger.warning('Users %s not found in database', set(latest) - existing_ids)
+
+            values = [(user_id, latest[user_id]) for user_id in existing_ids]
+            if connection.vendor in VALUES_UPDATE_VENDORS:
+                update_chunk = _update_last_activity_from_values
+            else:
+                update_chunk = _update_last_activity_case
+            updated = 0
+            for i in range(0, len(values), BATCH_SIZE):
+                updated += update_chunk(User, values[i : i + BATCH_SIZE])
+
+            logger.info('Bulk updated %s users', updated)
+            return {'success': True, 'processed': len(existing_ids), 'errors': errors, 'updated': updated}
 
     except Exception as e:
         logger.error('Failed to bulk update user activities: %s', e, exc_info=True)
         return {
             'success': False,
-            'processed': processed,
-            'errors': errors + 1,
+            'processed': 0,
+            'errors': len(latest),
             'message': f'Bulk update failed: {str(e)}',
         }
 
 
-def schedule_activity_sync(force: bool = False) -> bool:
+def _update_last_activity_from_values(User, values: List[tuple]) -> int:
+    """Update last_activity of (user_id, activity) pairs with one UPDATE ... FROM (VALUES ...) statement"""
+    table = connection.ops.quote_name(User._meta.db_table)
+    params = []
+    for user_id, new_activity in values:
+        params += [user_id, connection.ops.adapt_datetimefield_value(new_activity)]
+    rows = ', '.join(['(%s, %s)'] * len(values))
+    # only update if the new activity is more recent
+    # VALUES columns are named column1, column2 both in PostgreSQL and SQLite
+    sql = (
+        f'UPDATE {table} SET last_activity = activity.column2 FROM (VALUES {rows}) AS activity '
+        f'WHERE {table}.id = activity.column1 '
+        f'AND ({table}.last_activity IS NULL OR {table}.last_activity < activity.column2)'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def _update_last_activity_case(User, values: List[tuple]) -> int:
+    """Update last_activity of (user_id, activity) pairs with one UPDATE ... CASE statement for other databases"""
+    new_activity = Case(
+        *[When(id=user_id, then=Value(activity)) for user_id, activity in values],
+        output_field=DateTimeField(),
+    )
+    return (
+        User.objects.filter(id__in=[user_id for user_id, _ in values])
+        .filter(Q(last_activity__isnull=True) | Q(last_activity__lt=new_activity))
+        .update(last_activity=new_activity)
+    )
+
+
+def schedule_activity_sync(force: bool = False, current_count: Optional[int] = None) -> bool:
     """
     Schedule user activity synchronization if needed.
 
     Args:
         force: Force sync even if threshold not reached
+        current_count: Known activity counter value (read from Redis if not provided)
 
     Returns:
         True if sync was scheduled, False otherwise
     """
-    if not force and not should_sync_activities():
+    if not force and not should_sync_activities(current_count):
         logger.debug('Sync threshold not reached, skipping')
         return False
 
@@ -18,7 +18,12 @@ from django.utils.translation import gettext_lazy as _
 from organizations.models import Organization
 from rest_framework.authtoken.models import Token
 from users.functions import hash_upload
-from users.functions.last_activity import get_user_last_activity, schedule_activity_sync, set_user_last_activity
+from users.functions.last_activity import (
+    get_user_last_activity,
+    record_user_activity,
+    schedule_activity_sync,
+    should_record_activity,
+)
 
 YEAR_START = 1980
 YEAR_CHOICES = []
@@ -67,17 +72,24 @@ class UserLastActivityMixin(models.Model):
     last_activity = models.DateTimeField(_('last activity'), default=timezone.now, editable=False)
 
     def update_last_activity(self):
-        """Update user's last activity timestamp using Redis caching."""
+        """Update user's last activity timestamp using Redis caching.
+
+        Activity of the same user is recorded at most once per settings.USER_ACTIVITY_LOCAL_INTERVAL
+        seconds in each process.
+        """
+        if not should_record_activity(self.id):
+            return
+
         current_time = timezone.now()
 
         if flag_set('fflag_fix_back_plt_840_redis_last_activity_29072025_short', user='auto'):
-            redis_success = set_user_last_activity(self.id, current_time)
+            activity_count = record_user_activity(self.id, current_time)
 
-            if not redis_success:
+            if activity_count is None:
                 self.last_activity = current_time
                 self.save(update_fields=['last_activity'])
             else:
-                schedule_activity_sync()
+                schedule_activity_sync(current_count=activity_count)
         else:
             self.last_activity = current_time
             self.save(update_fields=['last_activity'])
@@ -19,6 +19,7 @@ from users.functions.last_activity import (
     get_batch_user_ids,
     get_user_last_activity,
     increment_activity_counter,
+    record_user_activity,
     reset_activity_counter,
     set_user_last_activity,
     should_sync_activities,
@@ -43,18 +44,24 @@ class TestRedisActivity(TestCase):
     @patch('users.functions.last_activity.redis_connected', return_value=True)
     @patch('users.functions.last_activity.get_connection')
     def test_set_user_last_activity_success(self, mock_get_connection, mock_redis_connected):
-        """Test successful setting of user activity."""
+        """Test successful setting of user activity in a single pipeline."""
         mock_redis_client = MagicMock()
         mock_get_connection.return_value = mock_redis_client
-        mock_redis_client.incr.return_value = 1
+        mock_pipeline = mock_redis_client.pipeline.return_value
+        mock_pipeline.execute.return_value = [True, 1, True, 1, True]
 
-        result = set_user_last_activity(self.user.id, self.test_time)
+        with patch('users.functions.last_activity._redis', MagicMock()):
+            result = set_user_last_activity(self.user.id, self.test_time)
 
         self.assertTrue(result)
-        mock_redis_client.setex.assert_called_once()
-        mock_redis_client.sadd.assert_called_once()
-        self.assertEqual(mock_redis_client.expire.call_count, 2)  # One for batch key, one for counter
-        mock_redis_client.incr.assert_called_once()
+        mock_pipeline.setex.assert_called_once()
+        mock_pipeline.sadd.assert_called_once()
+        self.assertEqual(mock_pipeline.expire.call_count, 2)  # One for batch key, one for counter
+        mock_pipeline.incr.assert_called_once()
+        mock_pipeline.execute.assert_called_once()
+        # nothing is sent outside of the pipeline
+        mock_redis_client.setex.assert_not_called()
+        mock_redis_client.incr.assert_not_called()
 
     @patch('users.functions.last_activity.redis_connected', return_value=False)
     def test_set_user_last_activity_redis_disconnected(self, mock_redis_connected):
@@ -189,32 +196,44 @@ class TestUserLastActivityMixin(TestCase):
     """Test UserLastActivityMixin methods."""
 
     def setUp(self):
+        from users.functions.last_activity import _recorded_activity
+
         self.user = User.objects.create_user(email='test@example.com', username='testuser', password='testpass123')
+        _recorded_activity.clear()
 
-    @patch('users.models.set_user_last_activity')
+    @patch('users.models.record_user_activity')
     @patch('users.models.schedule_activity_sync')
-    def test_update_last_activity_redis_success(self, mock_schedule, mock_set_activity):
+    def test_update_last_activity_redis_success(self, mock_schedule, mock_record_activity):
         """Test updating last activity with Redis success."""
-        mock_set_activity.return_value = True
+        mock_record_activity.return_value = 7
 
         self.user.update_last_activity()
 
-        mock_set_activity.assert_called_once()
-        mock_schedule.assert_called_once()
+        mock_record_activity.assert_called_once()
+        mock_schedule.assert_called_once_with(current_count=7)
 
-    @patch('users.models.set_user_last_activity')
-    def test_update_last_activity_redis_failure(self, mock_set_activity):
+    @patch('users.models.record_user_activity')
+    def test_update_last_activity_redis_failure(self, mock_record_activity):
         """Test updating last activity with Redis failure (fallback to DB)."""
-        mock_set_activity.return_value = False
+        mock_record_activity.return_value = None
         original_activity = self.user.last_activity
 
         self.user.update_last_activity()
 
-        mock_set_activity.assert_called_once()
+        mock_record_activity.assert_called_once()
         # Check that database was updated
         self.user.refresh_from_db()
         self.assertNotEqual(self.user.last_activity, original_activity)
 
+    @patch('users.models.record_user_activity', return_value=1)
+    @patch('users.models.schedule_activity_sync')
+    def test_update_last_activity_rate_limited(self, mock_schedule, mock_record_activity):
+        """Test that activity of the same user is recorded once per interval in a process."""
+        self.user.update_last_activity()
+        self.user.update_last_activity()
+
+        mock_record_activity.assert_called_once()
+
     @patch('users.models.get_user_last_activity')
     def test_get_last_activity_cached(self, mock_get_activity):
         """Test getting cached last activity."""
@@ -292,6 +311,29 @@ class TestSyncTasks(TestCase):
         self.user.refresh_from_db()
         self.assertEqual(self.user.last_activity, future_time)
 
+    def test_bulk_update_user_activities_without_values_update(self):
+        """Test bulk update with CASE expression on databases without UPDATE ... FROM (VALUES ...)."""
+        other_user = User.objects.create_user(email='other@example.com', username='other', password='testpass123')
+        future_time = timezone.now() + timedelta(hours=1)
+        other_user.last_activity = future_time
+        other_user.save()
+
+        test_time = timezone.now()
+        activities = [
+            {'user_id': self.user.id, 'last_activity': test_time},
+            {'user_id': other_user.id, 'last_activity': test_time},
+        ]
+        with patch('users.functions.last_activity.VALUES_UPDATE_VENDORS', ()):
+            result = _bulk_update_user_activities(activities)
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['processed'], 2)
+        self.assertEqual(result['updated'], 1)
+        self.user.refresh_from_db()
+        other_user.refresh_from_db()
+        self.assertEqual(self.user.last_activity, test_time)
+        self.assertEqual(other_user.last_activity, future_time)
+
     def test_bulk_update_user_activities_empty_list(self):
         """Test bulk update with empty activities list."""
         result = _bulk_update_user_activities([])
@@ -299,3 +341,61 @@ class TestSyncTasks(TestCase):
         self.assertTrue(result['success'])
         self.assertEqual(result['processed'], 0)
         self.assertEqual(result['errors'], 0)
+
+
+class TestSyncDrain(TestCase):
+    """Test draining the batch set into the database."""
+
+    def setUp(self):
+        from fakeredis import FakeRedis
+
+        self.redis = FakeRedis()
+        self.users = [
+            User.objects.create_user(email=f'test{i}@example.com', username=f'testuser{i}', password='testpass123')
+            for i in range(5)
+        ]
+        self.test_time = timezone.now() + timedelta(minutes=1)
+
+    def test_sync_drains_batch_in_chunks(self):
+        """Test that all users are popped in chunks and updated in the database."""
+        from users.functions.last_activity import USER_ACTIVITY_BATCH_KEY, sync_user_activities_to_db
+
+        with patch('users.functions.last_activity.get_connection', return_value=self.redis), patch(
+            'users.functions.last_activity._redis', self.redis
+        ), patch('users.functions.last_activity.redis_connected', return_value=True), patch(
+            'users.functions.last_activity.BATCH_SIZE', 2
+        ):
+            for user in self.users:
+                self.assertIsNotNone(record_user_activity(user.id, self.test_time))
+            self.assertEqual(get_activity_counter(), 5)
+
+            result = sync_user_activities_to_db()
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['processed'], 5)
+        self.assertEqual(result['updated'], 5)
+        self.assertEqual(self.redis.scard(USER_ACTIVITY_BATCH_KEY), 0)
+        for user in self.users:
+            user.refresh_from_db()
+            self.assertEqual(user.last_activity, self.test_time)
+
+    def test_sync_keeps_counter_while_many_users_remain(self):
+        """Test that the counter is reset only when remaining users are below the threshold."""
+        from users.functions.last_activity import USER_ACTIVITY_BATCH_KEY, sync_user_activities_to_db
+
+        with patch('users.functions.last_activity.get_connection', return_value=self.redis), patch(
+            'users.functions.last_activity._redis', self.redis
+        ), patch('users.functions.last_activity.redis_connected', return_value=True), patch(
+            'users.functions.last_activity.SYNC_THRESHOLD', 3
+        ):
+            for user in self.users:
+                record_user_activity(user.id, self.test_time)
+
+            result = sync_user_activities_to_db(max_users=2)
+            self.assertTrue(result['success'])
+            self.assertEqual(self.redis.scard(USER_ACTIVITY_BATCH_KEY), 3)
+            self.assertEqual(get_activity_counter(), 5)
+
+            sync_user_activities_to_db(max_users=2)
+            self.assertEqual(self.redis.scard(USER_ACTIVITY_BATCH_KEY), 1)
+            self.assertEqual(get_activity_counter(), 0)
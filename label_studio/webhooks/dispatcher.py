@@ -0,0 +1,146 @@
+"""Webhook delivery with pooled HTTP sessions and bounded concurrency.
+
+One dispatcher exists per process. It keeps a keep-alive requests.Session per endpoint
+(scheme + host + port), limits simultaneous requests to the same endpoint and delivers
+a payload to several webhooks concurrently using a shared thread pool.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+class WebhookDispatcher:
+    def __init__(self, max_workers=None, max_connections_per_endpoint=None):
+        self.max_workers = max_workers or settings.WEBHOOK_MAX_CONCURRENCY
+        self.max_connections_per_endpoint = (
+            max_connections_per_endpoint or settings.WEBHOOK_MAX_CONNECTIONS_PER_ENDPOINT
+        )
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='webhook')
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._endpoint_slots = {}
+        self._queue_depth = 0
+        self._stats = defaultdict(lambda: {'delivered': 0, 'failed': 0, 'latency_total': 0.0, 'latency_max': 0.0})
+
+    @staticmethod
+    def endpoint(url):
+        parts = urlsplit(url)
+        return f'{parts.scheme}://{parts.netloc}'
+
+    def _get_session(self, endpoint):
+        with self._lock:
+            if endpoint not in self._sessions:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_connections_per_endpoint)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._sessions[endpoint] = session
+                self._endpoint_slots[endpoint] = threading.BoundedSemaphore(self.max_connections_per_endpoint)
+            return self._sessions[endpoint], self._endpoint_slots[endpoint]
+
+    def _post(self, webhook, action, body):
+        """Send prepared JSON body to webhook. This function must not raise any exceptions."""
+        endpoint = self.endpoint(webhook.url)
+        session, slots = self._get_session(endpoint)
+        headers = {'Content-Type': 'application/json', **(webhook.headers or {})}
+        started = time.monotonic()
+        try:
+            logger.debug('Run webhook %s for action %s', webhook.id, action)
+            with slots:
+                response = session.post(webhook.url, headers=headers, data=body, timeout=settings.WEBHOOK_TIMEOUT)
+        except requests.RequestException as exc:
+            logger.error(exc, exc_info=True)
+            response = None
+        finally:
+            self._record(endpoint, time.monotonic() - started, failed=response is None)
+        return response
+
+    def _record(self, endpoint, latency, failed):
+        with self._lock:
+            stats = self._stats[endpoint]
+            stats['failed' if failed else 'delivered'] += 1
+            stats['latency_total'] += latency
+            stats['latency_max'] = max(stats['latency_max'], latency)
+
+    def _run(self, webhook, action, body):
+        try:
+            return self._post(webhook, action, body)
+        finally:
+            with self._lock:
+                self._queue_depth -= 1
+
+    @staticmethod
+    def serialize(action, payload=None):
+        """Return JSON bodies (without payload, with payload) for action; payload is serialized once"""
+        data = {'action': action}
+        body = json.dumps(data).encode()
+        if not payload:
+            return body, body
+        data.update(payload)
+        return body, json.dumps(data).encode()
+
+    def send(self, webhooks, action, payload=None):
+        """Deliver action to all webhooks concurrently and wait for completion.
+
+        :return: List of responses (None for failed deliveries) in the order of webhooks
+        """
+        webhooks = list(webhooks)
+        if not webhooks:
+            return []
+        body, body_with_payload = self.serialize(action, payload)
+        bodies = [body_with_payload if webhook.send_payload else body for webhook in webhooks]
+
+        if len(webhooks) == 1:
+            return [self._post(webhooks[0], action, bodies[0])]
+
+        with self._lock:
+            self._queue_depth += len(webhooks)
+        futures = [self._executor.submit(self._run, webhook, action, b) for webhook, b in zip(webhooks, bodies)]
+        return [future.result() for future in futures]
+
+    @property
+    def stats(self):
+        """Delivery metrics: current queue depth and per-endpoint counters and latency in seconds"""
+        with self._lock:
+            endpoints = {}
+            for endpoint, stats in self._stats.items():
+                total = stats['delivered'] + stats['failed']
+                endpoints[endpoint] = {
+                    **stats,
+                    'latency_avg': stats['latency_total'] / total if total else 0.0,
+                }
+            return {'queue_depth': self._queue_depth, 'endpoints': endpoints}
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+            self._endpoint_slots.clear()
+
+
+_dispatcher = None
+_dispatcher_pid = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_webhook_dispatcher():
+    """Return the process-wide dispatcher, re-created after fork (e.g. in RQ work horses)"""
+    global _dispatcher, _dispatcher_pid
+    with _dispatcher_lock:
+        if _dispatcher is None or _dispatcher_pid != os.getpid():
+            _dispatcher = WebhookDispatcher()
+            _dispatcher_pid = os.getpid()
+        return _dispatcher
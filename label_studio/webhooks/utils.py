@@ -1,14 +1,15 @@
 import logging
+import time
 from functools import wraps
 
-import requests
 from core.feature_flags import flag_set
 from core.redis import start_job_async_or_sync
 from core.utils.common import load_func
 from django.conf import settings
-from django.db.models import Q
+from django.db.models import Q, prefetch_related_objects
 from django.db.models.query import QuerySet
 
+from .dispatcher import get_webhook_dispatcher
 from .models import Webhook, WebhookAction
 
 logger = logging.getLogger(__name__)
@@ -45,70 +46,92 @@ def run_webhook_sync(webhook, action, payload=None):
 
     This function must not raise any exceptions.
     """
-    data = {
-        'action': action,
-    }
-    if webhook.send_payload and payload:
-        data.update(payload)
-    try:
-        logging.debug('Run webhook %s for action %s', webhook.id, action)
-        return requests.post(
-            webhook.url,
-            headers=webhook.headers,
-            json=data,
-            timeout=settings.WEBHOOK_TIMEOUT,
-        )
-    except requests.RequestException as exc:
-        logging.error(exc, exc_info=True)
-        return
+    return get_webhook_dispatcher().send([webhook], action, payload)[0]
 
 
 def emit_webhooks_sync(organization, project, action, payload):
     """
     Run all active webhooks for the action.
     """
-    webhooks = get_active_webhooks(organization, project, action)
-    if project and payload and webhooks.filter(send_payload=True).exists():
+    webhooks = list(get_active_webhooks(organization, project, action))
+    if project and payload and any(wh.send_payload for wh in webhooks):
         payload['project'] = load_func(settings.WEBHOOK_SERIALIZERS['project'])(instance=project).data
-    for wh in webhooks:
-        run_webhook_sync(wh, action, payload)
+    get_webhook_dispatcher().send(webhooks, action, payload)
 
 
-def _process_webhook_batch(webhooks, project, action, batch, action_meta):
+def _process_webhook_batch(webhooks, project, action, batch, action_meta, project_data=None):
     """Process a single batch of instances for webhooks.
 
     Args:
-        webhooks: Active webhooks to send
+        webhooks: Active webhooks to send (list)
         project: Project instance (optional)
         action: Action name
         batch: Batch of instances to process
         action_meta: Action metadata from WebhookAction.ACTIONS
+        project_data: Already serialized project, to avoid serializing it for every batch
     """
     payload = {}
 
-    if batch and webhooks.filter(send_payload=True).exists():
+    if batch and any(wh.send_payload for wh in webhooks):
         serializer_class = action_meta.get('serializer')
         if serializer_class:
             payload[action_meta['key']] = serializer_class(instance=batch, many=action_meta['many']).data
         if project and payload:
-            payload['project'] = load_func(settings.WEBHOOK_SERIALIZERS['project'])(instance=project).data
+            if project_data is None:
+                project_data = load_func(settings.WEBHOOK_SERIALIZERS['project'])(instance=project).data
+            payload['project'] = project_data
         if payload and 'nested-fields' in action_meta:
+            if isinstance(batch, list):
+                _prefetch_nested_fields(batch, action_meta['nested-fields'])
             for key, value in action_meta['nested-fields'].items():
                 payload[key] = value['serializer'](
                     instance=get_nested_field(batch, value['field']), many=value['many']
                 ).data
 
-    for wh in webhooks:
-        run_webhook_sync(wh, action, payload)
+    get_webhook_dispatcher().send(webhooks, action, payload)
+
 
+def _prefetch_nested_fields(batch, nested_fields):
+    """Load nested instances of a batch with one query per relation instead of one per instance.
 
-def emit_webhooks_for_instance_sync(organization, project, action, instance=None):
+    Nested serializers use the project and many-to-many fields of nested instances, so they are prefetched too.
+    """
+    for value in nested_fields.values():
+        if value['field'] == '__self__':
+            continue
+        prefetch_related_objects(batch, value['field'])
+        nested = [obj for obj in get_nested_field(batch, value['field']) if obj is not None]
+        if not nested:
+            continue
+        lookups = [field.name for field in nested[0]._meta.many_to_many]
+        if hasattr(nested[0], 'project_id'):
+            lookups.append('project')
+        prefetch_related_objects(nested, *lookups)
+
+
+def _iter_queryset_batches(queryset, batch_size):
+    """Iterate over queryset in batches using keyset pagination by primary key"""
+    last_pk = None
+    queryset = queryset.order_by('pk')
+    while True:
+        batch_qs = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        batch = list(batch_qs[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last_pk = batch[-1].pk
+
+
+def emit_webhooks_for_instance_sync(organization, project, action, instance=None, webhooks=None):
     """Run all active webhooks for the action using instances as payload.
 
     Be sure WebhookAction.ACTIONS contains all required fields.
+    If webhooks are not passed, active webhooks are resolved for organization/project/action.
     """
-    webhooks = get_active_webhooks(organization, project, action)
-    if not webhooks.exists():
+    if webhooks is None:
+        webhooks = get_active_webhooks(organization, project, action)
+    webhooks = list(webhooks)
+    if not webhooks:
         return
 
     action_meta = WebhookAction.ACTIONS[action]
@@ -124,15 +147,15 @@ def emit_webhooks_for_instance_sync(organization, project, action, instance=None
     if use_batching:
         # Process in batches
         batch_size = settings.WEBHOOK_BATCH_SIZE
+        project_data = None
+        if project and any(wh.send_payload for wh in webhooks):
+            project_data = load_func(settings.WEBHOOK_SERIALIZERS['project'])(instance=project).data
 
         if isinstance(instance, QuerySet):
-            # For QuerySets, use iterator with chunk_size
-            total_count = instance.count()
-            logger.debug(f'Processing webhook for {total_count} instances in batches of {batch_size}')
-            for i in range(0, total_count, batch_size):
-                batch = instance[i : i + batch_size]
-                logger.debug(f'Processing batch {i // batch_size + 1} with {batch.count()} instances')
-                _process_webhook_batch(webhooks, project, action, batch, action_meta)
+            logger.debug(f'Processing webhook for instances in batches of {batch_size}')
+            for i, batch in enumerate(_iter_queryset_batches(instance, batch_size)):
+                logger.debug(f'Processing batch {i + 1} with {len(batch)} instances')
+                _process_webhook_batch(webhooks, project, action, batch, action_meta, project_data)
         else:
             # For lists, slice directly
             total_count = len(instance)
@@ -140,7 +163,7 @@ def emit_webhooks_for_instance_sync(organization, project, action, instance=None
             for i in range(0, len(instance), batch_size):
                 batch = instance[i : i + batch_size]
                 logger.debug(f'Processing batch {i // batch_size + 1} with {len(batch)} instances')
-                _process_webhook_batch(webhooks, project, action, batch, action_meta)
+                _process_webhook_batch(webhooks, project, action, batch, action_meta, project_data)
     else:
         # Original behavior - process all at once
         _process_webhook_batch(webhooks, project, action, instance, action_meta)
@@ -165,7 +188,7 @@ def run_webhook(webhook, action, payload=None):
         run_webhook_sync(webhook, action, payload)
 
 
-def emit_webhooks_for_instance(organization, project, action, instance=None):
+def emit_webhooks_for_instance(organization, project, action, instance=None, webhooks=None):
     """Run all active webhooks for the action using instances as payload.
 
     Be sure WebhookAction.ACTIONS contains all required fields.
@@ -173,9 +196,120 @@ def emit_webhooks_for_instance(organization, project, action, instance=None):
     Will run all selected webhooks in an RQ worker.
     """
     if flag_set('fflag_fix_back_lsdv_4604_excess_sql_queries_in_api_short'):
-        start_job_async_or_sync(emit_webhooks_for_instance_sync, organization, project, action, instance)
+        start_job_async_or_sync(
+            emit_webhooks_for_instance_sync, organization, project, action, instance, webhooks=webhooks
+        )
+    else:
+        emit_webhooks_for_instance_sync(organization, project, action, instance, webhooks=webhooks)
+
+
+def ids_to_ranges(ids):
+    """Collapse ids into sorted inclusive ranges: [1, 2, 3, 7] => [[1, 3], [7, 7]]"""
+    ranges = []
+    for pk in sorted(set(ids)):
+        if ranges and pk == ranges[-1][1] + 1:
+            ranges[-1][1] = pk
+        else:
+            ranges.append([pk, pk])
+    return ranges
+
+
+def emit_webhooks_for_id_ranges_sync(organization, project, action, ids, webhooks=None):
+    """Run all active webhooks for the action with a compact payload of instance id ranges.
+
+    Payload example for TASKS_CREATED: {"action": ..., "project": {...}, "tasks_id_ranges": [[1, 100]], "count": 100}
+    """
+    if webhooks is None:
+        webhooks = get_active_webhooks(organization, project, action)
+    webhooks = list(webhooks)
+    if not webhooks:
+        return
+
+    action_meta = WebhookAction.ACTIONS[action]
+    payload = {f'{action_meta["key"]}_id_ranges': ids_to_ranges(ids), 'count': len(set(ids))}
+    if project and any(wh.send_payload for wh in webhooks):
+        payload['project'] = load_func(settings.WEBHOOK_SERIALIZERS['project'])(instance=project).data
+    get_webhook_dispatcher().send(webhooks, action, payload)
+
+
+def emit_webhooks_for_id_ranges(organization, project, action, ids, webhooks=None):
+    """Run all active webhooks for the action with id ranges as payload in an RQ worker"""
+    if flag_set('fflag_fix_back_lsdv_4604_excess_sql_queries_in_api_short'):
+        start_job_async_or_sync(
+            emit_webhooks_for_id_ranges_sync, organization, project, action, ids, webhooks=webhooks
+        )
     else:
-        emit_webhooks_for_instance_sync(organization, project, action, instance)
+        emit_webhooks_for_id_ranges_sync(organization, project, action, ids, webhooks=webhooks)
+
+
+class WebhookEventBuffer:
+    """Coalesce webhook events about many instances of one (project, action) pair.
+
+    Instance ids are buffered during a job (storage sync, import, bulk action) and emitted when
+    the buffer holds settings.WEBHOOK_COALESCE_MAX_IDS ids, when settings.WEBHOOK_COALESCE_WINDOW seconds
+    passed since the first buffered id, or when the buffer is flushed/closed. Active webhooks are resolved
+    once per buffer. Instances are serialized only when the event is emitted, or not at all if
+    settings.WEBHOOK_COALESCE_COMPACT_PAYLOAD is enabled: then events contain id ranges only.
+
+    Example:
+        ```
+        with WebhookEventBuffer(organization, project, WebhookAction.TASKS_CREATED) as buffer:
+            for task in tasks:
+                buffer.add(task.id)
+        ```
+    """
+
+    def __init__(self, organization, project, action, compact=None):
+        self.organization = organization
+        self.project = project
+        self.action = action
+        self.compact = settings.WEBHOOK_COALESCE_COMPACT_PAYLOAD if compact is None else compact
+        self.webhooks = list(get_active_webhooks(organization, project, action))
+        self.ids = []
+        self.started_at = None
+
+    def add(self, ids):
+        """Buffer one id or a list of ids (or instances)"""
+        if not self.webhooks:
+            return
+        if not isinstance(ids, (list, tuple, set)):
+            ids = [ids]
+        if not self.ids:
+            self.started_at = time.monotonic()
+        self.ids.extend(getattr(pk, 'pk', pk) for pk in ids)
+
+        if (
+            len(self.ids) >= settings.WEBHOOK_COALESCE_MAX_IDS
+            or time.monotonic() - self.started_at >= settings.WEBHOOK_COALESCE_WINDOW
+        ):
+            self.flush()
+
+    def flush(self):
+        if not self.ids:
+            return
+        ids, self.ids = self.ids, []
+        logger.debug(f'Emit coalesced {self.action} webhook event for {len(ids)} instances')
+        if self.compact:
+            emit_webhooks_for_id_ranges(self.organization, self.project, self.action, ids, webhooks=self.webhooks)
+            return
+        # full payloads are kept within settings.WEBHOOK_BATCH_SIZE instances per request
+        batch_size = settings.WEBHOOK_BATCH_SIZE
+        for i in range(0, len(ids), batch_size):
+            emit_webhooks_for_instance(
+                self.organization, self.project, self.action, ids[i : i + batch_size], webhooks=self.webhooks
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        # instances created before a failure still exist, so they must be reported as well
+        try:
+            self.flush()
+        except Exception:
+            if exc_type is None:
+                raise
+            logger.error(f'Failed to emit coalesced {self.action} webhook event', exc_info=True)
 
 
 def emit_webhooks(organization, project, action, payload):